@@ -10,6 +10,7 @@ const App: React.FC = () => {
   const [currentConversationId, setCurrentConversationId] = useState<number | null>(null);
   const [configurations, setConfigurations] = useState<Configuration[]>([]);
   const [conversations, setConversations] = useState<Conversation[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [showConversations, setShowConversations] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
@@ -36,14 +37,26 @@ const App: React.FC = () => {
 
   const loadConversations = async () => {
     try {
-      const convs = await chatApi.getConversations();
-      setConversations(convs);
+      const page = await chatApi.getConversations();
+      setConversations(page.conversations);
+      setNextCursor(page.next_cursor ?? null);
       setShowConversations(true);
     } catch (error) {
       console.error('Failed to load conversations:', error);
     }
   };
 
+  const loadMoreConversations = async () => {
+    if (!nextCursor) return;
+    try {
+      const page = await chatApi.getConversations(nextCursor);
+      setConversations(prev => [...prev, ...page.conversations]);
+      setNextCursor(page.next_cursor ?? null);
+    } catch (error) {
+      console.error('Failed to load conversations:', error);
+    }
+  };
+
   const loadConversation = async (conversationId: number) => {
     try {
       const messages = await chatApi.getConversationMessages(conversationId);
@@ -68,22 +81,31 @@ const App: React.FC = () => {
     setIsLoading(true);
 
     try {
-      const response = await chatApi.sendMessage(
+      // The assistant message is rendered as tokens arrive and only gets its
+      // id, which enables the feedback buttons, from the final event
+      await chatApi.streamMessage(
         userMessage.content,
-        currentConversationId || undefined
-      );
-
-      const assistantMessage: Message = {
-        id: response.message_id,
-        role: 'assistant',
-        content: response.response,
-      };
+        (event) => {
+          setMessages(prev => {
+            const last = prev[prev.length - 1];
+            const isStreaming = last && last.role === 'assistant' && last.id === undefined;
+            const current: Message = isStreaming ? last : { role: 'assistant', content: '' };
+            const previous = isStreaming ? prev.slice(0, -1) : prev;
 
-      setMessages(prev => [...prev, assistantMessage]);
+            if (event.type === 'token') {
+              return [...previous, { ...current, content: current.content + event.content }];
+            } else if (event.type === 'done') {
+              return [...previous, { ...current, id: event.message_id }];
+            }
+            return [...previous, { role: 'system', content: event.content }];
+          });
 
-      if (!currentConversationId) {
-        setCurrentConversationId(response.conversation_id);
-      }
+          if (event.type === 'done' && !currentConversationId) {
+            setCurrentConversationId(event.conversation_id);
+          }
+        },
+        currentConversationId || undefined
+      );
     } catch (error) {
       console.error('Failed to send message:', error);
       setMessages(prev => [...prev, {
@@ -170,7 +192,7 @@ const App: React.FC = () => {
               )}
             </div>
           ))}
-          {isLoading && (
+          {isLoading && messages[messages.length - 1]?.role !== 'assistant' && (
             <div className="message assistant">
               <div className="loading-dots">
                 <span></span>
@@ -224,6 +246,9 @@ const App: React.FC = () => {
                 </div>
               ))}
             </div>
+            {nextCursor && (
+              <button onClick={loadMoreConversations}>Load more</button>
+            )}
           </div>
         </div>
       )}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { ChatResponse, Configuration, Conversation, Message, FeedbackRequest } from './types';
+import { ChatResponse, ChatStreamEvent, Configuration, ConversationPage, Message, FeedbackRequest } from './types';
 
 const API_BASE_URL = '/api/v1';
 
@@ -19,8 +19,45 @@ export const chatApi = {
     return response.data;
   },
 
-  getConversations: async (): Promise<Conversation[]> => {
-    const response = await api.get<Conversation[]>('/conversations');
+  streamMessage: async (
+    message: string,
+    onEvent: (event: ChatStreamEvent) => void,
+    conversationId?: number,
+  ): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, conversation_id: conversationId }),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Stream request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop() || '';
+
+      for (const event of events) {
+        if (event.startsWith('data: ')) {
+          onEvent(JSON.parse(event.slice('data: '.length)));
+        }
+      }
+    }
+  },
+
+  getConversations: async (cursor?: string): Promise<ConversationPage> => {
+    const response = await api.get<ConversationPage>('/conversations', {
+      params: cursor ? { cursor } : undefined,
+    });
     return response.data;
   },
 
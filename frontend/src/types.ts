@@ -12,6 +12,11 @@ export interface ChatResponse {
   message_id: number;
 }
 
+export type ChatStreamEvent =
+  | { type: 'token'; content: string }
+  | { type: 'done'; conversation_id: number; message_id: number }
+  | { type: 'error'; content: string };
+
 export interface Configuration {
   id: number;
   name: string;
@@ -28,6 +33,12 @@ export interface Conversation {
   created_at: string;
   updated_at: string;
   message_count: number;
+  last_message_at?: string | null;
+}
+
+export interface ConversationPage {
+  conversations: Conversation[];
+  next_cursor?: string | null;
 }
 
 export interface FeedbackRequest {
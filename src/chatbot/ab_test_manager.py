@@ -1,6 +1,12 @@
+import os
+import time
+import atexit
 import hashlib
-from typing import Optional, Dict, Any
-from sqlalchemy import func, case
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, NamedTuple, Tuple
+from sqlalchemy import func, case, insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from chatbot.db.database import db
 from chatbot.db.models import ABTest, ABTestAssignment, Configuration, Feedback, Message, Conversation
@@ -8,7 +14,200 @@ from chatbot.config_manager import config_manager
 from chatbot.config_schemas import ChatbotConfiguration
 
 
+class ActiveTest(NamedTuple):
+    id: int
+    traffic_percentage: int
+    control_config_id: int
+    treatment_config_id: int
+
+
 class ABTestManager:
+    def __init__(self) -> None:
+        self.cache_ttl: float = float(os.getenv("AB_TEST_CACHE_TTL", "5"))
+        self.flush_interval: float = float(os.getenv("AB_ASSIGNMENT_FLUSH_INTERVAL", "5"))
+        self.flush_batch_size: int = int(os.getenv("AB_ASSIGNMENT_BATCH_SIZE", "500"))
+        self.max_recorded: int = int(os.getenv("AB_ASSIGNMENT_MAX_RECORDED", "100000"))
+        self.max_flush_attempts: int = int(os.getenv("AB_ASSIGNMENT_MAX_ATTEMPTS", "3"))
+
+        self._active_test: Optional[ActiveTest] = None
+        self._checked_at: Optional[float] = None
+        # Assignments waiting to be written, and the ones already queued or
+        # written recently so repeat visitors are not queued again
+        self._pending: Dict[Tuple[str, int], str] = {}
+        self._recorded: "OrderedDict[Tuple[str, int], None]" = OrderedDict()
+        self._attempts: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._exit_flush_registered = False
+
+    @staticmethod
+    def assign_variant(user_identifier: str, test: ActiveTest) -> str:
+        hash_value = int(hashlib.md5(
+            f"{user_identifier}:{test.id}".encode()
+        ).hexdigest(), 16)
+
+        return "treatment" if (hash_value % 100) < test.traffic_percentage else "control"
+
+    def invalidate_cache(self) -> None:
+        with self._lock:
+            self._active_test = None
+            self._checked_at = None
+
+    def _get_active_test(self) -> Optional[ActiveTest]:
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+                return self._active_test
+
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            row = session.query(
+                ABTest.id,
+                ABTest.traffic_percentage,
+                ABTest.control_config_id,
+                ABTest.treatment_config_id
+            ).filter_by(is_active=True).first()
+
+            active_test = ActiveTest(*row) if row else None
+        finally:
+            session.close()
+
+        with self._lock:
+            self._active_test = active_test
+            self._checked_at = time.monotonic()
+
+        return active_test
+
+    def _record_assignment(self, user_identifier: str, test_id: int, variant: str) -> None:
+        key = (user_identifier, test_id)
+
+        with self._lock:
+            if key in self._recorded:
+                self._recorded.move_to_end(key)
+                return
+
+            self._recorded[key] = None
+            if len(self._recorded) > self.max_recorded:
+                self._recorded.popitem(last=False)
+
+            self._pending[key] = variant
+            pending_count = len(self._pending)
+
+            # The flusher is a daemon thread, so a short-lived process such
+            # as a CLI run writes what is still queued when it exits
+            if not self._exit_flush_registered:
+                atexit.register(self.shutdown)
+                self._exit_flush_registered = True
+
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stopped.clear()
+                self._flusher = threading.Thread(
+                    target=self._flush_loop,
+                    name="ab-assignment-flusher",
+                    daemon=True
+                )
+                self._flusher.start()
+
+        if pending_count >= self.flush_batch_size:
+            self._flush_requested.set()
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            written = self._write_assignments(pending)
+        except Exception as e:
+            print(f"Error flushing A/B test assignments: {str(e)}")
+            return self._retry_failed(pending)
+
+        with self._lock:
+            for key in pending:
+                self._attempts.pop(key, None)
+
+        return written
+
+    def _retry_failed(self, pending: Dict[Tuple[str, int], str]) -> int:
+        # A failed batch is requeued whole, which rides out a brief outage.
+        # Rows that keep failing are written one at a time so a bad row
+        # cannot hold back the rest, and dropped if they still fail
+        retry = {}
+        isolate = {}
+        with self._lock:
+            for key, variant in pending.items():
+                attempts = self._attempts[key] = self._attempts.get(key, 0) + 1
+                if attempts < self.max_flush_attempts:
+                    retry[key] = variant
+                else:
+                    isolate[key] = variant
+            for key, variant in retry.items():
+                self._pending.setdefault(key, variant)
+
+        written = 0
+        for key, variant in isolate.items():
+            try:
+                written += self._write_assignments({key: variant})
+            except Exception as e:
+                print(f"Dropping A/B test assignment {key} after {self.max_flush_attempts} failed writes: {str(e)}")
+            with self._lock:
+                self._attempts.pop(key, None)
+
+        return written
+
+    def _write_assignments(self, pending: Dict[Tuple[str, int], str]) -> int:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            rows = [
+                {"user_identifier": user, "test_id": test_id, "variant": variant}
+                for (user, test_id), variant in pending.items()
+            ]
+
+            # Assignments are analytics only, so users already written by
+            # another process are skipped on the (user_identifier, test_id)
+            # unique constraint that migration 0003 adds
+            result = session.execute(self._insert_assignments(session).values(rows))
+            session.commit()
+
+            return result.rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _insert_assignments(session: Session):
+        dialect = session.get_bind().dialect.name
+        if dialect == "postgresql":
+            statement = postgresql.insert(ABTestAssignment)
+        elif dialect == "sqlite":
+            statement = sqlite.insert(ABTestAssignment)
+        else:
+            return insert(ABTestAssignment)
+
+        return statement.on_conflict_do_nothing(index_elements=["user_identifier", "test_id"])
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._flush_requested.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval)
+        self.flush()
+
     def create_ab_test(
             self,
             name: str,
@@ -40,6 +239,7 @@ class ABTestManager:
 
             session.add(ab_test)
             session.commit()
+            self.invalidate_cache()
 
             return {
                 "id": ab_test.id,
@@ -51,54 +251,28 @@ class ABTestManager:
         finally:
             session.close()
 
-    def get_config_for_user(self, user_identifier: str) -> Configuration:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
+    def get_config_for_user(self, user_identifier: str) -> ChatbotConfiguration:
+        active_test = self._get_active_test()
 
-        try:
-            # Check for active A/B tests
-            active_test = session.query(ABTest).filter_by(is_active=True).first()
-
-            if not active_test:
-                # No active test, return default active config
-                return config_manager.get_active_configuration()
-
-            # Check if user already assigned
-            assignment = session.query(ABTestAssignment).filter_by(
-                user_identifier=user_identifier,
-                test_id=active_test.id
-            ).first()
-
-            if not assignment:
-                # Assign user to variant based on hash
-                hash_value = int(hashlib.md5(
-                    f"{user_identifier}:{active_test.id}".encode()
-                ).hexdigest(), 16)
-
-                variant = "treatment" if (hash_value % 100) < active_test.traffic_percentage else "control"
-
-                assignment = ABTestAssignment(
-                    user_identifier=user_identifier,
-                    test_id=active_test.id,
-                    variant=variant
-                )
-                session.add(assignment)
-                session.commit()
-
-            # Return appropriate config
-            config_id = (
-                active_test.treatment_config_id
-                if assignment.variant == "treatment"
-                else active_test.control_config_id
-            )
+        if not active_test:
+            # No active test, return default active config
+            return config_manager.get_active_configuration()
 
-            config = session.query(Configuration).filter_by(id=config_id).first()
-            return ChatbotConfiguration(**config.config_json)
+        variant = self.assign_variant(user_identifier, active_test)
+        self._record_assignment(user_identifier, active_test.id, variant)
 
-        finally:
-            session.close()
+        # Return appropriate config
+        config_id = (
+            active_test.treatment_config_id
+            if variant == "treatment"
+            else active_test.control_config_id
+        )
+
+        return config_manager.get_configuration_model(config_id) or config_manager.get_active_configuration()
 
     def get_test_results(self, test_id: int) -> Dict[str, Any]:
+        self.flush()
+
         session_gen = db.get_session()
         session: Session = next(session_gen)
 
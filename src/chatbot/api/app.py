@@ -3,14 +3,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from chatbot.db.database import db
 from chatbot.api.routes import router
+from chatbot.llm import llm_clients
+from chatbot.ab_test_manager import ab_test_manager
+from chatbot.knowledge.manager import knowledge_manager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    db.create_tables()
-    print("Database tables created/verified")
+    db.migrate()
+    print("Database schema migrated")
+    knowledge_manager.registry.refresh()
     yield
     print("Shutting down...")
+    await llm_clients.aclose()
+    await db.dispose_async_engine()
+    ab_test_manager.shutdown()
 
 
 app = FastAPI(
@@ -1,6 +1,7 @@
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
+from chatbot.config_schemas import ChunkingSettings, EmbeddingSettings
 
 
 class ChatRequest(BaseModel):
@@ -30,11 +31,19 @@ class ConversationSummary(BaseModel):
     created_at: datetime
     updated_at: datetime
     message_count: int
+    last_message_at: Optional[datetime] = None
+
+
+class ConversationPage(BaseModel):
+    conversations: List[ConversationSummary]
+    next_cursor: Optional[str] = None
 
 
 class KnowledgeSourceRequest(BaseModel):
     name: str
     description: Optional[str] = None
+    chunking: Optional[ChunkingSettings] = None
+    embedding: Optional[EmbeddingSettings] = None
 
 
 class KnowledgeSourceResponse(BaseModel):
@@ -52,6 +61,19 @@ class SearchRequest(BaseModel):
     query: str
     knowledge_source_ids: Optional[List[int]] = None
     n_results: int = 3
+    hybrid: bool = False
+
+
+class ReplaceDocumentRequest(BaseModel):
+    document: str
+    metadata: Optional[dict] = None
+
+
+class DocumentResponse(BaseModel):
+    document_id: str
+    document: str
+    chunk_count: int
+    metadata: dict
 
 
 class SearchResult(BaseModel):
@@ -1,82 +1,113 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+import json
+import asyncio
+from contextlib import aclosing
+from typing import List, Optional, AsyncIterator
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from chatbot.main import ChatBot
 from chatbot.db.database import db
 from chatbot.db.models import Conversation, Message, Feedback
+from chatbot.db.queries import list_conversations_page, MAX_CONVERSATION_PAGE_SIZE
 from chatbot.knowledge.manager import knowledge_manager
+from chatbot.knowledge.rerank import check_scorer, reranker_stats
 from chatbot.feedback_analytics import feedback_analytics
 from chatbot.config_manager import config_manager
 from chatbot.ab_test_manager import ab_test_manager
+from chatbot.conversation_cache import conversation_cache
+from chatbot.response_cache import response_cache
 from chatbot.config_schemas import ChatbotConfiguration
 from chatbot.api.models import (
     ChatRequest, ChatResponse, FeedbackRequest, FeedbackResponse,
-    ConversationSummary, KnowledgeSourceRequest, KnowledgeSourceResponse,
-    AddDocumentsRequest, SearchRequest, SearchResult
+    ConversationSummary, ConversationPage, KnowledgeSourceRequest, KnowledgeSourceResponse,
+    AddDocumentsRequest, SearchRequest, SearchResult, DocumentResponse,
+    ReplaceDocumentRequest
 )
 
 router = APIRouter()
 
 
-def get_db() -> Session:
-    session_gen = db.get_session()
-    return next(session_gen)
+async def get_db() -> AsyncIterator[AsyncSession]:
+    # The session is closed when the request finishes, including when the
+    # handler raises, so its connection always goes back to the pool
+    async with db.async_session_factory() as session:
+        yield session
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, session: Session = Depends(get_db)) -> ChatResponse:
+async def chat(request: ChatRequest) -> ChatResponse:
+    chatbot: Optional[ChatBot] = None
     try:
-        chatbot = ChatBot(conversation_id=request.conversation_id)
-        response = chatbot.chat(request.message)
+        chatbot = await ChatBot.create(conversation_id=request.conversation_id)
+        response = await chatbot.achat(request.message)
 
-        last_message = session.query(Message).filter_by(
-            conversation_id=chatbot.conversation_id,
-            role="assistant"
-        ).order_by(Message.created_at.desc()).first()
+        if chatbot.last_message_id is None:
+            raise HTTPException(status_code=502, detail=response)
 
         return ChatResponse(
             response=response,
             conversation_id=chatbot.conversation_id,
-            message_id=last_message.id
+            message_id=chatbot.last_message_id
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        if hasattr(chatbot, 'session') and chatbot.session:
-            chatbot.session.close()
-
-
-@router.get("/conversations", response_model=List[ConversationSummary])
-async def list_conversations(session: Session = Depends(get_db)) -> List[ConversationSummary]:
-    conversations = session.query(Conversation).order_by(
-        Conversation.updated_at.desc()
-    ).all()
+        if chatbot and chatbot.session:
+            await asyncio.to_thread(chatbot.session.close)
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    chatbot = await ChatBot.create(conversation_id=request.conversation_id)
+
+    async def event_stream() -> AsyncIterator[str]:
+        # aclosing finishes the turn, saving it if the client disconnected,
+        # before the session is closed
+        try:
+            async with aclosing(chatbot.astream(request.message)) as events:
+                async for event in events:
+                    yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            await asyncio.to_thread(chatbot.session.close)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    summaries = []
-    for conv in conversations:
-        message_count = session.query(Message).filter_by(
-            conversation_id=conv.id
-        ).count()
 
-        summaries.append(ConversationSummary(
-            id=conv.id,
-            title=conv.title,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            message_count=message_count
-        ))
+@router.get("/conversations", response_model=ConversationPage)
+async def list_conversations(
+        limit: int = Query(50, ge=1, le=MAX_CONVERSATION_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_db)
+) -> ConversationPage:
+    try:
+        rows, next_cursor = await session.run_sync(lambda s: list_conversations_page(s, limit, cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return summaries
+    return ConversationPage(
+        conversations=[ConversationSummary(**row._asdict()) for row in rows],
+        next_cursor=next_cursor
+    )
 
 
 @router.get("/conversations/{conversation_id}/messages")
 async def get_conversation_messages(
         conversation_id: int,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
-    messages = session.query(Message).filter_by(
-        conversation_id=conversation_id
-    ).order_by(Message.created_at).all()
+    messages = (await session.execute(
+        select(Message.id, Message.role, Message.content, Message.created_at)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at)
+    )).all()
 
     if not messages:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -95,15 +126,22 @@ async def get_conversation_messages(
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
         conversation_id: int,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> dict:
-    conversation = session.query(Conversation).filter_by(id=conversation_id).first()
+    # The ORM cascade deletes messages and feedback, so they are loaded up
+    # front; async sessions cannot lazy-load them during the flush
+    conversation = await session.scalar(
+        select(Conversation)
+        .where(Conversation.id == conversation_id)
+        .options(selectinload(Conversation.messages).selectinload(Message.feedbacks))
+    )
 
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    session.delete(conversation)
-    session.commit()
+    await session.delete(conversation)
+    await session.commit()
+    conversation_cache.invalidate(conversation_id)
 
     return {"status": "deleted", "conversation_id": conversation_id}
 
@@ -111,10 +149,10 @@ async def delete_conversation(
 @router.post("/feedback", response_model=FeedbackResponse)
 async def submit_feedback(
         request: FeedbackRequest,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> FeedbackResponse:
-    message = session.query(Message).filter_by(id=request.message_id).first()
-    if not message:
+    message_id = await session.scalar(select(Message.id).where(Message.id == request.message_id))
+    if message_id is None:
         raise HTTPException(status_code=404, detail="Message not found")
 
     feedback = Feedback(
@@ -122,7 +160,7 @@ async def submit_feedback(
         feedback_type=request.feedback_type
     )
     session.add(feedback)
-    session.commit()
+    await session.commit()
 
     return FeedbackResponse(
         status="recorded",
@@ -134,10 +172,16 @@ async def submit_feedback(
 async def create_knowledge_source(
         request: KnowledgeSourceRequest
 ) -> KnowledgeSourceResponse:
-    source = knowledge_manager.create_knowledge_source(
-        request.name,
-        request.description
-    )
+    try:
+        source = await asyncio.to_thread(
+            knowledge_manager.create_knowledge_source,
+            request.name,
+            request.description,
+            request.chunking,
+            request.embedding
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return KnowledgeSourceResponse(
         id=source["id"],
@@ -149,7 +193,7 @@ async def create_knowledge_source(
 
 @router.get("/knowledge-sources", response_model=List[KnowledgeSourceResponse])
 async def list_knowledge_sources() -> List[KnowledgeSourceResponse]:
-    sources = knowledge_manager.list_knowledge_sources()
+    sources = await asyncio.to_thread(knowledge_manager.list_knowledge_sources)
 
     return [
         KnowledgeSourceResponse(
@@ -168,18 +212,72 @@ async def add_documents(
         request: AddDocumentsRequest
 ) -> dict:
     try:
-        count = knowledge_manager.add_documents(source_id, request.documents)
+        count = await asyncio.to_thread(knowledge_manager.add_documents, source_id, request.documents)
         return {"status": "success", "documents_added": count}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.get("/knowledge-sources/registry")
+async def get_knowledge_source_registry() -> dict:
+    # age_seconds is how long ago the registry was last read from the database
+    return knowledge_manager.registry.stats()
+
+
+@router.get("/knowledge-sources/{source_id}/documents/{document_id}", response_model=DocumentResponse)
+async def get_document(source_id: int, document_id: str) -> DocumentResponse:
+    try:
+        document = await asyncio.to_thread(knowledge_manager.get_document, source_id, document_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return DocumentResponse(**document)
+
+
+@router.put("/knowledge-sources/{source_id}/documents/{document_id}")
+async def replace_document(
+        source_id: int,
+        document_id: str,
+        request: ReplaceDocumentRequest
+) -> dict:
+    try:
+        new_document_id = await asyncio.to_thread(
+            knowledge_manager.replace_document,
+            source_id, document_id, request.document, request.metadata
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if new_document_id is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return {"status": "replaced", "document_id": new_document_id}
+
+
+@router.delete("/knowledge-sources/{source_id}/documents/{document_id}")
+async def delete_document(source_id: int, document_id: str) -> dict:
+    try:
+        deleted = await asyncio.to_thread(knowledge_manager.delete_document, source_id, document_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    return {"status": "deleted"}
+
+
 @router.post("/search", response_model=List[SearchResult])
 async def search_knowledge(request: SearchRequest) -> List[SearchResult]:
-    results = knowledge_manager.search(
+    results = await asyncio.to_thread(
+        knowledge_manager.search,
         request.query,
         request.knowledge_source_ids,
-        request.n_results
+        request.n_results,
+        request.hybrid
     )
 
     return [
@@ -200,7 +298,8 @@ async def update_knowledge_source(
         is_active: Optional[bool] = None
 ) -> dict:
     try:
-        return knowledge_manager.update_knowledge_source(
+        return await asyncio.to_thread(
+            knowledge_manager.update_knowledge_source,
             source_id, name, description, is_active
         )
     except ValueError as e:
@@ -209,7 +308,7 @@ async def update_knowledge_source(
 
 @router.delete("/knowledge-sources/{source_id}")
 async def delete_knowledge_source(source_id: int) -> dict:
-    if knowledge_manager.delete_knowledge_source(source_id):
+    if await asyncio.to_thread(knowledge_manager.delete_knowledge_source, source_id):
         return {"status": "deleted"}
     else:
         raise HTTPException(status_code=404, detail="Knowledge source not found")
@@ -218,17 +317,17 @@ async def delete_knowledge_source(source_id: int) -> dict:
 @router.get("/feedback/summary")
 async def get_feedback_summary(
         days: int = 7,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> dict:
-    return feedback_analytics.get_feedback_summary(session, days)
+    return await feedback_analytics.aget_feedback_summary(session, days)
 
 
 @router.get("/feedback/conversation/{conversation_id}")
 async def get_conversation_feedback(
         conversation_id: int,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
-    feedback = feedback_analytics.get_conversation_feedback(conversation_id, session)
+    feedback = await feedback_analytics.aget_conversation_feedback(session, conversation_id)
     if not feedback:
         raise HTTPException(status_code=404, detail="No feedback found for this conversation")
     return feedback
@@ -237,18 +336,19 @@ async def get_conversation_feedback(
 @router.get("/feedback/worst-performing")
 async def get_worst_performing_messages(
         limit: int = 10,
-        session: Session = Depends(get_db)
+        session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
-    return feedback_analytics.get_worst_performing_messages(limit, session)
+    return await feedback_analytics.aget_worst_performing_messages(session, limit)
 
 
 @router.post("/configurations", response_model=dict)
 async def create_configuration(
         config: ChatbotConfiguration,
-        activate: bool = False
+        activate: bool = False,
+        session: AsyncSession = Depends(get_db)
 ) -> dict:
     try:
-        return config_manager.create_configuration(config, activate)
+        return await config_manager.acreate_configuration(session, config, activate)
     except ValueError as e:
         print(f'ERRORRRRRR: {str(e)}')
         raise HTTPException(status_code=400, detail=str(e))
@@ -257,15 +357,16 @@ async def create_configuration(
 @router.get("/configurations", response_model=List[dict])
 async def list_configurations(
         tags: Optional[str] = None,
-        active_only: bool = False
+        active_only: bool = False,
+        session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
     tag_list = tags.split(",") if tags else None
-    return config_manager.list_configurations(tag_list, active_only)
+    return await config_manager.alist_configurations(session, tag_list, active_only)
 
 
 @router.get("/configurations/{config_id}", response_model=dict)
-async def get_configuration(config_id: int) -> dict:
-    config = config_manager.get_configuration(config_id)
+async def get_configuration(config_id: int, session: AsyncSession = Depends(get_db)) -> dict:
+    config = await config_manager.aget_configuration(session, config_id)
     if not config:
         raise HTTPException(status_code=404, detail="Configuration not found")
     return config
@@ -274,26 +375,32 @@ async def get_configuration(config_id: int) -> dict:
 @router.put("/configurations/{config_id}", response_model=dict)
 async def update_configuration(
         config_id: int,
-        config: ChatbotConfiguration
+        config: ChatbotConfiguration,
+        session: AsyncSession = Depends(get_db)
 ) -> dict:
     try:
-        return config_manager.update_configuration(config_id, config)
+        check_scorer(config.knowledge_settings.rerank)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return await config_manager.aupdate_configuration(session, config_id, config)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.post("/configurations/{config_id}/activate", response_model=dict)
-async def activate_configuration(config_id: int) -> dict:
+async def activate_configuration(config_id: int, session: AsyncSession = Depends(get_db)) -> dict:
     try:
-        return config_manager.activate_configuration(config_id)
+        return await config_manager.aactivate_configuration(session, config_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.delete("/configurations/{config_id}")
-async def delete_configuration(config_id: int) -> dict:
+async def delete_configuration(config_id: int, session: AsyncSession = Depends(get_db)) -> dict:
     try:
-        if config_manager.delete_configuration(config_id):
+        if await config_manager.adelete_configuration(session, config_id):
             return {"status": "deleted"}
         else:
             raise HTTPException(status_code=404, detail="Configuration not found")
@@ -310,7 +417,8 @@ async def create_ab_test(
         description: Optional[str] = None
 ) -> dict:
     try:
-        return ab_test_manager.create_ab_test(
+        return await asyncio.to_thread(
+            ab_test_manager.create_ab_test,
             name, control_config_id, treatment_config_id,
             traffic_percentage, description
         )
@@ -320,7 +428,7 @@ async def create_ab_test(
 
 @router.get("/ab-tests/{test_id}/results")
 async def get_ab_test_results(test_id: int) -> dict:
-    results = ab_test_manager.get_test_results(test_id)
+    results = await asyncio.to_thread(ab_test_manager.get_test_results, test_id)
     if not results:
         raise HTTPException(status_code=404, detail="Test not found")
 
@@ -330,3 +438,23 @@ async def get_ab_test_results(test_id: int) -> dict:
         "winner": "treatment" if results.get("treatment", {}).get("satisfaction_rate", 0) >
                                  results.get("control", {}).get("satisfaction_rate", 0) else "control"
     }
+
+
+@router.get("/response-cache/stats")
+async def get_response_cache_stats() -> dict:
+    return response_cache.stats()
+
+
+@router.get("/search-cache/stats")
+async def get_search_cache_stats() -> dict:
+    return knowledge_manager.search_cache.stats()
+
+
+@router.get("/rerank/stats")
+async def get_rerank_stats() -> dict:
+    return reranker_stats()
+
+
+@router.get("/db/pool-stats")
+async def get_db_pool_stats() -> dict:
+    return db.pool_stats()
@@ -1,21 +1,90 @@
-from typing import Optional, List, Dict, Any
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Tuple, Iterator
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_
 from chatbot.db.database import db
 from chatbot.db.models import Configuration
 from chatbot.config_schemas import ChatbotConfiguration
+from chatbot.knowledge.rerank import check_scorer
 
 
 class ConfigurationManager:
+    def __init__(self) -> None:
+        # Parsed configurations keyed by (id, version), plus the version stamp
+        # of each lookup and when it was last checked against the database
+        self.cache_ttl: float = float(os.getenv("CONFIG_CACHE_TTL", "5"))
+        self._parsed: Dict[Tuple[int, int], ChatbotConfiguration] = {}
+        self._stamps: Dict[Any, Tuple[float, Optional[Tuple[int, int]]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _session(self, session: Optional[Session]) -> Iterator[Session]:
+        # API callers pass in their session; CLI callers get one of their own
+        if session is not None:
+            yield session
+            return
+
+        session_gen = db.get_session()
+        own_session: Session = next(session_gen)
+        try:
+            yield own_session
+        finally:
+            own_session.close()
+
+    def invalidate_cache(self) -> None:
+        with self._lock:
+            self._parsed.clear()
+            self._stamps.clear()
+
+    def _cached(self, key: Any) -> Tuple[bool, Optional[ChatbotConfiguration]]:
+        with self._lock:
+            entry = self._stamps.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.cache_ttl:
+                return False, None
+            stamp = entry[1]
+            if stamp is None:
+                return True, None
+            parsed = self._parsed.get(stamp)
+            return parsed is not None, parsed
+
+    def _load(
+            self,
+            session: Session,
+            key: Any,
+            stamp: Optional[Tuple[int, int]]
+    ) -> Optional[ChatbotConfiguration]:
+        parsed = None
+        if stamp is not None:
+            with self._lock:
+                parsed = self._parsed.get(stamp)
+
+            if parsed is None:
+                row = session.query(Configuration.config_json).filter_by(id=stamp[0]).first()
+                if row is None:
+                    stamp = None
+                else:
+                    parsed = ChatbotConfiguration(**row.config_json)
+
+        with self._lock:
+            if parsed is not None:
+                self._parsed[stamp] = parsed
+            self._stamps[key] = (time.monotonic(), stamp)
+
+        return parsed
+
     def create_configuration(
             self,
             config_data: ChatbotConfiguration,
-            activate: bool = False
+            activate: bool = False,
+            session: Optional[Session] = None
     ) -> Dict[str, Any]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
+        check_scorer(config_data.knowledge_settings.rerank)
 
-        try:
+        with self._session(session) as session:
             existing = session.query(Configuration).filter_by(
                 name=config_data.name
             ).first()
@@ -36,6 +105,7 @@ class ConfigurationManager:
 
             session.add(config)
             session.commit()
+            self.invalidate_cache()
 
             return {
                 "id": config.id,
@@ -44,30 +114,52 @@ class ConfigurationManager:
                 "is_active": config.is_active,
                 "created_at": config.created_at.isoformat()
             }
-        finally:
-            session.close()
-
-    def get_active_configuration(self) -> Optional[ChatbotConfiguration]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
 
-        try:
-            active_config = session.query(Configuration).filter_by(
+    def get_active_configuration(
+            self,
+            session: Optional[Session] = None
+    ) -> Optional[ChatbotConfiguration]:
+        is_cached, parsed = self._cached("active")
+        if is_cached:
+            return parsed or ChatbotConfiguration(name="default")
+
+        with self._session(session) as session:
+            # Only the version stamp is read; the JSON is parsed once per version
+            active_config = session.query(Configuration.id, Configuration.version).filter_by(
                 is_active=True
             ).first()
 
-            if active_config:
-                return ChatbotConfiguration(**active_config.config_json)
+            stamp = (active_config.id, active_config.version) if active_config else None
+            parsed = self._load(session, "active", stamp)
+
+            if parsed:
+                return parsed
 
             return ChatbotConfiguration(name="default")
-        finally:
-            session.close()
 
-    def get_configuration(self, config_id: int) -> Optional[Dict[str, Any]]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
+    def get_configuration_model(
+            self,
+            config_id: int,
+            session: Optional[Session] = None
+    ) -> Optional[ChatbotConfiguration]:
+        is_cached, parsed = self._cached(config_id)
+        if is_cached:
+            return parsed
+
+        with self._session(session) as session:
+            config = session.query(Configuration.id, Configuration.version).filter_by(
+                id=config_id
+            ).first()
 
-        try:
+            stamp = (config.id, config.version) if config else None
+            return self._load(session, config_id, stamp)
+
+    def get_configuration(
+            self,
+            config_id: int,
+            session: Optional[Session] = None
+    ) -> Optional[Dict[str, Any]]:
+        with self._session(session) as session:
             config = session.query(Configuration).filter_by(id=config_id).first()
 
             if not config:
@@ -84,18 +176,16 @@ class ConfigurationManager:
                 "created_at": config.created_at.isoformat(),
                 "updated_at": config.updated_at.isoformat()
             }
-        finally:
-            session.close()
 
     def update_configuration(
             self,
             config_id: int,
-            config_data: ChatbotConfiguration
+            config_data: ChatbotConfiguration,
+            session: Optional[Session] = None
     ) -> Dict[str, Any]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
+        check_scorer(config_data.knowledge_settings.rerank)
 
-        try:
+        with self._session(session) as session:
             config = session.query(Configuration).filter_by(id=config_id).first()
 
             if not config:
@@ -106,6 +196,7 @@ class ConfigurationManager:
             config.tag_list = config_data.tags
 
             session.commit()
+            self.invalidate_cache()
 
             return {
                 "id": config.id,
@@ -113,14 +204,13 @@ class ConfigurationManager:
                 "version": config.version,
                 "updated_at": config.updated_at.isoformat()
             }
-        finally:
-            session.close()
 
-    def activate_configuration(self, config_id: int) -> Dict[str, Any]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
-
-        try:
+    def activate_configuration(
+            self,
+            config_id: int,
+            session: Optional[Session] = None
+    ) -> Dict[str, Any]:
+        with self._session(session) as session:
             config = session.query(Configuration).filter_by(id=config_id).first()
 
             if not config:
@@ -130,24 +220,21 @@ class ConfigurationManager:
 
             config.is_active = True
             session.commit()
+            self.invalidate_cache()
 
             return {
                 "id": config.id,
                 "name": config.name,
                 "activated": True
             }
-        finally:
-            session.close()
 
     def list_configurations(
             self,
             tags: Optional[List[str]] = None,
-            active_only: bool = False
+            active_only: bool = False,
+            session: Optional[Session] = None
     ) -> List[Dict[str, Any]]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
-
-        try:
+        with self._session(session) as session:
             query = session.query(Configuration)
 
             if active_only:
@@ -171,14 +258,13 @@ class ConfigurationManager:
                 }
                 for c in configs
             ]
-        finally:
-            session.close()
 
-    def delete_configuration(self, config_id: int) -> bool:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
-
-        try:
+    def delete_configuration(
+            self,
+            config_id: int,
+            session: Optional[Session] = None
+    ) -> bool:
+        with self._session(session) as session:
             config = session.query(Configuration).filter_by(id=config_id).first()
 
             if not config:
@@ -189,9 +275,44 @@ class ConfigurationManager:
 
             session.delete(config)
             session.commit()
+            self.invalidate_cache()
             return True
-        finally:
-            session.close()
+
+    # Async variants for the API: the methods above run on the AsyncSession's
+    # connection, so their queries do not block the event loop
+
+    async def acreate_configuration(
+            self,
+            session: AsyncSession,
+            config_data: ChatbotConfiguration,
+            activate: bool = False
+    ) -> Dict[str, Any]:
+        return await session.run_sync(lambda s: self.create_configuration(config_data, activate, s))
+
+    async def aget_configuration(self, session: AsyncSession, config_id: int) -> Optional[Dict[str, Any]]:
+        return await session.run_sync(lambda s: self.get_configuration(config_id, s))
+
+    async def aupdate_configuration(
+            self,
+            session: AsyncSession,
+            config_id: int,
+            config_data: ChatbotConfiguration
+    ) -> Dict[str, Any]:
+        return await session.run_sync(lambda s: self.update_configuration(config_id, config_data, s))
+
+    async def aactivate_configuration(self, session: AsyncSession, config_id: int) -> Dict[str, Any]:
+        return await session.run_sync(lambda s: self.activate_configuration(config_id, s))
+
+    async def alist_configurations(
+            self,
+            session: AsyncSession,
+            tags: Optional[List[str]] = None,
+            active_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        return await session.run_sync(lambda s: self.list_configurations(tags, active_only, s))
+
+    async def adelete_configuration(self, session: AsyncSession, config_id: int) -> bool:
+        return await session.run_sync(lambda s: self.delete_configuration(config_id, s))
 
 
 config_manager = ConfigurationManager()
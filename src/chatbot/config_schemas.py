@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from pydantic import BaseModel, Field, model_validator
 
 
 class ModelParameters(BaseModel):
@@ -26,6 +26,17 @@ class PromptTemplate(BaseModel):
     )
 
 
+class RerankSettings(BaseModel):
+    enabled: bool = Field(False, description="Rescore over-fetched candidates before keeping the top results")
+    scorer: Literal["lexical", "cross_encoder"] = Field(
+        "lexical",
+        description="Query/document term overlap or a sentence-transformers cross-encoder"
+    )
+    model: Optional[str] = Field(None, description="Cross-encoder model name")
+    candidates: int = Field(20, ge=1, le=100, description="Hits fetched for reranking")
+    budget_ms: float = Field(50.0, gt=0, description="Time allowed for rescoring before falling back to vector order")
+
+
 class KnowledgeSettings(BaseModel):
     enabled: bool = Field(True, description="Enable knowledge retrieval")
     max_results: int = Field(3, ge=1, le=10)
@@ -34,6 +45,71 @@ class KnowledgeSettings(BaseModel):
         None,
         description="Specific knowledge sources to use, None means all"
     )
+    hybrid_search: bool = Field(
+        False,
+        description="Fuse BM25 keyword hits with vector hits; keyword hits bypass score_threshold"
+    )
+    rrf_k: int = Field(60, ge=1, description="Reciprocal rank fusion constant")
+    rerank: RerankSettings = Field(default_factory=RerankSettings)
+
+
+class ChunkingSettings(BaseModel):
+    # Sizes count whitespace-separated words, not model tokens; the default
+    # stays under the 256 wordpieces the default MiniLM model embeds
+    strategy: Literal["tokens", "sentences"] = Field(
+        "tokens",
+        description="Split on windows of words or pack whole sentences into chunks"
+    )
+    chunk_size: int = Field(160, ge=16, le=8192, description="Maximum words per chunk")
+    chunk_overlap: int = Field(32, ge=0, description="Words shared by consecutive chunks")
+
+    @model_validator(mode="after")
+    def check_overlap(self) -> "ChunkingSettings":
+        if self.chunk_overlap >= self.chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        return self
+
+
+class EmbeddingSettings(BaseModel):
+    backend: Literal["onnx", "sentence_transformers"] = Field(
+        "onnx",
+        description="Local ONNX MiniLM (Chroma's default model) or a sentence-transformers model"
+    )
+    model: Optional[str] = Field(
+        None,
+        description="sentence-transformers model name; the ONNX backend always uses all-MiniLM-L6-v2"
+    )
+    batch_size: int = Field(32, ge=1, le=1024, description="Texts embedded per model call")
+    num_threads: Optional[int] = Field(None, ge=1, description="Inference threads, None uses the runtime default")
+
+
+class ContextSettings(BaseModel):
+    context_window: int = Field(32768, ge=512, description="Model context window in tokens")
+    history_policy: Literal["drop_oldest", "truncate_oldest"] = Field(
+        "drop_oldest",
+        description="How history that does not fit the window is reduced"
+    )
+    max_history_messages: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Maximum number of past messages to send, in whole turns, None means no limit"
+    )
+    max_context_tokens: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Token cap for retrieved knowledge context, None means no cap"
+    )
+
+
+class ResponseCacheSettings(BaseModel):
+    enabled: bool = Field(False, description="Serve repeated questions from the response cache")
+    ttl_seconds: int = Field(3600, ge=1, description="How long a cached response stays valid")
+    similarity_threshold: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Cosine similarity for near-identical questions, None means exact match only"
+    )
 
 
 class ChatbotConfiguration(BaseModel):
@@ -43,6 +119,8 @@ class ChatbotConfiguration(BaseModel):
     model_parameters: ModelParameters = Field(default_factory=ModelParameters)
     prompt_template: PromptTemplate = Field(default_factory=PromptTemplate)
     knowledge_settings: KnowledgeSettings = Field(default_factory=KnowledgeSettings)
+    context_settings: ContextSettings = Field(default_factory=ContextSettings)
+    response_cache: ResponseCacheSettings = Field(default_factory=ResponseCacheSettings)
     tags: List[str] = Field(default_factory=list)
 
     class Config:
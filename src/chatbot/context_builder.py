@@ -0,0 +1,150 @@
+from typing import List, Dict, Optional
+from chatbot.config_schemas import ContextSettings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Framing tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Characters per token when no tokenizer is installed
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    # Keeps the end of the text, which is the part closest to the current turn
+    if max_tokens <= 0:
+        return ""
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[-max_tokens:])
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[-max_chars:]
+
+
+class ContextBuilder:
+    def __init__(self, settings: ContextSettings, max_tokens: int) -> None:
+        self.settings = settings
+        self.max_tokens = max_tokens
+
+    def build(
+            self,
+            history: List[Dict[str, str]],
+            user_input: str,
+            documents: Optional[List[str]] = None,
+            context_template: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        # Leading system messages carry the system prompt and are always kept
+        split = 0
+        while split < len(history) and history[split]["role"] == "system":
+            split += 1
+        system_messages = history[:split]
+        turns = history[split:]
+
+        user_message = {"role": "user", "content": user_input}
+
+        budget = self.settings.context_window - self.max_tokens
+        budget -= sum(count_message_tokens(message) for message in system_messages)
+        budget -= count_message_tokens(user_message)
+
+        context_message = self._build_context_message(documents, context_template, budget)
+        if context_message:
+            budget -= count_message_tokens(context_message)
+
+        messages = system_messages + self._fit_history(turns, budget)
+        if context_message:
+            messages.append(context_message)
+        messages.append(user_message)
+
+        return messages
+
+    def _build_context_message(
+            self,
+            documents: Optional[List[str]],
+            context_template: Optional[str],
+            budget: int
+    ) -> Optional[Dict[str, str]]:
+        if not documents or not context_template:
+            return None
+
+        if self.settings.max_context_tokens is not None:
+            budget = min(budget, self.settings.max_context_tokens)
+
+        # Documents arrive best match first, so the weakest are dropped first
+        documents = list(documents)
+        while documents:
+            message = {
+                "role": "system",
+                "content": context_template.format(context="\n\n".join(documents))
+            }
+            if count_message_tokens(message) <= budget:
+                return message
+            documents.pop()
+
+        return None
+
+    @staticmethod
+    def _group_turns(messages: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+        # A turn is a user message and the replies that follow it, so history
+        # is trimmed between turns and never leaves a reply without its question
+        turns: List[List[Dict[str, str]]] = []
+        for message in messages:
+            if message["role"] == "user" or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _fit_history(self, messages: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+        turns = self._group_turns(messages)
+
+        limit = self.settings.max_history_messages
+        if limit is not None:
+            kept = 0
+            while kept < len(turns) and sum(len(turn) for turn in turns[len(turns) - kept - 1:]) <= limit:
+                kept += 1
+            turns = turns[len(turns) - kept:]
+
+        fitted: List[List[Dict[str, str]]] = []
+        for turn in reversed(turns):
+            tokens = sum(count_message_tokens(message) for message in turn)
+            if tokens <= budget:
+                fitted.append(turn)
+                budget -= tokens
+                continue
+
+            # The boundary turn keeps its replies whole and trims its question
+            if self.settings.history_policy == "truncate_oldest" and turn[0]["role"] == "user":
+                replies = turn[1:]
+                remaining = budget - sum(count_message_tokens(message) for message in replies)
+                content = truncate_to_tokens(turn[0]["content"], remaining - MESSAGE_OVERHEAD_TOKENS)
+                if content:
+                    fitted.append([{"role": "user", "content": content}] + replies)
+            break
+
+        fitted.reverse()
+        return [message for turn in fitted for message in turn]
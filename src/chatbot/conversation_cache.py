@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rough per-message overhead of the dict and its strings on top of the text
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+class ConversationCache:
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes: int = max_bytes if max_bytes is not None else int(
+            os.getenv("CONVERSATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+        )
+        self._entries: "OrderedDict[int, List[Dict[str, str]]]" = OrderedDict()
+        self._entry_sizes: Dict[int, int] = {}
+        self._size: int = 0
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def _message_size(message: Dict[str, str]) -> int:
+        return len(message["role"]) + len(message["content"].encode()) + MESSAGE_OVERHEAD_BYTES
+
+    def get(self, conversation_id: int) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            messages = self._entries.get(conversation_id)
+            if messages is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return list(messages)
+
+    def put(self, conversation_id: int, messages: List[Dict[str, str]]) -> None:
+        with self._lock:
+            self._remove(conversation_id)
+
+            size = sum(self._message_size(message) for message in messages)
+            if size > self.max_bytes:
+                return
+
+            self._entries[conversation_id] = list(messages)
+            self._entry_sizes[conversation_id] = size
+            self._size += size
+            self._evict()
+
+    def append(self, conversation_id: int, message: Dict[str, str]) -> None:
+        # Write-through for conversations that are already cached; uncached
+        # conversations are loaded from the database on their next turn
+        with self._lock:
+            messages = self._entries.get(conversation_id)
+            if messages is None:
+                return
+
+            size = self._message_size(message)
+            messages.append(dict(message))
+            self._entry_sizes[conversation_id] += size
+            self._size += size
+            self._entries.move_to_end(conversation_id)
+
+            if self._entry_sizes[conversation_id] > self.max_bytes:
+                self._remove(conversation_id)
+            self._evict()
+
+    def invalidate(self, conversation_id: int) -> None:
+        with self._lock:
+            self._remove(conversation_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._entry_sizes.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conversations": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def _remove(self, conversation_id: int) -> None:
+        if conversation_id in self._entries:
+            del self._entries[conversation_id]
+            self._size -= self._entry_sizes.pop(conversation_id)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            conversation_id, _ = self._entries.popitem(last=False)
+            self._size -= self._entry_sizes.pop(conversation_id)
+
+
+conversation_cache = ConversationCache()
@@ -1,24 +1,61 @@
 import os
-from typing import Optional, Generator
-from sqlalchemy import create_engine, Engine
+import threading
+from typing import Optional, Generator, Dict, Any
+from sqlalchemy import create_engine, event, Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
-from chatbot.db.models import Base
+from chatbot.db.migrate import upgrade_database
 
 load_dotenv()
 
 
+def pool_options() -> Dict[str, Any]:
+    # Size the pool for one process: pool_size + max_overflow is the most
+    # connections it will open, so multiply by the worker count when sizing
+    # the database's max_connections
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    }
+
+
+# Async drivers used for the API's engine when DATABASE_URL names a sync one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg"
+}
+
+
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_dialect().is_async:
+        return database_url
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
 class Database:
     def __init__(self, database_url: Optional[str] = None) -> None:
         self.database_url: str = database_url or os.getenv("DATABASE_URL")
 
-        if self.database_url.startswith("sqlite"):
-            self.engine: Engine = create_engine(
-                self.database_url,
-                connect_args={"check_same_thread": False}
-            )
-        else:
-            self.engine: Engine = create_engine(self.database_url)
+        self.connect_args: Dict[str, Any] = (
+            {"check_same_thread": False} if self.database_url.startswith("sqlite") else {}
+        )
+        # In-memory SQLite lives in a single connection, so it keeps
+        # SQLAlchemy's default pool
+        in_memory = self.database_url == "sqlite://" or ":memory:" in self.database_url
+        self.engine_options: Dict[str, Any] = {} if in_memory else pool_options()
+
+        self.engine: Engine = create_engine(
+            self.database_url,
+            connect_args=self.connect_args,
+            **self.engine_options
+        )
 
         self.SessionLocal = sessionmaker(
             autocommit=False,
@@ -26,8 +63,59 @@ class Database:
             bind=self.engine
         )
 
-    def create_tables(self) -> None:
-        Base.metadata.create_all(bind=self.engine)
+        # The async engine serves the API; it is created on first use so the
+        # CLIs, which stay on the sync engine, do not need an async driver
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
+
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._metrics_lock = threading.Lock()
+        self._track_pool("sync", self.engine)
+
+    def _track_pool(self, name: str, engine: Engine) -> None:
+        metrics = self._metrics[name] = {"peak_checked_out": 0, "total_checkouts": 0, "connections_opened": 0}
+
+        def on_connect(*args: Any) -> None:
+            with self._metrics_lock:
+                metrics["connections_opened"] += 1
+
+        def on_checkout(*args: Any) -> None:
+            with self._metrics_lock:
+                metrics["total_checkouts"] += 1
+                if isinstance(engine.pool, QueuePool):
+                    metrics["peak_checked_out"] = max(metrics["peak_checked_out"], engine.pool.checkedout())
+
+        event.listen(engine, "connect", on_connect)
+        event.listen(engine, "checkout", on_checkout)
+
+    def _create_async_engine(self) -> None:
+        self._async_engine = create_async_engine(
+            async_database_url(self.database_url),
+            connect_args=self.connect_args,
+            **self.engine_options
+        )
+        self._async_session_factory = async_sessionmaker(
+            self._async_engine,
+            autoflush=False,
+            # Attributes stay readable after commit without another round trip
+            expire_on_commit=False
+        )
+        self._track_pool("async", self._async_engine.sync_engine)
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._create_async_engine()
+        return self._async_engine
+
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        if self._async_session_factory is None:
+            self._create_async_engine()
+        return self._async_session_factory
+
+    def migrate(self) -> None:
+        upgrade_database(self.engine)
 
     def get_session(self) -> Generator[Session, None, None]:
         session = self.SessionLocal()
@@ -36,5 +124,37 @@ class Database:
         finally:
             session.close()
 
+    async def dispose_async_engine(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+
+    def _pool_stats(self, name: str, engine: Engine) -> Dict[str, Any]:
+        pool = engine.pool
+        with self._metrics_lock:
+            metrics = dict(self._metrics[name])
+
+        stats: Dict[str, Any] = {
+            "pool_class": type(pool).__name__,
+            "total_checkouts": metrics["total_checkouts"],
+            "connections_opened": metrics["connections_opened"]
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # Negative while the pool has not yet opened pool_size connections
+                "overflow": pool.overflow(),
+                "peak_checked_out": metrics["peak_checked_out"]
+            })
+        return stats
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats = {"sync": self._pool_stats("sync", self.engine)}
+        if self._async_engine is not None:
+            stats["async"] = self._pool_stats("async", self._async_engine.sync_engine)
+        return stats
+
 
 db = Database()
@@ -0,0 +1,36 @@
+import os
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import Engine, Connection, inspect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# Revision matching the schema create_all() used to build; databases created
+# that way are stamped here and upgraded from it
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection: Connection) -> Config:
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.attributes["connection"] = connection
+    return config
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        tables = set(inspect(connection).get_table_names())
+
+        if "alembic_version" not in tables and "conversations" in tables:
+            print(f"Existing schema without migration history, stamping revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, revision)
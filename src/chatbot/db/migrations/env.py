@@ -0,0 +1,36 @@
+from alembic import context
+from chatbot.db.models import Base
+
+target_metadata = Base.metadata
+
+
+def run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot alter constraints in place; batch mode rebuilds the table
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # chatbot.db.migrate passes its connection in; the alembic command line
+    # connects through the application's engine
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    from chatbot.db.database import db
+
+    with db.engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    raise RuntimeError("Offline migrations are not supported; run against a database")
+
+run_migrations_online()
@@ -0,0 +1,104 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def timestamps() -> list:
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "configurations",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("config_json", sa.JSON(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("tags", sa.Text(), nullable=True),
+        *timestamps(),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "conversations",
+        sa.Column("title", sa.String(length=255), nullable=True),
+        *timestamps(),
+    )
+    op.create_table(
+        "knowledge_sources",
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("collection_name", sa.String(length=255), nullable=False),
+        sa.Column("document_count", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *timestamps(),
+        sa.UniqueConstraint("collection_name"),
+    )
+    op.create_table(
+        "ab_tests",
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("control_config_id", sa.Integer(), nullable=False),
+        sa.Column("treatment_config_id", sa.Integer(), nullable=False),
+        sa.Column("traffic_percentage", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["control_config_id"], ["configurations.id"]),
+        sa.ForeignKeyConstraint(["treatment_config_id"], ["configurations.id"]),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "messages",
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversations.id"], ondelete="CASCADE"),
+    )
+    op.create_table(
+        "ab_test_assignments",
+        sa.Column("user_identifier", sa.String(length=255), nullable=False),
+        sa.Column("test_id", sa.Integer(), nullable=False),
+        sa.Column("variant", sa.String(length=50), nullable=False),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["test_id"], ["ab_tests.id"]),
+    )
+    op.create_table(
+        "feedback",
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("feedback_type", sa.String(length=50), nullable=False),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("feedback")
+    op.drop_table("ab_test_assignments")
+    op.drop_table("messages")
+    op.drop_table("ab_tests")
+    op.drop_table("knowledge_sources")
+    op.drop_table("conversations")
+    op.drop_table("configurations")
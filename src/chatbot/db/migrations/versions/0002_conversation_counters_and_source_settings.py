@@ -0,0 +1,57 @@
+"""Add conversation counters and knowledge source settings
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-17 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Counters of conversations that already have messages are filled from them
+BACKFILL_CONVERSATION_COUNTERS = """
+UPDATE conversations SET
+    message_count = (SELECT count(messages.id) FROM messages WHERE messages.conversation_id = conversations.id),
+    last_message_at = (SELECT max(messages.created_at) FROM messages WHERE messages.conversation_id = conversations.id)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Denormalized conversation counters
+    op.add_column("conversations", sa.Column("message_count", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("conversations", sa.Column("last_message_at", sa.DateTime(), nullable=True))
+    op.execute(BACKFILL_CONVERSATION_COUNTERS)
+
+    # Search cache version
+    op.add_column("knowledge_sources", sa.Column("version", sa.Integer(), server_default="0", nullable=False))
+    # Shared collection layout; existing sources keep their own collection
+    op.add_column(
+        "knowledge_sources",
+        sa.Column("storage_layout", sa.String(length=20), server_default="per_source", nullable=False)
+    )
+    # Per-source chunking and embedding settings; NULL keeps the defaults
+    op.add_column("knowledge_sources", sa.Column("chunking", sa.JSON(), nullable=True))
+    op.add_column("knowledge_sources", sa.Column("embedding", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("knowledge_sources") as batch_op:
+        batch_op.drop_column("embedding")
+        batch_op.drop_column("chunking")
+        batch_op.drop_column("storage_layout")
+        batch_op.drop_column("version")
+
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_column("last_message_at")
+        batch_op.drop_column("message_count")
@@ -0,0 +1,55 @@
+"""Index the hot lookups and make A/B test assignments unique
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-17 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_messages_conversation_id_created_at", "messages", ["conversation_id", "created_at"])
+    op.create_index("ix_feedback_message_id", "feedback", ["message_id"])
+    op.create_index("ix_feedback_feedback_type_created_at", "feedback", ["feedback_type", "created_at"])
+    op.create_index("ix_configurations_is_active", "configurations", ["is_active"])
+    op.create_index("ix_conversations_updated_at_id", "conversations", ["updated_at", "id"])
+
+    # Concurrent flushes from several processes could write the same
+    # assignment twice; the earliest row is the one that was served
+    op.execute(
+        """
+        DELETE FROM ab_test_assignments
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM ab_test_assignments GROUP BY user_identifier, test_id
+        )
+        """
+    )
+    with op.batch_alter_table("ab_test_assignments") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_ab_test_assignments_user_identifier_test_id",
+            ["user_identifier", "test_id"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("ab_test_assignments") as batch_op:
+        batch_op.drop_constraint("uq_ab_test_assignments_user_identifier_test_id", type_="unique")
+
+    op.drop_index("ix_conversations_updated_at_id", table_name="conversations")
+    op.drop_index("ix_configurations_is_active", table_name="configurations")
+    op.drop_index("ix_feedback_feedback_type_created_at", table_name="feedback")
+    op.drop_index("ix_feedback_message_id", table_name="feedback")
+    op.drop_index("ix_messages_conversation_id_created_at", table_name="messages")
@@ -1,23 +1,31 @@
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, Text, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy import String, Text, DateTime, ForeignKey, Integer, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
 class Base(DeclarativeBase):
     id: Mapped[int] = mapped_column(primary_key=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.now(),
-        onupdate=datetime.now()
+        default=datetime.now,
+        onupdate=datetime.now
     )
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    # Serves the keyset-paginated listing
+    __table_args__ = (
+        Index("ix_conversations_updated_at_id", "updated_at", "id"),
+    )
 
     title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Maintained in the transaction that inserts the messages, so listings
+    # never aggregate over the messages table
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     messages: Mapped[list["Message"]] = relationship(
         back_populates="conversation",
         cascade="all, delete-orphan"
@@ -26,6 +34,9 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+    )
 
     conversation_id: Mapped[int] = mapped_column(
         ForeignKey("conversations.id", ondelete="CASCADE")
@@ -46,11 +57,25 @@ class KnowledgeSource(Base):
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     collection_name: Mapped[str] = mapped_column(String(255), unique=True)
     document_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Bumped on every write to the source; cached search results carry the
+    # versions they were computed at
+    version: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(default=True)
+    # 'per_source' keeps a Chroma collection per source, 'shared' stores the
+    # documents in one collection tagged with knowledge_source_id
+    storage_layout: Mapped[str] = mapped_column(String(20), default="per_source")
+    # ChunkingSettings as a dict; documents are stored whole when unset
+    chunking: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # EmbeddingSettings as a dict; the default ONNX model is used when unset
+    embedding: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
 
 class Feedback(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        Index("ix_feedback_message_id", "message_id"),
+        Index("ix_feedback_feedback_type_created_at", "feedback_type", "created_at"),
+    )
 
     message_id: Mapped[int] = mapped_column(
         ForeignKey("messages.id", ondelete="CASCADE")
@@ -62,6 +87,9 @@ class Feedback(Base):
 
 class Configuration(Base):
     __tablename__ = "configurations"
+    __table_args__ = (
+        Index("ix_configurations_is_active", "is_active"),
+    )
 
     name: Mapped[str] = mapped_column(String(100), unique=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -100,6 +128,10 @@ class ABTest(Base):
 
 class ABTestAssignment(Base):
     __tablename__ = "ab_test_assignments"
+    # One variant per user and test; also serves the assignment lookups
+    __table_args__ = (
+        UniqueConstraint("user_identifier", "test_id", name="uq_ab_test_assignments_user_identifier_test_id"),
+    )
 
     user_identifier: Mapped[str] = mapped_column(String(255))  # Could be session_id or user_id
     test_id: Mapped[int] = mapped_column(ForeignKey("ab_tests.id"))
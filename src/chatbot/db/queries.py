@@ -0,0 +1,101 @@
+import base64
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.orm import Session
+from chatbot.db.models import Conversation, Message
+
+MAX_CONVERSATION_PAGE_SIZE = 200
+
+
+class ConversationRow(NamedTuple):
+    id: int
+    title: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+    last_message_at: Optional[datetime]
+
+
+def encode_cursor(updated_at: datetime, conversation_id: int) -> str:
+    raw = f"{updated_at.isoformat()}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, conversation_id = raw.split("|")
+        return datetime.fromisoformat(updated_at), int(conversation_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def list_conversations_page(
+        session: Session,
+        limit: int = 50,
+        cursor: Optional[str] = None
+) -> Tuple[List[ConversationRow], Optional[str]]:
+    # Pages are keyed on (updated_at, id) rather than an offset, so each page
+    # costs the same however deep it is; counts come from the counters
+    limit = max(1, min(limit, MAX_CONVERSATION_PAGE_SIZE))
+
+    query = select(
+        Conversation.id,
+        Conversation.title,
+        Conversation.created_at,
+        Conversation.updated_at,
+        Conversation.message_count,
+        Conversation.last_message_at
+    )
+
+    if cursor:
+        updated_at, conversation_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Conversation.updated_at < updated_at,
+            and_(Conversation.updated_at == updated_at, Conversation.id < conversation_id)
+        ))
+
+    # One extra row tells whether another page follows
+    rows = session.execute(
+        query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1)
+    ).all()
+
+    page = [ConversationRow(*row) for row in rows[:limit]]
+    next_cursor = encode_cursor(page[-1].updated_at, page[-1].id) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def backfill_conversation_counters(session: Session, batch_size: int = 1000) -> int:
+    # Commits per id range so a large table is never held by one long
+    # transaction; returns the number of conversations updated
+    message_count = (
+        select(func.count(Message.id))
+        .where(Message.conversation_id == Conversation.id)
+        .scalar_subquery()
+    )
+    last_message_at = (
+        select(func.max(Message.created_at))
+        .where(Message.conversation_id == Conversation.id)
+        .scalar_subquery()
+    )
+
+    max_id = session.execute(select(func.max(Conversation.id))).scalar() or 0
+    updated = 0
+
+    for start in range(0, max_id, batch_size):
+        result = session.execute(
+            update(Conversation)
+            .where(Conversation.id > start, Conversation.id <= start + batch_size)
+            # updated_at is left alone so the listing order does not change
+            .values(
+                message_count=message_count,
+                last_message_at=last_message_at,
+                updated_at=Conversation.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        updated += result.rowcount
+
+    return updated
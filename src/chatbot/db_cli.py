@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, insert, text, Engine
+from chatbot.db.database import db
+from chatbot.db.migrate import upgrade_database, current_revision
+from chatbot.db.models import Conversation, Message, Feedback, Configuration, ABTest, ABTestAssignment
+from chatbot.db.queries import backfill_conversation_counters
+
+# Last revision before the hot-path indexes
+UNINDEXED_REVISION = "0002"
+
+# The lookups the application runs per request or per dashboard refresh
+HOT_QUERIES: Dict[str, str] = {
+    "conversation history": (
+        "SELECT role, content FROM messages "
+        "WHERE conversation_id = :conversation_id ORDER BY created_at"
+    ),
+    "message feedback": "SELECT id, feedback_type FROM feedback WHERE message_id = :message_id",
+    "feedback summary": (
+        "SELECT count(id) FROM feedback "
+        "WHERE feedback_type = :feedback_type AND created_at >= :cutoff"
+    ),
+    "assignment lookup": (
+        "SELECT variant FROM ab_test_assignments "
+        "WHERE user_identifier = :user_identifier AND test_id = :test_id"
+    ),
+    "active configuration": "SELECT id, version FROM configurations WHERE is_active = :is_active",
+    "conversation page": (
+        "SELECT id, title, message_count FROM conversations "
+        "ORDER BY updated_at DESC, id DESC LIMIT 50"
+    ),
+}
+
+
+def migrate() -> None:
+    db.migrate()
+    print(f"Database at revision {current_revision(db.engine)}")
+
+
+def backfill_counters(batch_size: int = 1000) -> None:
+    db.migrate()
+
+    session_gen = db.get_session()
+    session = next(session_gen)
+
+    try:
+        updated = backfill_conversation_counters(session, batch_size)
+    finally:
+        session.close()
+
+    print(f"Backfilled counters for {updated} conversations")
+
+
+def seed_benchmark_data(engine: Engine, conversations: int) -> Dict[str, Any]:
+    rng = random.Random(0)
+    start = datetime.now() - timedelta(days=90)
+
+    def at(offset_minutes: float) -> Dict[str, datetime]:
+        moment = start + timedelta(minutes=offset_minutes)
+        return {"created_at": moment, "updated_at": moment}
+
+    with engine.begin() as connection:
+        connection.execute(insert(Configuration), [
+            {"name": f"config-{i}", "config_json": {}, "version": 1, "is_active": i == 0, **at(i)}
+            for i in range(200)
+        ])
+        connection.execute(insert(ABTest), [{
+            "name": "benchmark", "control_config_id": 1, "treatment_config_id": 2,
+            "traffic_percentage": 50, "is_active": True, **at(0)
+        }])
+
+        messages_per_conversation = 6
+        for batch_start in range(0, conversations, 5000):
+            batch = range(batch_start, min(batch_start + 5000, conversations))
+            connection.execute(insert(Conversation), [
+                {"id": i + 1, "title": f"Conversation {i}", "message_count": messages_per_conversation,
+                 **at(i * 10)}
+                for i in batch
+            ])
+            connection.execute(insert(Message), [
+                {"id": i * messages_per_conversation + j + 1, "conversation_id": i + 1,
+                 "role": "user" if j % 2 else "assistant", "content": f"message {j}", **at(i * 10 + j)}
+                for i in batch for j in range(messages_per_conversation)
+            ])
+            connection.execute(insert(Feedback), [
+                {"message_id": i * messages_per_conversation + j + 1,
+                 "feedback_type": rng.choice(["thumbs_up", "thumbs_down"]), **at(i * 10 + j)}
+                for i in batch for j in range(0, messages_per_conversation, 2)
+                if rng.random() < 0.5
+            ])
+            connection.execute(insert(ABTestAssignment), [
+                {"user_identifier": f"user-{i}", "test_id": 1, "variant": rng.choice(["control", "treatment"]),
+                 **at(i * 10)}
+                for i in batch
+            ])
+
+    middle = conversations // 2
+    return {
+        "conversation_id": middle + 1,
+        "message_id": middle * 6 + 1,
+        "feedback_type": "thumbs_down",
+        "cutoff": datetime.now() - timedelta(days=7),
+        "user_identifier": f"user-{middle}",
+        "test_id": 1,
+        "is_active": True,
+    }
+
+
+def explain(engine: Engine, sql: str, params: Dict[str, Any]) -> List[str]:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as connection:
+        rows = connection.execute(text(prefix + sql), params).all()
+    # SQLite returns (id, parent, notused, detail); Postgres one text column
+    return [str(row[-1]) for row in rows]
+
+
+def time_query(engine: Engine, sql: str, params: Dict[str, Any], runs: int = 20) -> float:
+    timings = []
+    with engine.connect() as connection:
+        for _ in range(runs):
+            started = time.perf_counter()
+            connection.execute(text(sql), params).all()
+            timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def measure(engine: Engine, params: Dict[str, Any]) -> Dict[str, Tuple[List[str], float]]:
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return {
+        name: (explain(engine, sql, params), time_query(engine, sql, params))
+        for name, sql in HOT_QUERIES.items()
+    }
+
+
+def benchmark_indexes(conversations: int = 50000, database_url: Optional[str] = None) -> None:
+    # Seeds a scratch database; pass a URL only for a database you can throw away
+    scratch_path: Optional[str] = None
+    if database_url is None:
+        scratch_path = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        database_url = f"sqlite:///{scratch_path}"
+
+    engine = create_engine(database_url)
+
+    try:
+        upgrade_database(engine, UNINDEXED_REVISION)
+        print(f"Seeding {conversations} conversations...")
+        params = seed_benchmark_data(engine, conversations)
+
+        before = measure(engine, params)
+        upgrade_database(engine, "head")
+        after = measure(engine, params)
+
+        for name in HOT_QUERIES:
+            (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+            print(f"\n{name}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+            print("  before:")
+            for line in plan_before:
+                print(f"    {line}")
+            print("  after:")
+            for line in plan_after:
+                print(f"    {line}")
+    finally:
+        engine.dispose()
+        if scratch_path:
+            os.remove(scratch_path)
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python -m chatbot.db_cli migrate")
+        print("  python -m chatbot.db_cli backfill-counters [batch_size]")
+        print("  python -m chatbot.db_cli benchmark-indexes [conversations] [scratch_database_url]")
+        return
+
+    command = sys.argv[1]
+
+    if command == "migrate":
+        migrate()
+
+    elif command == "backfill-counters":
+        batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        backfill_counters(batch_size)
+
+    elif command == "benchmark-indexes":
+        conversations = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+        database_url = sys.argv[3] if len(sys.argv) > 3 else None
+        benchmark_indexes(conversations, database_url)
+
+    else:
+        print("Invalid command. Run without arguments to see usage.")
+
+
+if __name__ == "__main__":
+    main()
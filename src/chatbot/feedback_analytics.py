@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from chatbot.db.database import db
 from chatbot.db.models import Feedback, Message
 
@@ -139,5 +140,25 @@ class FeedbackAnalytics:
             if should_close:
                 session.close()
 
+    # Async variants for the API: the queries above run on the AsyncSession's
+    # connection, so they do not block the event loop
+
+    async def aget_feedback_summary(self, session: AsyncSession, days: int = 7) -> Dict[str, any]:
+        return await session.run_sync(lambda s: self.get_feedback_summary(s, days))
+
+    async def aget_conversation_feedback(
+            self,
+            session: AsyncSession,
+            conversation_id: int
+    ) -> List[Dict[str, any]]:
+        return await session.run_sync(lambda s: self.get_conversation_feedback(conversation_id, s))
+
+    async def aget_worst_performing_messages(
+            self,
+            session: AsyncSession,
+            limit: int = 10
+    ) -> List[Dict[str, any]]:
+        return await session.run_sync(lambda s: self.get_worst_performing_messages(limit, s))
+
 
 feedback_analytics = FeedbackAnalytics()
@@ -2,8 +2,8 @@ from chatbot.db.database import db
 
 
 def init_database() -> None:
-    print("Creating database tables...")
-    db.create_tables()
+    print("Migrating database schema...")
+    db.migrate()
     print("Database initialized successfully!")
 
 
@@ -0,0 +1,112 @@
+import re
+from typing import List, NamedTuple, Optional, Tuple
+from chatbot.config_schemas import ChunkingSettings
+
+# Tokens are whitespace-delimited words, which keeps character offsets exact;
+# a model tokenizer produces more, so chunk sizes are counted in words
+TOKEN_PATTERN = re.compile(r"\S+")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+class Chunker:
+    def __init__(self, settings: ChunkingSettings) -> None:
+        self.settings = settings
+
+    def split(self, text: str) -> List[Chunk]:
+        if self.settings.strategy == "sentences":
+            return self._split_sentences(text)
+        return self._split_tokens(text)
+
+    def _split_tokens(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Chunk]:
+        end = len(text) if end is None else end
+        spans = [match.span() for match in TOKEN_PATTERN.finditer(text, start, end)]
+        if not spans:
+            return []
+
+        step = self.settings.chunk_size - self.settings.chunk_overlap
+        chunks: List[Chunk] = []
+
+        for first in range(0, len(spans), step):
+            window = spans[first:first + self.settings.chunk_size]
+            start, end = window[0][0], window[-1][1]
+            chunks.append(Chunk(text[start:end], start, end))
+
+            if first + self.settings.chunk_size >= len(spans):
+                break
+
+        return chunks
+
+    def _sentences(self, text: str) -> List[Tuple[int, int, int]]:
+        # (start, end, token count) of every sentence
+        sentences = []
+        position = 0
+        for boundary in list(SENTENCE_END_PATTERN.finditer(text)) + [None]:
+            end = boundary.start() if boundary else len(text)
+            sentence = text[position:end]
+            stripped_start = position + len(sentence) - len(sentence.lstrip())
+            tokens = len(TOKEN_PATTERN.findall(sentence))
+            if tokens:
+                sentences.append((stripped_start, end, tokens))
+            position = boundary.end() if boundary else len(text)
+        return sentences
+
+    def _split_sentences(self, text: str) -> List[Chunk]:
+        sentences = self._sentences(text)
+        chunks: List[Chunk] = []
+
+        current: List[Tuple[int, int, int]] = []
+        current_tokens = 0
+
+        for sentence in sentences:
+            # A sentence longer than a chunk is split by tokens on its own
+            if sentence[2] > self.settings.chunk_size:
+                if current:
+                    start, end = current[0][0], current[-1][1]
+                    chunks.append(Chunk(text[start:end], start, end))
+                chunks.extend(self._split_tokens(text, sentence[0], sentence[1]))
+                current, current_tokens = [], 0
+                continue
+
+            if current and current_tokens + sentence[2] > self.settings.chunk_size:
+                start, end = current[0][0], current[-1][1]
+                chunks.append(Chunk(text[start:end], start, end))
+
+                # Carry trailing sentences that fit in the overlap budget
+                carried: List[Tuple[int, int, int]] = []
+                carried_tokens = 0
+                for previous in reversed(current):
+                    if carried_tokens + previous[2] > self.settings.chunk_overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous[2]
+
+                # The overlap gives way when it would push the next chunk over size
+                while carried and carried_tokens + sentence[2] > self.settings.chunk_size:
+                    carried_tokens -= carried.pop(0)[2]
+                current, current_tokens = carried, carried_tokens
+
+            current.append(sentence)
+            current_tokens += sentence[2]
+
+        if current:
+            start, end = current[0][0], current[-1][1]
+            chunks.append(Chunk(text[start:end], start, end))
+
+        return chunks
+
+
+def reassemble(chunks: List[Chunk]) -> str:
+    # Chunks are laid back at their offsets, so overlaps collapse and the
+    # whitespace between non-overlapping chunks is filled with spaces
+    text = ""
+    for chunk in sorted(chunks, key=lambda c: c.start):
+        if chunk.start > len(text):
+            text += " " * (chunk.start - len(text))
+        text = text[:chunk.start] + chunk.text + text[chunk.end:]
+    return text
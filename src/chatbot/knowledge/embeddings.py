@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import fcntl
+import hashlib
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+from chatbot.config_schemas import EmbeddingSettings
+
+DEFAULT_SENTENCE_TRANSFORMER_MODEL = "all-MiniLM-L6-v2"
+# Chroma's MiniLM tokenizer truncates inputs at this many wordpieces
+ONNX_MAX_TOKENS = 256
+# English text averages about 1.3 wordpieces per whitespace word
+WORDPIECES_PER_WORD = 1.3
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+class _OnnxMiniLM(ONNXMiniLM_L6_V2):
+    # Chroma's bundled MiniLM model with a configurable inference thread count
+
+    def __init__(self, num_threads: Optional[int] = None) -> None:
+        super().__init__()
+        self.num_threads = num_threads
+
+    @property
+    def model(self) -> Any:
+        if "_session" not in self.__dict__:
+            options = self.ort.SessionOptions()
+            options.log_severity_level = 3
+            options.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+
+            self.__dict__["_session"] = self.ort.InferenceSession(
+                os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+                providers=["CPUExecutionProvider"],
+                sess_options=options
+            )
+        return self.__dict__["_session"]
+
+
+class OnnxEmbeddingBackend:
+    def __init__(self, settings: EmbeddingSettings) -> None:
+        self.settings = settings
+        self._model = _OnnxMiniLM(settings.num_threads)
+
+    @property
+    def name(self) -> str:
+        return f"onnx-{ONNXMiniLM_L6_V2.MODEL_NAME}"
+
+    @property
+    def max_tokens(self) -> int:
+        return ONNX_MAX_TOKENS
+
+    def embed(self, texts: List[str]) -> List[Any]:
+        return self._model(texts)
+
+
+class SentenceTransformerEmbeddingBackend:
+    def __init__(self, settings: EmbeddingSettings) -> None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "The sentence_transformers embedding backend requires "
+                "`pip install sentence-transformers`"
+            )
+
+        if settings.num_threads:
+            import torch
+            torch.set_num_threads(settings.num_threads)
+
+        self.settings = settings
+        self.model_name = settings.model or DEFAULT_SENTENCE_TRANSFORMER_MODEL
+        self._model = SentenceTransformer(self.model_name)
+
+    @property
+    def name(self) -> str:
+        return f"sentence_transformers-{self.model_name}"
+
+    @property
+    def max_tokens(self) -> int:
+        return self._model.max_seq_length
+
+    def embed(self, texts: List[str]) -> List[Any]:
+        return list(self._model.encode(
+            texts,
+            batch_size=self.settings.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ))
+
+
+class EmbeddingCache:
+    # Vectors keyed by content hash, appended to a memory-mapped float32 file
+    # with a parallel keys file. Processes sharing the directory append under
+    # a file lock and pick up each other's rows as the keys file grows
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock_path = os.path.join(directory, ".lock")
+
+        self._index: Dict[str, int] = {}
+        self._rows = 0
+        self._keys_offset = 0
+        self._dimension: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def _refresh(self) -> None:
+        # Reads keys appended since the last refresh, by this or any process
+        if self._dimension is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path) as f:
+                self._dimension = json.load(f)["dimension"]
+
+        if not os.path.exists(self._keys_path) or os.path.getsize(self._keys_path) == self._keys_offset:
+            return
+
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            appended = f.read()
+
+        # A key is only complete once its newline is written
+        complete = appended[:appended.rfind(b"\n") + 1]
+        self._keys_offset += len(complete)
+
+        # Keys are appended after their vectors, so every complete key has a row
+        for key in complete.decode().split():
+            self._index.setdefault(key, self._rows)
+            self._rows += 1
+        self._map(self._rows)
+
+    def _map(self, rows: int) -> None:
+        self._vectors = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dimension))
+            if rows else None
+        )
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self._refresh()
+            found: Dict[str, np.ndarray] = {}
+            for key in keys:
+                row = self._index.get(key)
+                if row is not None:
+                    found[key] = np.array(self._vectors[row])
+            return found
+
+    def put_many(self, vectors: Dict[str, Any]) -> None:
+        if not vectors:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._append(vectors)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append(self, vectors: Dict[str, Any]) -> None:
+        # Runs under the file lock, so the files are not growing underneath
+        self._refresh()
+        new = {key: vector for key, vector in vectors.items() if key not in self._index}
+        if not new:
+            return
+
+        matrix = np.asarray(list(new.values()), dtype=np.float32)
+        if self._dimension is None:
+            self._dimension = matrix.shape[1]
+            with open(self._meta_path, "w") as f:
+                json.dump({"dimension": self._dimension}, f)
+        elif matrix.shape[1] != self._dimension:
+            raise ValueError(
+                f"Embedding dimension {matrix.shape[1]} does not match "
+                f"cache dimension {self._dimension} in {self.directory}"
+            )
+
+        # Rows are numbered by the keys file; vectors left without a key by a
+        # crashed writer are cut off so the next row lines up with its key
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(self._rows * self._dimension * 4)
+            f.write(matrix.tobytes())
+        with open(self._keys_path, "a") as f:
+            f.write("".join(f"{key}\n" for key in new))
+
+        self._refresh()
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(directory: str) -> EmbeddingCache:
+    # One instance per directory, so embedders sharing a model share its index
+    directory = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = EmbeddingCache(directory)
+        return cache
+
+
+class Embedder:
+    # Embeds texts in backend-sized batches, computing only cache misses
+
+    def __init__(self, backend: Any, cache: Optional[EmbeddingCache]) -> None:
+        self.backend = backend
+        self.cache = cache
+
+    @property
+    def max_chunk_words(self) -> int:
+        # Longest chunk, in words, the model embeds without truncating it
+        return int(self.backend.max_tokens / WORDPIECES_PER_WORD)
+
+    def __call__(self, texts: List[str], persist: bool = True) -> List[Any]:
+        # Queries pass persist=False: they are read from the cache when the
+        # same text was stored as a document, but one-off queries are not written
+        keys = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(keys) if self.cache is not None else {}
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            batch_size = self.backend.settings.batch_size
+            missing_keys = list(missing)
+            computed: Dict[str, Any] = {}
+            for start in range(0, len(missing_keys), batch_size):
+                batch_keys = missing_keys[start:start + batch_size]
+                computed.update(zip(
+                    batch_keys,
+                    self.backend.embed([missing[key] for key in batch_keys])
+                ))
+
+            if persist and self.cache is not None:
+                self.cache.put_many(computed)
+            vectors.update(computed)
+
+        return [vectors[key] for key in keys]
+
+
+def create_embedder(settings: Optional[EmbeddingSettings], cache_directory: Optional[str]) -> Embedder:
+    settings = settings or EmbeddingSettings()
+
+    if settings.backend == "sentence_transformers":
+        backend = SentenceTransformerEmbeddingBackend(settings)
+    else:
+        backend = OnnxEmbeddingBackend(settings)
+
+    # Vectors depend only on the model, so sources sharing one share a cache
+    cache = None
+    if cache_directory:
+        cache = get_embedding_cache(os.path.join(cache_directory, re.sub(r"[^\w.-]", "_", backend.name)))
+
+    return Embedder(backend, cache)
@@ -0,0 +1,71 @@
+import os
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, TypeVar, NamedTuple
+
+T = TypeVar("T")
+
+Document = Tuple[str, Optional[Dict]]
+
+
+class IngestProgress(NamedTuple):
+    documents: int
+    elapsed_seconds: float
+    skipped: int = 0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_jsonl(path: str) -> Iterator[Document]:
+    # Each line is either a JSON string or an object with a "text" field and
+    # an optional "metadata" object
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            record = json.loads(line)
+            if isinstance(record, str):
+                yield record, None
+            elif isinstance(record, dict) and isinstance(record.get("text"), str):
+                yield record["text"], record.get("metadata")
+            else:
+                raise ValueError(f"{path}:{line_number}: expected a string or an object with a 'text' field")
+
+
+def iter_text_lines(path: str) -> Iterator[Document]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line, None
+
+
+def iter_text_files(directory: str) -> Iterator[Document]:
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, encoding="utf-8") as f:
+                text = f.read().strip()
+            if text:
+                yield text, {"path": os.path.relpath(path, directory)}
+
+
+def iter_documents(path: str) -> Iterator[Document]:
+    if os.path.isdir(path):
+        return iter_text_files(path)
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    return iter_text_lines(path)
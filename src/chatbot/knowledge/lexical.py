@@ -0,0 +1,142 @@
+import re
+import math
+import threading
+import numpy as np
+from array import array
+from typing import Dict, List, Tuple
+
+# Codes such as "ERR-4012" or "v2.3.1" stay whole and are also indexed by
+# their parts, so both the full identifier and a fragment of it match
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    # Incremental BM25 index. Postings are compact arrays scored with numpy,
+    # so a query touches only its own terms' lists; removed documents are
+    # tombstoned and compacted away once they outnumber the live ones
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[str] = []
+        self._doc_lengths = array("I")
+        self._positions: Dict[str, int] = {}
+        # One flag per position, so tombstones are filtered with numpy
+        self._deleted = array("B")
+        self._deleted_count = 0
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, doc_id: str, text: str) -> None:
+        tokens = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        with self._lock:
+            self._remove(doc_id)
+
+            position = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._doc_lengths.append(len(tokens))
+            self._deleted.append(0)
+            self._positions[doc_id] = position
+            self._total_length += len(tokens)
+
+            for token, frequency in frequencies.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = (array("I"), array("H"))
+                postings[0].append(position)
+                postings[1].append(min(frequency, 65535))
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove(doc_id)
+            if self._deleted_count > max(1024, len(self._positions)):
+                self._compact()
+
+    def _remove(self, doc_id: str) -> None:
+        position = self._positions.pop(doc_id, None)
+        if position is not None:
+            self._deleted[position] = 1
+            self._deleted_count += 1
+            self._total_length -= self._doc_lengths[position]
+
+    def _compact(self) -> None:
+        remap = np.full(len(self._doc_ids), -1, dtype=np.int64)
+        kept = np.flatnonzero(np.frombuffer(self._deleted, dtype=np.uint8) == 0)
+        remap[kept] = np.arange(len(kept))
+
+        self._doc_ids = [self._doc_ids[p] for p in kept]
+        self._doc_lengths = array("I", np.frombuffer(self._doc_lengths, dtype=np.uint32)[kept].tobytes())
+        self._positions = {doc_id: p for p, doc_id in enumerate(self._doc_ids)}
+
+        postings: Dict[str, Tuple[array, array]] = {}
+        for token, (positions, frequencies) in self._postings.items():
+            new_positions = remap[np.frombuffer(positions, dtype=np.uint32)]
+            alive = new_positions >= 0
+            if alive.any():
+                postings[token] = (
+                    array("I", new_positions[alive].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(frequencies, dtype=np.uint16)[alive].tobytes())
+                )
+        self._postings = postings
+        self._deleted = array("B", bytes(len(kept)))
+        self._deleted_count = 0
+
+    def search(self, query: str, n_results: int) -> List[Tuple[str, float]]:
+        terms = set(tokenize(query))
+
+        with self._lock:
+            live = len(self._positions)
+            if not live or not terms:
+                return []
+
+            average_length = self._total_length / live
+            doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32)
+            scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+
+                positions = np.frombuffer(postings[0], dtype=np.uint32).astype(np.int64)
+                frequencies = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+
+                idf = math.log(1 + (live - len(positions) + 0.5) / (len(positions) + 0.5))
+                lengths = doc_lengths[positions].astype(np.float32)
+                norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+                scores[positions] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+
+            # Only matched positions are checked, so the cost of a query does
+            # not grow with the tombstones waiting for compaction
+            matched = np.flatnonzero(scores)
+            if self._deleted_count:
+                matched = matched[np.frombuffer(self._deleted, dtype=np.uint8)[matched] == 0]
+
+            # Release the buffer view before appends can resize the array
+            del doc_lengths
+            doc_ids = self._doc_ids
+
+        if len(matched) > n_results:
+            matched = matched[np.argpartition(scores[matched], -n_results)[-n_results:]]
+        matched = matched[np.argsort(-scores[matched])]
+
+        return [(doc_ids[p], float(scores[p])) for p in matched]
@@ -1,11 +1,31 @@
 import os
+import time
+import json
+import heapq
+import threading
 import chromadb
-from typing import List, Dict, Optional, Tuple
+import numpy as np
+from collections import OrderedDict
+from queue import Queue, Full
+from itertools import islice
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Set, Tuple, Any, Iterable, Iterator, Callable
 from datetime import datetime
 from chromadb.config import Settings
 from sqlalchemy.orm import Session
 from chatbot.db.database import db
 from chatbot.db.models import KnowledgeSource
+from chatbot.config_schemas import ChunkingSettings, EmbeddingSettings
+from chatbot.knowledge.ingest import Document, IngestProgress, batched
+from chatbot.knowledge.chunking import Chunk, Chunker, reassemble
+from chatbot.knowledge.lexical import BM25Index
+from chatbot.knowledge.embeddings import Embedder, content_hash, create_embedder
+from chatbot.knowledge.search_cache import SearchCache
+from chatbot.knowledge.registry import SourceRegistry
+
+PER_SOURCE_LAYOUT = "per_source"
+SHARED_LAYOUT = "shared"
 
 
 class KnowledgeManager:
@@ -17,25 +37,163 @@ class KnowledgeManager:
             settings=Settings(anonymized_telemetry=False)
         )
 
+        # Collections are queried concurrently; a source that misses the
+        # timeout is left out of the results instead of stalling the turn.
+        # A query cannot be interrupted, so it keeps its worker until it
+        # returns; until then the source is skipped by later searches, so a
+        # hung collection holds at most one of the workers
+        self.search_timeout: float = float(os.getenv("KNOWLEDGE_SEARCH_TIMEOUT", "2"))
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("KNOWLEDGE_SEARCH_WORKERS", "8")),
+            thread_name_prefix="knowledge-search"
+        )
+        self._stalled_searches: Set[str] = set()
+        self._stalled_lock = threading.Lock()
+
+        self.storage_layout: str = os.getenv("KNOWLEDGE_STORAGE_LAYOUT", PER_SOURCE_LAYOUT)
+        if self.storage_layout not in (PER_SOURCE_LAYOUT, SHARED_LAYOUT):
+            raise ValueError(f"Unknown knowledge storage layout '{self.storage_layout}'")
+        self.shared_collection_name: str = os.getenv("KNOWLEDGE_SHARED_COLLECTION", "knowledge_shared")
+
+        # Vectors are computed here rather than by Chroma so each source can
+        # pick its embedding backend; computed vectors are cached on disk by
+        # content hash, and a query is embedded once per backend per search
+        self.embedding_cache_dir: Optional[str] = os.getenv(
+            "EMBEDDING_CACHE_DIR",
+            os.path.join(persist_directory or ".", "embedding_cache")
+        ) or None
+        self.embedding_function = create_embedder(None, self.embedding_cache_dir)
+        self._embedders: Dict[str, Embedder] = {}
+        self._embedders_lock = threading.Lock()
+        self.query_embedding_cache_size: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+        self._query_embeddings: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+
+        self.ingest_batch_size: int = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+        self.ingest_queue_depth: int = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+
+        # BM25 indexes for hybrid search are built in the background from the
+        # stored documents the first time a source is searched, and tagged with
+        # the source version they reflect. This process's writes update them in
+        # place; a version bumped by another process triggers a rebuild, during
+        # which the stale index keeps serving. A source is vector-only until
+        # its first index is ready
+        self.lexical_build_batch_size: int = int(os.getenv("LEXICAL_INDEX_BUILD_BATCH", "1000"))
+        self._lexical_indexes: Dict[int, BM25Index] = {}
+        self._lexical_versions: Dict[int, int] = {}
+        self._lexical_builds: Set[int] = set()
+        self._lexical_lock = threading.Lock()
+
+        self.search_cache = SearchCache()
+
+        # Active sources and their collection handles, so search runs no SQL
+        self.registry = SourceRegistry(self._load_collection)
+
+    @staticmethod
+    def _embedding_key(knowledge_source: Optional[KnowledgeSource]) -> str:
+        if knowledge_source is None or not knowledge_source.embedding:
+            return ""
+        return json.dumps(knowledge_source.embedding, sort_keys=True)
+
+    def _embedder_for(self, knowledge_source: Optional[KnowledgeSource]) -> Any:
+        key = self._embedding_key(knowledge_source)
+        if not key:
+            return self.embedding_function
+
+        with self._embedders_lock:
+            embedder = self._embedders.get(key)
+            if embedder is None:
+                embedder = self._embedders[key] = create_embedder(
+                    EmbeddingSettings(**knowledge_source.embedding),
+                    self.embedding_cache_dir
+                )
+            return embedder
+
+    def embed_query(self, query: str, knowledge_source: Optional[KnowledgeSource] = None) -> Any:
+        cache_key = (self._embedding_key(knowledge_source), query)
+
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(cache_key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(cache_key)
+                return embedding
+
+        embedding = self._embedder_for(knowledge_source)([query], persist=False)[0]
+
+        with self._query_embeddings_lock:
+            self._query_embeddings[cache_key] = embedding
+            if len(self._query_embeddings) > self.query_embedding_cache_size:
+                self._query_embeddings.popitem(last=False)
+
+        return embedding
+
+    def _load_collection(self, name: str):
+        if name == self.shared_collection_name:
+            return self.client.get_or_create_collection(
+                name=self.shared_collection_name,
+                metadata={"name": "shared", "description": "Documents of all shared-layout knowledge sources"}
+            )
+        return self.client.get_collection(name)
+
+    def _shared_collection(self):
+        return self.registry.collection(self.shared_collection_name)
+
+    def _collection_for(self, knowledge_source: KnowledgeSource):
+        if knowledge_source.storage_layout == SHARED_LAYOUT:
+            return self._shared_collection()
+        return self.registry.collection(knowledge_source.collection_name)
+
     def create_knowledge_source(
             self,
             name: str,
-            description: Optional[str] = None
+            description: Optional[str] = None,
+            chunking: Optional[ChunkingSettings] = None,
+            embedding: Optional[EmbeddingSettings] = None
     ) -> Dict[str, any]:
+        # Vectors of different models cannot share one collection
+        if embedding and self.storage_layout == SHARED_LAYOUT:
+            raise ValueError("Custom embedding backends require the per_source storage layout")
+
+        # Load the backend up front so a missing dependency fails here
+        embedder = self.embedding_function
+        if embedding:
+            key = json.dumps(embedding.model_dump(), sort_keys=True)
+            with self._embedders_lock:
+                if key not in self._embedders:
+                    try:
+                        self._embedders[key] = create_embedder(embedding, self.embedding_cache_dir)
+                    except ImportError as e:
+                        raise ValueError(str(e))
+                embedder = self._embedders[key]
+
+        # The model would silently drop the tail of a longer chunk
+        if chunking and chunking.chunk_size > embedder.max_chunk_words:
+            raise ValueError(
+                f"chunk_size {chunking.chunk_size} exceeds the {embedder.max_chunk_words} words "
+                f"the embedding model can embed without truncation"
+            )
+
         session_gen = db.get_session()
         session: Session = next(session_gen)
 
         collection_name: str = f"ks_{name.lower().replace(' ', '_')}_{int(datetime.now().timestamp())}"
 
-        self.client.create_collection(
-            name=collection_name,
-            metadata={"name": name, "description": description or ""}
-        )
+        # In the shared layout the collection name only identifies the source
+        if self.storage_layout == SHARED_LAYOUT:
+            self._shared_collection()
+        else:
+            self.client.create_collection(
+                name=collection_name,
+                metadata={"name": name, "description": description or ""}
+            )
 
         knowledge_source = KnowledgeSource(
             name=name,
             description=description,
-            collection_name=collection_name
+            collection_name=collection_name,
+            storage_layout=self.storage_layout,
+            chunking=chunking.model_dump() if chunking else None,
+            embedding=embedding.model_dump() if embedding else None
         )
         session.add(knowledge_source)
         session.commit()
@@ -44,10 +202,13 @@ class KnowledgeManager:
             "id": knowledge_source.id,
             "name": knowledge_source.name,
             "description": knowledge_source.description,
-            "collection_name": knowledge_source.collection_name
+            "collection_name": knowledge_source.collection_name,
+            "chunking": knowledge_source.chunking,
+            "embedding": knowledge_source.embedding
         }
 
         session.close()
+        self.registry.refresh_source(result["id"])
 
         return result
 
@@ -57,6 +218,95 @@ class KnowledgeManager:
             documents: List[str],
             metadatas: Optional[List[Dict]] = None
     ) -> int:
+        if metadatas is None:
+            metadatas = [None] * len(documents)
+
+        return self.ingest(knowledge_source_id, zip(documents, metadatas))
+
+    @staticmethod
+    def _document_metadata(
+            knowledge_source_id: int,
+            source_name: str,
+            doc_id: str,
+            metadata: Optional[Dict]
+    ) -> Dict:
+        # Ensure non-empty metadata for each document
+        if metadata:
+            metadata = dict(metadata)
+        else:
+            metadata = {
+                "source": source_name,
+                "created_at": datetime.now().isoformat()
+            }
+
+        metadata["doc_id"] = doc_id
+        metadata["knowledge_source_id"] = knowledge_source_id
+        return metadata
+
+    @staticmethod
+    def _id_prefix(knowledge_source: KnowledgeSource) -> str:
+        # Shared-layout ids are prefixed so they are unique across sources
+        return f"ks{knowledge_source.id}_" if knowledge_source.storage_layout == SHARED_LAYOUT else ""
+
+    @staticmethod
+    def document_id(id_prefix: str, text: str) -> str:
+        # Ids follow the content, so re-ingesting a document is idempotent and
+        # concurrent ingests cannot hand out the same id to different texts
+        return f"{id_prefix}doc_{content_hash(text)}"
+
+    def _index_records(
+            self,
+            knowledge_source_id: int,
+            source_name: str,
+            documents: Iterable[Document],
+            id_prefix: str,
+            chunker: Optional[Chunker]
+    ) -> Iterator[Tuple[str, str, Dict, bool]]:
+        # Yields (id, text, metadata, starts_document) for every vector
+        for text, metadata in documents:
+            doc_id = self.document_id(id_prefix, text)
+            metadata = self._document_metadata(knowledge_source_id, source_name, doc_id, metadata)
+
+            if chunker is None:
+                yield doc_id, text, metadata, True
+                continue
+
+            chunks = chunker.split(text) or [Chunk(text, 0, len(text))]
+            for chunk_index, chunk in enumerate(chunks):
+                chunk_metadata = dict(metadata)
+                chunk_metadata.update({
+                    "parent_id": doc_id,
+                    "chunk_index": chunk_index,
+                    "chunk_count": len(chunks),
+                    "start_offset": chunk.start,
+                    "end_offset": chunk.end
+                })
+                yield f"{doc_id}_chunk_{chunk_index}", chunk.text, chunk_metadata, chunk_index == 0
+
+    @staticmethod
+    def _new_records(
+            collection: Any,
+            batch: List[Tuple[str, str, Dict, bool]]
+    ) -> Tuple[List[Tuple[str, str, Dict, bool]], int]:
+        # Drops records already stored (and repeats within the batch) so they
+        # are never re-embedded; returns the kept records and skipped documents
+        unique = {record[0]: record for record in reversed(batch)}
+        existing = set(collection.get(ids=list(unique), include=[])["ids"])
+
+        new_records = [record for record_id, record in unique.items() if record_id not in existing]
+        new_records.reverse()
+        skipped = sum(1 for record_id in existing if unique[record_id][3])
+        return new_records, skipped
+
+    def ingest(
+            self,
+            knowledge_source_id: int,
+            documents: Iterable[Document],
+            batch_size: Optional[int] = None,
+            progress: Optional[Callable[[IngestProgress], None]] = None
+    ) -> int:
+        batch_size = batch_size or self.ingest_batch_size
+
         session_gen = db.get_session()
         session: Session = next(session_gen)
 
@@ -68,87 +318,558 @@ class KnowledgeManager:
             session.close()
             raise ValueError(f"Knowledge source {knowledge_source_id} not found")
 
-        collection = self.client.get_collection(knowledge_source.collection_name)
-
-        ids: List[str] = [
-            f"doc_{knowledge_source.document_count + i}"
-            for i in range(len(documents))
-        ]
+        collection = self._collection_for(knowledge_source)
+        source_name = knowledge_source.name
 
-        # Ensure non-empty metadata for each document
-        if metadatas is None:
-            metadatas = []
-            for i, doc in enumerate(documents):
-                metadatas.append({
-                    "source": knowledge_source.name,
-                    "doc_id": ids[i],
-                    "created_at": datetime.now().isoformat()
-                })
-        else:
-            # Ensure all metadata dicts have at least one field
-            for i, metadata in enumerate(metadatas):
-                if not metadata:
-                    metadatas[i] = {
-                        "source": knowledge_source.name,
-                        "doc_id": ids[i],
-                        "created_at": datetime.now().isoformat()
-                    }
-
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+        id_prefix = self._id_prefix(knowledge_source)
+        embedder = self._embedder_for(knowledge_source)
+        chunker = Chunker(ChunkingSettings(**knowledge_source.chunking)) if knowledge_source.chunking else None
+        records = self._index_records(
+            knowledge_source_id,
+            source_name,
+            documents,
+            id_prefix,
+            chunker
         )
 
-        knowledge_source.document_count += len(documents)
-        session.commit()
-        session.close()
+        # Documents are read and embedded in a background thread while this
+        # thread writes; the bounded queue stalls the reader when writes lag
+        embedded: "Queue[Any]" = Queue(maxsize=self.ingest_queue_depth)
+        stopped = threading.Event()
+
+        def put(item: Any) -> bool:
+            # False once the writer has stopped, so nothing more is read
+            while not stopped.is_set():
+                try:
+                    embedded.put(item, timeout=0.5)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def embed_batches() -> None:
+            try:
+                for batch in batched(records, batch_size):
+                    if stopped.is_set():
+                        return
+                    batch, skipped = self._new_records(collection, batch)
+                    texts = [text for _, text, _, _ in batch]
+                    if not put((batch, embedder(texts) if texts else [], skipped)):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(None)
+
+        producer = threading.Thread(target=embed_batches, name="knowledge-ingest", daemon=True)
+        producer.start()
+
+        started = time.monotonic()
+        total = 0
+        total_skipped = 0
+
+        try:
+            while True:
+                item = embedded.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                batch, embeddings, skipped = item
+                total_skipped += skipped
+
+                if batch:
+                    new_documents = sum(1 for _, _, _, starts_document in batch if starts_document)
+
+                    collection.upsert(
+                        ids=[record_id for record_id, _, _, _ in batch],
+                        documents=[text for _, text, _, _ in batch],
+                        metadatas=[metadata for _, _, metadata, _ in batch],
+                        embeddings=embeddings
+                    )
+
+                    session.query(KnowledgeSource).filter_by(id=knowledge_source_id).update({
+                        KnowledgeSource.document_count: KnowledgeSource.document_count + new_documents,
+                        KnowledgeSource.version: KnowledgeSource.version + 1
+                    })
+                    session.commit()
+
+                    self.registry.refresh_source(knowledge_source_id)
+                    self._update_lexical_index(
+                        knowledge_source_id,
+                        added=[(record_id, text) for record_id, text, _, _ in batch]
+                    )
+
+                    total += new_documents
+
+                if progress:
+                    progress(IngestProgress(total, time.monotonic() - started, total_skipped))
+        finally:
+            stopped.set()
+            producer.join()
+            session.close()
+
+        return total
+
+    def get_document(self, knowledge_source_id: int, document_id: str) -> Optional[Dict[str, Any]]:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            knowledge_source = session.query(KnowledgeSource).filter_by(
+                id=knowledge_source_id
+            ).first()
+
+            if not knowledge_source:
+                raise ValueError(f"Knowledge source {knowledge_source_id} not found")
+
+            collection = self._collection_for(knowledge_source)
+            storage_layout = knowledge_source.storage_layout
+        finally:
+            session.close()
+
+        where: Dict[str, Any] = {"parent_id": document_id}
+        if storage_layout == SHARED_LAYOUT:
+            where = {"$and": [where, {"knowledge_source_id": knowledge_source_id}]}
+
+        results = collection.get(where=where, include=["documents", "metadatas"])
+
+        if results["ids"]:
+            parts = sorted(
+                zip(results["documents"], results["metadatas"]),
+                key=lambda part: part[1]["chunk_index"]
+            )
+            metadata = {
+                key: value for key, value in parts[0][1].items()
+                if key not in ("chunk_index", "start_offset", "end_offset")
+            }
+            return {
+                "document_id": document_id,
+                "document": reassemble([
+                    Chunk(text, chunk_metadata["start_offset"], chunk_metadata["end_offset"])
+                    for text, chunk_metadata in parts
+                ]),
+                "chunk_count": len(parts),
+                "metadata": metadata
+            }
+
+        # Documents ingested without chunking are stored whole
+        results = collection.get(ids=[document_id], include=["documents", "metadatas"])
+        if not results["ids"]:
+            return None
+        if (results["metadatas"][0] or {}).get("knowledge_source_id", knowledge_source_id) != knowledge_source_id:
+            return None
+
+        return {
+            "document_id": document_id,
+            "document": results["documents"][0],
+            "chunk_count": 1,
+            "metadata": results["metadatas"][0] or {}
+        }
+
+    def delete_document(self, knowledge_source_id: int, document_id: str) -> bool:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            knowledge_source = session.query(KnowledgeSource).filter_by(
+                id=knowledge_source_id
+            ).first()
+
+            if not knowledge_source:
+                raise ValueError(f"Knowledge source {knowledge_source_id} not found")
+
+            if not document_id.startswith(self._id_prefix(knowledge_source)):
+                return False
+
+            collection = self._collection_for(knowledge_source)
+
+            # A document is either stored whole or as chunks under its parent id
+            ids = collection.get(ids=[document_id], include=[])["ids"]
+            ids += collection.get(where={"parent_id": document_id}, include=[])["ids"]
+
+            if not ids:
+                return False
 
-        return len(documents)
+            collection.delete(ids=ids)
+
+            session.query(KnowledgeSource).filter_by(id=knowledge_source_id).update({
+                KnowledgeSource.document_count: KnowledgeSource.document_count - 1,
+                KnowledgeSource.version: KnowledgeSource.version + 1
+            })
+            session.commit()
+            self.registry.refresh_source(knowledge_source_id)
+            self._update_lexical_index(knowledge_source_id, removed=ids)
+            return True
+        finally:
+            session.close()
+
+    def replace_document(
+            self,
+            knowledge_source_id: int,
+            document_id: str,
+            document: str,
+            metadata: Optional[Dict] = None
+    ) -> Optional[str]:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            knowledge_source = session.query(KnowledgeSource).filter_by(
+                id=knowledge_source_id
+            ).first()
+
+            if not knowledge_source:
+                raise ValueError(f"Knowledge source {knowledge_source_id} not found")
+
+            new_document_id = self.document_id(self._id_prefix(knowledge_source), document)
+        finally:
+            session.close()
+
+        # The id follows the content, so a replacement is a delete plus an insert
+        if not self.delete_document(knowledge_source_id, document_id):
+            return None
+
+        self.ingest(knowledge_source_id, [(document, metadata)])
+        return new_document_id
 
     def search(
             self,
             query: str,
             knowledge_source_ids: Optional[List[int]] = None,
-            n_results: int = 3
+            n_results: int = 3,
+            hybrid: bool = False,
+            rrf_k: int = 60
     ) -> List[Tuple[str, float, Dict]]:
-        session_gen = db.get_session()
-        session: Session = next(session_gen)
+        knowledge_sources = self.registry.active_sources(knowledge_source_ids)
 
-        if knowledge_source_ids:
-            knowledge_sources = session.query(KnowledgeSource).filter(
-                KnowledgeSource.id.in_(knowledge_source_ids),
-                KnowledgeSource.is_active
-            ).all()
+        if not knowledge_sources:
+            return []
+
+        cache_key = self.search_cache.key_for(
+            query, [ks.id for ks in knowledge_sources], n_results, hybrid, rrf_k
+        )
+        versions = tuple(ks.version for ks in sorted(knowledge_sources, key=lambda ks: ks.id))
+        cached = self.search_cache.get(cache_key, versions)
+        if cached is not None:
+            return cached
+
+        query_embeddings: Dict[str, Any] = {}
+
+        def query_embedding_for(knowledge_source: KnowledgeSource) -> Any:
+            key = self._embedding_key(knowledge_source)
+            if key not in query_embeddings:
+                query_embeddings[key] = self.embed_query(query, knowledge_source)
+            return query_embeddings[key]
+
+        # Fusion works better with a deeper candidate list from each side
+        candidates = n_results * 2 if hybrid else n_results
+
+        searches = [
+            (ks.name, partial(
+                self._search_source,
+                ks.name,
+                ks.collection_name,
+                query_embedding_for(ks),
+                candidates
+            ))
+            for ks in knowledge_sources
+            if ks.storage_layout != SHARED_LAYOUT
+        ]
+
+        # All shared-layout sources are answered by one filtered query
+        shared_sources = [ks for ks in knowledge_sources if ks.storage_layout == SHARED_LAYOUT]
+        if shared_sources:
+            searches.append((self.shared_collection_name, partial(
+                self._search_shared,
+                [ks.id for ks in shared_sources],
+                query_embedding_for(shared_sources[0]),
+                candidates
+            )))
+
+        with self._stalled_lock:
+            stalled = [name for name, _ in searches if name in self._stalled_searches]
+        for name in stalled:
+            print(f"Skipping search in {name}: an earlier query has not returned")
+
+        futures = {
+            self._search_executor.submit(search): name
+            for name, search in searches
+            if name not in stalled
+        }
+        done, not_done = wait(futures, timeout=self.search_timeout)
+
+        for future in not_done:
+            # Only a query still waiting for a worker can be cancelled
+            if not future.cancel():
+                self._mark_stalled(futures[future], future)
+            print(f"Search in {futures[future]} timed out after {self.search_timeout}s")
+
+        per_source_results = [future.result() for future in done]
+        timed_out = bool(not_done or stalled)
+
+        # Partial results from a failed or slow source are returned but not cached
+        complete = not timed_out and all(results is not None for results in per_source_results)
+        per_source_results = [results for results in per_source_results if results is not None]
+
+        # Each collection returns hits ordered by distance, so a heap merge
+        # yields the global top results without sorting everything
+        vector_results = list(islice(
+            heapq.merge(*per_source_results, key=lambda x: x[1]),
+            candidates
+        ))
+
+        if hybrid:
+            lexical_results = self._lexical_search(query, knowledge_sources, query_embedding_for, candidates)
+            results = self._fuse_results(vector_results, lexical_results, n_results, rrf_k)
+            complete = complete and all(self._lexical_current(ks) for ks in knowledge_sources)
         else:
-            knowledge_sources = session.query(KnowledgeSource).filter_by(
-                is_active=True
-            ).all()
+            results = vector_results
+
+        if complete:
+            self.search_cache.put(cache_key, versions, results)
+
+        return results
+
+    def _mark_stalled(self, name: str, future: Future) -> None:
+        with self._stalled_lock:
+            self._stalled_searches.add(name)
+
+        def clear(_: Future) -> None:
+            with self._stalled_lock:
+                self._stalled_searches.discard(name)
+
+        future.add_done_callback(clear)
+
+    def _lexical_current(self, knowledge_source: KnowledgeSource) -> bool:
+        with self._lexical_lock:
+            return (
+                knowledge_source.id in self._lexical_indexes
+                and self._lexical_versions.get(knowledge_source.id) == knowledge_source.version
+            )
+
+    def _lexical_index(self, knowledge_source: KnowledgeSource) -> Optional[BM25Index]:
+        with self._lexical_lock:
+            index = self._lexical_indexes.get(knowledge_source.id)
+            if index is not None and self._lexical_versions.get(knowledge_source.id) == knowledge_source.version:
+                return index
+
+            if knowledge_source.id not in self._lexical_builds:
+                self._lexical_builds.add(knowledge_source.id)
+                threading.Thread(
+                    target=self._build_lexical_index,
+                    args=(knowledge_source,),
+                    name=f"lexical-index-{knowledge_source.id}",
+                    daemon=True
+                ).start()
+
+        return index
+
+    def _update_lexical_index(
+            self,
+            knowledge_source_id: int,
+            added: Iterable[Tuple[str, str]] = (),
+            removed: Iterable[str] = ()
+    ) -> None:
+        # Applies one write made by this process, which bumped the version by
+        # one; if another writer bumped it too, the index stays behind the
+        # registry version and is rebuilt on the next search
+        if knowledge_source_id not in self._lexical_indexes:
+            return
+        sources = self.registry.active_sources([knowledge_source_id])
+
+        with self._lexical_lock:
+            index = self._lexical_indexes.get(knowledge_source_id)
+            if index is None:
+                return
+
+            for record_id, text in added:
+                index.add(record_id, text)
+            for record_id in removed:
+                index.remove(record_id)
 
-        all_results: List[Tuple[str, float, Dict]] = []
+            version = self._lexical_versions.get(knowledge_source_id)
+            if sources and version is not None and sources[0].version == version + 1:
+                self._lexical_versions[knowledge_source_id] = sources[0].version
 
+    def _build_lexical_index(self, knowledge_source: KnowledgeSource) -> None:
+        where = None
+        if knowledge_source.storage_layout == SHARED_LAYOUT:
+            where = {"knowledge_source_id": knowledge_source.id}
+
+        # Tagged with the version seen before reading, so writes that land
+        # during the build leave it behind and trigger another rebuild
+        index = BM25Index()
+        try:
+            collection = self._collection_for(knowledge_source)
+            offset = 0
+            while True:
+                batch = collection.get(
+                    where=where,
+                    include=["documents"],
+                    limit=self.lexical_build_batch_size,
+                    offset=offset
+                )
+                if not batch["ids"]:
+                    break
+
+                for record_id, text in zip(batch["ids"], batch["documents"]):
+                    index.add(record_id, text)
+                offset += len(batch["ids"])
+        except Exception as e:
+            print(f"Error building lexical index for {knowledge_source.name}: {str(e)}")
+            with self._lexical_lock:
+                self._lexical_builds.discard(knowledge_source.id)
+            return
+
+        with self._lexical_lock:
+            # A source dropped while building discards the result
+            if knowledge_source.id in self._lexical_builds:
+                self._lexical_builds.discard(knowledge_source.id)
+                self._lexical_indexes[knowledge_source.id] = index
+                self._lexical_versions[knowledge_source.id] = knowledge_source.version
+
+    def _drop_lexical_index(self, knowledge_source_id: int) -> None:
+        with self._lexical_lock:
+            self._lexical_indexes.pop(knowledge_source_id, None)
+            self._lexical_versions.pop(knowledge_source_id, None)
+            self._lexical_builds.discard(knowledge_source_id)
+
+    def _lexical_search(
+            self,
+            query: str,
+            knowledge_sources: List[KnowledgeSource],
+            query_embedding_for: Callable[[KnowledgeSource], Any],
+            n_results: int
+    ) -> List[Tuple[str, float, Dict]]:
+        hits: List[Tuple[float, KnowledgeSource, str]] = []
         for ks in knowledge_sources:
+            index = self._lexical_index(ks)
+            if index is not None:
+                hits.extend((score, ks, record_id) for record_id, score in index.search(query, n_results))
+
+        hits = heapq.nlargest(n_results, hits, key=lambda hit: hit[0])
+        if not hits:
+            return []
+
+        by_collection: Dict[str, Tuple[KnowledgeSource, List[str]]] = {}
+        for _, ks, record_id in hits:
+            name = self.shared_collection_name if ks.storage_layout == SHARED_LAYOUT else ks.collection_name
+            by_collection.setdefault(name, (ks, []))[1].append(record_id)
+
+        fetched: Dict[str, Tuple[str, float, Dict]] = {}
+
+        for name, (ks, record_ids) in by_collection.items():
+            query_vector = np.asarray(query_embedding_for(ks), dtype=np.float32)
             try:
-                collection = self.client.get_collection(ks.collection_name)
-                results = collection.query(
-                    query_texts=[query],
-                    n_results=min(n_results, ks.document_count or 1)
+                results = self._collection_for(ks).get(
+                    ids=record_ids,
+                    include=["documents", "metadatas", "embeddings"]
                 )
-
-                if results["documents"] and results["documents"][0]:
-                    for doc, distance, metadata in zip(
-                            results["documents"][0],
-                            results["distances"][0],
-                            results["metadatas"][0]
-                    ):
-                        all_results.append((doc, distance, metadata))
             except Exception as e:
-                print(f"Error searching {ks.name}: {str(e)}")
+                print(f"Error fetching lexical hits from {name}: {str(e)}")
+                continue
 
-        session.close()
+            # Report the same squared L2 distance a vector hit would have
+            for record_id, doc, metadata, embedding in zip(
+                    results["ids"],
+                    results["documents"],
+                    results["metadatas"],
+                    results["embeddings"]
+            ):
+                distance = float(np.sum((np.asarray(embedding, dtype=np.float32) - query_vector) ** 2))
+                fetched[record_id] = (doc, distance, metadata or {})
+
+        return [fetched[record_id] for _, _, record_id in hits if record_id in fetched]
+
+    @staticmethod
+    def _fuse_results(
+            vector_results: List[Tuple[str, float, Dict]],
+            lexical_results: List[Tuple[str, float, Dict]],
+            n_results: int,
+            rrf_k: int
+    ) -> List[Tuple[str, float, Dict]]:
+        # Reciprocal rank fusion: each list contributes 1 / (k + rank)
+        fused: Dict[Tuple[Any, str], List[Any]] = {}
+
+        for retrieval, results in (("vector", vector_results), ("lexical", lexical_results)):
+            for rank, (doc, distance, metadata) in enumerate(results, 1):
+                key = (metadata.get("knowledge_source_id"), doc)
+                entry = fused.get(key)
+                if entry is None:
+                    fused[key] = [1 / (rrf_k + rank), doc, distance, metadata, retrieval]
+                else:
+                    entry[0] += 1 / (rrf_k + rank)
+                    entry[4] = "hybrid"
+
+        ranked = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)[:n_results]
+        return [
+            (doc, distance, {**metadata, "retrieval": retrieval})
+            for _, doc, distance, metadata, retrieval in ranked
+        ]
+
+    def _search_source(
+            self,
+            name: str,
+            collection_name: str,
+            query_embedding: Any,
+            n_results: int
+    ) -> Optional[List[Tuple[str, float, Dict]]]:
+        results_for_source: Optional[List[Tuple[str, float, Dict]]] = None
+
+        try:
+            collection = self.registry.collection(collection_name)
+            # Chroma returns fewer hits when a collection holds fewer vectors;
+            # document_count counts documents, not their chunks, so it is no cap
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results
+            )
+            results_for_source = self._unpack_results(results)
+        except Exception as e:
+            self.registry.forget_collection(collection_name)
+            print(f"Error searching {name}: {str(e)}")
 
-        all_results.sort(key=lambda x: x[1])
-        return all_results[:n_results]
+        return results_for_source
+
+    def _search_shared(
+            self,
+            knowledge_source_ids: List[int],
+            query_embedding: Any,
+            n_results: int
+    ) -> Optional[List[Tuple[str, float, Dict]]]:
+        where = (
+            {"knowledge_source_id": knowledge_source_ids[0]}
+            if len(knowledge_source_ids) == 1
+            else {"knowledge_source_id": {"$in": knowledge_source_ids}}
+        )
+
+        try:
+            results = self._shared_collection().query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where
+            )
+            return self._unpack_results(results)
+        except Exception as e:
+            self.registry.forget_collection(self.shared_collection_name)
+            print(f"Error searching {self.shared_collection_name}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _unpack_results(results: Dict) -> List[Tuple[str, float, Dict]]:
+        unpacked: List[Tuple[str, float, Dict]] = []
+
+        if results["documents"] and results["documents"][0]:
+            for doc, distance, metadata in zip(
+                    results["documents"][0],
+                    results["distances"][0],
+                    results["metadatas"][0]
+            ):
+                unpacked.append((doc, distance, metadata))
+
+        return unpacked
 
     def list_knowledge_sources(self) -> List[Dict[str, any]]:
         session_gen = db.get_session()
@@ -191,8 +912,10 @@ class KnowledgeManager:
                 ks.description = description
             if is_active is not None:
                 ks.is_active = is_active
+            ks.version = KnowledgeSource.version + 1
 
             session.commit()
+            self.registry.refresh_source(knowledge_source_id)
 
             return {
                 "id": ks.id,
@@ -214,15 +937,88 @@ class KnowledgeManager:
                 return False
 
             try:
-                self.client.delete_collection(ks.collection_name)
+                if ks.storage_layout == SHARED_LAYOUT:
+                    self._shared_collection().delete(where={"knowledge_source_id": ks.id})
+                else:
+                    self.client.delete_collection(ks.collection_name)
             except:
                 raise ValueError(f"Error deleting knowledge source {knowledge_source_id}")
 
             session.delete(ks)
             session.commit()
+            self._drop_lexical_index(knowledge_source_id)
+            self.search_cache.invalidate_source(knowledge_source_id)
+            self.registry.remove(knowledge_source_id)
             return True
         finally:
             session.close()
 
+    def migrate_to_shared_layout(self, batch_size: int = 500) -> Dict[str, int]:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        migrated: Dict[str, int] = {}
+        shared_collection = self._shared_collection()
+
+        try:
+            sources = session.query(KnowledgeSource).filter(
+                KnowledgeSource.storage_layout != SHARED_LAYOUT
+            ).all()
+
+            for ks in sources:
+                if ks.embedding:
+                    print(f"Skipping {ks.name}: custom embedding backends stay in their own collection")
+                    continue
+
+                try:
+                    collection = self.client.get_collection(ks.collection_name)
+                except Exception as e:
+                    print(f"Skipping {ks.name}: {str(e)}")
+                    continue
+
+                # Stored embeddings are copied as-is, so nothing is re-embedded
+                copied = 0
+                while True:
+                    batch = collection.get(
+                        include=["documents", "metadatas", "embeddings"],
+                        limit=batch_size,
+                        offset=copied
+                    )
+                    if not batch["ids"]:
+                        break
+
+                    # Ids and the doc_id/parent_id they are looked up by get
+                    # the same prefix as documents ingested into the shared layout
+                    id_prefix = f"ks{ks.id}_"
+                    metadatas = []
+                    for metadata in batch["metadatas"]:
+                        metadata = dict(metadata or {})
+                        metadata["knowledge_source_id"] = ks.id
+                        for key in ("doc_id", "parent_id"):
+                            if key in metadata:
+                                metadata[key] = f"{id_prefix}{metadata[key]}"
+                        metadatas.append(metadata)
+
+                    shared_collection.upsert(
+                        ids=[f"{id_prefix}{record_id}" for record_id in batch["ids"]],
+                        embeddings=batch["embeddings"],
+                        documents=batch["documents"],
+                        metadatas=metadatas
+                    )
+                    copied += len(batch["ids"])
+
+                ks.storage_layout = SHARED_LAYOUT
+                ks.version = KnowledgeSource.version + 1
+                session.commit()
+                self.client.delete_collection(ks.collection_name)
+                self._drop_lexical_index(ks.id)
+
+                migrated[ks.name] = copied
+
+            return migrated
+        finally:
+            session.close()
+            self.registry.refresh()
+
 
 knowledge_manager = KnowledgeManager()
@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+from sqlalchemy.orm import Session
+from chatbot.db.database import db
+from chatbot.db.models import KnowledgeSource
+
+
+class SourceInfo(NamedTuple):
+    id: int
+    name: str
+    collection_name: str
+    document_count: int
+    storage_layout: str
+    version: int
+    chunking: Optional[dict]
+    embedding: Optional[dict]
+
+    @classmethod
+    def from_model(cls, knowledge_source: KnowledgeSource) -> "SourceInfo":
+        return cls(
+            id=knowledge_source.id,
+            name=knowledge_source.name,
+            collection_name=knowledge_source.collection_name,
+            document_count=knowledge_source.document_count,
+            storage_layout=knowledge_source.storage_layout,
+            version=knowledge_source.version,
+            chunking=knowledge_source.chunking,
+            embedding=knowledge_source.embedding
+        )
+
+
+class SourceRegistry:
+    # Snapshot of the active sources. This process's writes update it at
+    # once; other processes' writes arrive with a background refresh after
+    # the TTL, so searches never wait on the database
+
+    def __init__(self, collection_loader: Callable[[str], Any], ttl_seconds: Optional[float] = None) -> None:
+        self.collection_loader = collection_loader
+        self.ttl_seconds: float = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("KNOWLEDGE_REGISTRY_TTL", "30")
+        )
+        self._sources: Dict[int, SourceInfo] = {}
+        self._collections: Dict[str, Any] = {}
+        self._loaded_at: Optional[float] = None
+        self._refreshed_at: Optional[datetime] = None
+        self._refreshing = False
+        # Sources written while a full refresh is reading the table
+        self._touched: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._touched = set()
+
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            sources = {
+                ks.id: SourceInfo.from_model(ks)
+                for ks in session.query(KnowledgeSource).filter_by(is_active=True).all()
+            }
+        finally:
+            session.close()
+
+        with self._lock:
+            # Per-source updates that landed during the read are newer
+            for knowledge_source_id in self._touched:
+                sources.pop(knowledge_source_id, None)
+                if knowledge_source_id in self._sources:
+                    sources[knowledge_source_id] = self._sources[knowledge_source_id]
+
+            for name in set(self._collections) - {ks.collection_name for ks in sources.values()}:
+                self._collections.pop(name, None)
+            self._sources = sources
+            self._loaded_at = time.monotonic()
+            self._refreshed_at = datetime.now()
+            self._refreshing = False
+
+    def refresh_source(self, knowledge_source_id: int) -> None:
+        session_gen = db.get_session()
+        session: Session = next(session_gen)
+
+        try:
+            ks = session.query(KnowledgeSource).filter_by(id=knowledge_source_id).first()
+            info = SourceInfo.from_model(ks) if ks and ks.is_active else None
+        finally:
+            session.close()
+
+        with self._lock:
+            self._touched.add(knowledge_source_id)
+            if info is None:
+                self._remove(knowledge_source_id)
+            else:
+                self._sources[knowledge_source_id] = info
+
+    def remove(self, knowledge_source_id: int) -> None:
+        with self._lock:
+            self._touched.add(knowledge_source_id)
+            self._remove(knowledge_source_id)
+
+    def _remove(self, knowledge_source_id: int) -> None:
+        info = self._sources.pop(knowledge_source_id, None)
+        if info is not None:
+            self._collections.pop(info.collection_name, None)
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing knowledge source registry: {str(e)}")
+            with self._lock:
+                self._refreshing = False
+
+    def active_sources(self, knowledge_source_ids: Optional[List[int]] = None) -> List[SourceInfo]:
+        if self._loaded_at is None:
+            self.refresh()
+
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.ttl_seconds and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    name="knowledge-registry-refresh",
+                    daemon=True
+                ).start()
+
+            if knowledge_source_ids:
+                return [self._sources[i] for i in knowledge_source_ids if i in self._sources]
+            return list(self._sources.values())
+
+    def collection(self, name: str) -> Any:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self.collection_loader(name)
+            with self._lock:
+                self._collections[name] = collection
+        return collection
+
+    def forget_collection(self, name: str) -> None:
+        # Called when a handle fails, e.g. the collection was recreated elsewhere
+        with self._lock:
+            self._collections.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sources": len(self._sources),
+                "collections": len(self._collections),
+                "ttl_seconds": self.ttl_seconds,
+                "refreshed_at": self._refreshed_at.isoformat() if self._refreshed_at else None,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None
+            }
@@ -0,0 +1,155 @@
+import math
+import time
+import importlib.util
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from chatbot.config_schemas import RerankSettings
+from chatbot.knowledge.lexical import tokenize
+
+DEFAULT_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class LexicalOverlapScorer:
+    # Share of the query's terms found in the candidate, weighted by how rare
+    # each term is among the candidates; cheap enough to score in one pass
+    batch_size: Optional[int] = None
+
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(documents)
+
+        document_terms = [set(tokenize(document)) for document in documents]
+        weights = {
+            term: math.log(1 + len(documents) / (1 + sum(term in terms for terms in document_terms)))
+            for term in query_terms
+        }
+        total = sum(weights.values())
+
+        return [
+            sum(weight for term, weight in weights.items() if term in terms) / total
+            for terms in document_terms
+        ]
+
+
+class CrossEncoderScorer:
+    batch_size: Optional[int] = 8
+
+    def __init__(self, model: Optional[str] = None) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("The cross_encoder scorer requires `pip install sentence-transformers`")
+
+        self._model = CrossEncoder(model or DEFAULT_CROSS_ENCODER_MODEL)
+
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        return [float(score) for score in self._model.predict([(query, document) for document in documents])]
+
+
+class Reranker:
+    def __init__(self, scorer: Any, budget_ms: float) -> None:
+        self.scorer = scorer
+        self.budget_ms = budget_ms
+        self.reranked = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def rerank(
+            self,
+            query: str,
+            results: List[Tuple[str, float, Dict]],
+            top_k: int
+    ) -> List[Tuple[str, float, Dict]]:
+        if len(results) <= 1:
+            return results[:top_k]
+
+        # A scorer that failed to load leaves results in vector order
+        if self.scorer is None:
+            with self._lock:
+                self.fallbacks += 1
+            return results[:top_k]
+
+        deadline = time.monotonic() + self.budget_ms / 1000
+        documents = [doc for doc, _, _ in results]
+        batch_size = self.scorer.batch_size or len(documents)
+        scores: List[float] = []
+
+        # The budget is checked between batches; a scorer cannot be interrupted
+        # mid-batch, so slow scorers should use small batches
+        for start in range(0, len(documents), batch_size):
+            scores.extend(self.scorer.score(query, documents[start:start + batch_size]))
+            if time.monotonic() > deadline:
+                with self._lock:
+                    self.fallbacks += 1
+                return results[:top_k]
+
+        with self._lock:
+            self.reranked += 1
+        ranked = sorted(zip(scores, results), key=lambda item: item[0], reverse=True)[:top_k]
+        return [
+            (doc, distance, {**metadata, "rerank_score": score})
+            for score, (doc, distance, metadata) in ranked
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"reranked": self.reranked, "fallbacks": self.fallbacks}
+
+
+_rerankers: Dict[Tuple[str, Optional[str], float], Reranker] = {}
+_reranker_builds: Dict[Tuple[str, Optional[str], float], threading.Lock] = {}
+_rerankers_lock = threading.Lock()
+
+
+def check_scorer(settings: RerankSettings) -> None:
+    # Checked when a configuration is saved, so a missing optional
+    # dependency is reported then instead of on every chat turn
+    if settings.enabled and settings.scorer == "cross_encoder" and importlib.util.find_spec("sentence_transformers") is None:
+        raise ValueError("The cross_encoder scorer requires `pip install sentence-transformers`")
+
+
+def _build_scorer(settings: RerankSettings) -> Optional[Any]:
+    if settings.scorer != "cross_encoder":
+        return LexicalOverlapScorer()
+
+    try:
+        return CrossEncoderScorer(settings.model)
+    except Exception as e:
+        print(f"Error loading cross_encoder scorer {settings.model or DEFAULT_CROSS_ENCODER_MODEL}: {str(e)}")
+        return None
+
+
+def get_reranker(settings: RerankSettings) -> Reranker:
+    # Scorers can load models, so one reranker is kept per configuration.
+    # Loading holds only that configuration's lock, so other rerankers keep
+    # serving while a model downloads
+    key = (settings.scorer, settings.model, settings.budget_ms)
+
+    with _rerankers_lock:
+        reranker = _rerankers.get(key)
+        if reranker is not None:
+            return reranker
+        build_lock = _reranker_builds.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _rerankers_lock:
+            reranker = _rerankers.get(key)
+        if reranker is None:
+            reranker = Reranker(_build_scorer(settings), settings.budget_ms)
+            with _rerankers_lock:
+                _rerankers[key] = reranker
+        return reranker
+
+
+def reranker_stats() -> Dict[str, Any]:
+    # One entry per reranker configuration used since the process started
+    with _rerankers_lock:
+        rerankers = list(_rerankers.items())
+
+    return {
+        "rerankers": [
+            {"scorer": scorer, "model": model, "budget_ms": budget_ms, **reranker.stats()}
+            for (scorer, model, budget_ms), reranker in rerankers
+        ]
+    }
@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, NamedTuple, Tuple
+from chatbot.response_cache import ResponseCache
+
+SearchKey = Tuple[str, Tuple[int, ...], int, bool, int]
+SearchResults = List[Tuple[str, float, Dict]]
+
+
+class SearchCacheEntry(NamedTuple):
+    versions: Tuple[int, ...]
+    results: SearchResults
+    expires_at: float
+
+
+class SearchCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        self.max_entries: int = max_entries if max_entries is not None else int(
+            os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000")
+        )
+        # Versions catch writes made through this process and any process
+        # sharing the database; the TTL bounds everything else
+        self.ttl_seconds: float = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("SEARCH_CACHE_TTL", "600")
+        )
+        self._entries: "OrderedDict[SearchKey, SearchCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stale: int = 0
+
+    @staticmethod
+    def key_for(
+            query: str,
+            knowledge_source_ids: List[int],
+            n_results: int,
+            hybrid: bool = False,
+            rrf_k: int = 60
+    ) -> SearchKey:
+        return (
+            ResponseCache.normalize(query),
+            tuple(sorted(knowledge_source_ids)),
+            n_results,
+            hybrid,
+            rrf_k if hybrid else 0
+        )
+
+    def get(self, key: SearchKey, versions: Tuple[int, ...]) -> Optional[SearchResults]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            # An entry written before the last ingest into any of its sources
+            # no longer matches the versions and is dropped
+            if entry is not None and (entry.versions != versions or entry.expires_at <= time.monotonic()):
+                del self._entries[key]
+                self.stale += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry.results)
+
+    def put(self, key: SearchKey, versions: Tuple[int, ...], results: SearchResults) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = SearchCacheEntry(
+                versions=versions,
+                results=list(results),
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_source(self, knowledge_source_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if knowledge_source_id in key[1]]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0
+            }
@@ -1,11 +1,16 @@
 import sys
 from chatbot.knowledge.manager import knowledge_manager
+from chatbot.knowledge.ingest import IngestProgress, iter_documents
+from chatbot.config_schemas import ChunkingSettings
 from chatbot.db.database import db
 
 
-def create_source(name: str, description: str = "") -> None:
-    source = knowledge_manager.create_knowledge_source(name, description)
+def create_source(name: str, description: str = "", chunking: ChunkingSettings = None) -> None:
+    source = knowledge_manager.create_knowledge_source(name, description, chunking)
     print(f"Created knowledge source '{source['name']}' with ID {source['id']}")
+    if chunking:
+        print(f"Documents are split into {chunking.strategy} chunks of {chunking.chunk_size} words "
+              f"with {chunking.chunk_overlap} overlap")
 
 
 def add_documents(source_id: int, *documents: str) -> None:
@@ -13,6 +18,35 @@ def add_documents(source_id: int, *documents: str) -> None:
     print(f"Added {count} documents to knowledge source {source_id}")
 
 
+def ingest(source_id: int, path: str, batch_size: int = 0) -> None:
+    def report(progress: IngestProgress) -> None:
+        print(
+            f"\rIngested {progress.documents} documents "
+            f"({progress.docs_per_second:.1f} docs/sec, {progress.skipped} unchanged)",
+            end="",
+            flush=True
+        )
+
+    count = knowledge_manager.ingest(
+        source_id,
+        iter_documents(path),
+        batch_size=batch_size or None,
+        progress=report
+    )
+    print(f"\nIngested {count} documents from {path} into knowledge source {source_id}")
+
+
+def show_document(source_id: int, document_id: str) -> None:
+    document = knowledge_manager.get_document(source_id, document_id)
+    if not document:
+        print(f"Document {document_id} not found.")
+        return
+
+    print(f"\n{document['document_id']} ({document['chunk_count']} chunks)")
+    print("-" * 60)
+    print(document["document"])
+
+
 def list_sources() -> None:
     sources = knowledge_manager.list_knowledge_sources()
     if not sources:
@@ -42,15 +76,28 @@ def search(query: str) -> None:
         print()
 
 
+def migrate_shared() -> None:
+    migrated = knowledge_manager.migrate_to_shared_layout()
+    if not migrated:
+        print("No knowledge sources to migrate.")
+        return
+
+    for name, count in migrated.items():
+        print(f"Migrated '{name}': {count} documents moved to the shared collection")
+
+
 def main() -> None:
-    db.create_tables()
+    db.migrate()
 
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  python -m chatbot.knowledge_cli create <name> [description]")
+        print("  python -m chatbot.knowledge_cli create <name> [description] [tokens|sentences] [chunk_size] [chunk_overlap]")
         print("  python -m chatbot.knowledge_cli add <source_id> <document1> [document2] ...")
+        print("  python -m chatbot.knowledge_cli ingest <source_id> <path.jsonl|path.txt|directory> [batch_size]")
+        print("  python -m chatbot.knowledge_cli show <source_id> <document_id>")
         print("  python -m chatbot.knowledge_cli list")
         print("  python -m chatbot.knowledge_cli search <query>")
+        print("  python -m chatbot.knowledge_cli migrate-shared")
         return
 
     command = sys.argv[1]
@@ -58,13 +105,25 @@ def main() -> None:
     if command == "create" and len(sys.argv) >= 3:
         name = sys.argv[2]
         description = sys.argv[3] if len(sys.argv) > 3 else ""
-        create_source(name, description)
+        chunking = None
+        if len(sys.argv) > 4:
+            options = dict(zip(["strategy", "chunk_size", "chunk_overlap"], sys.argv[4:7]))
+            chunking = ChunkingSettings(**options)
+        create_source(name, description, chunking)
 
     elif command == "add" and len(sys.argv) >= 4:
         source_id = int(sys.argv[2])
         documents = sys.argv[3:]
         add_documents(source_id, *documents)
 
+    elif command == "ingest" and len(sys.argv) >= 4:
+        source_id = int(sys.argv[2])
+        batch_size = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+        ingest(source_id, sys.argv[3], batch_size)
+
+    elif command == "show" and len(sys.argv) >= 4:
+        show_document(int(sys.argv[2]), sys.argv[3])
+
     elif command == "list":
         list_sources()
 
@@ -72,6 +131,9 @@ def main() -> None:
         query = " ".join(sys.argv[2:])
         search(query)
 
+    elif command == "migrate-shared":
+        migrate_shared()
+
     else:
         print("Invalid command. Run without arguments to see usage.")
 
@@ -0,0 +1,86 @@
+import os
+import threading
+import importlib.util
+from typing import Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMClientPool:
+    def __init__(self) -> None:
+        self.base_url: str = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+        self.pool_size: int = int(os.getenv("LLM_POOL_SIZE", "100"))
+        self.keepalive_connections: int = int(os.getenv("LLM_POOL_KEEPALIVE", str(self.pool_size)))
+        self.keepalive_expiry: float = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+        self.timeout: float = float(os.getenv("LLM_TIMEOUT", "60"))
+        self.connect_timeout: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+        self.max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        self.http2: bool = os.getenv("LLM_HTTP2", "false").lower() == "true"
+
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            print("Warning: LLM_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+            self.http2 = False
+
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._lock = threading.Lock()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def get_client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(
+                    base_url=self.base_url,
+                    api_key=os.getenv("OPENROUTER_API_KEY"),
+                    timeout=self._timeout(),
+                    max_retries=self.max_retries,
+                    http_client=httpx.Client(
+                        limits=self._limits(),
+                        timeout=self._timeout(),
+                        http2=self.http2
+                    )
+                )
+            return self._client
+
+    def get_async_client(self) -> AsyncOpenAI:
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(
+                    base_url=self.base_url,
+                    api_key=os.getenv("OPENROUTER_API_KEY"),
+                    timeout=self._timeout(),
+                    max_retries=self.max_retries,
+                    http_client=httpx.AsyncClient(
+                        limits=self._limits(),
+                        timeout=self._timeout(),
+                        http2=self.http2
+                    )
+                )
+            return self._async_client
+
+    async def aclose(self) -> None:
+        # The async connection pool is bound to the event loop that used it,
+        # so it is dropped on shutdown and rebuilt by the next loop
+        with self._lock:
+            async_client, self._async_client = self._async_client, None
+            client, self._client = self._client, None
+
+        if async_client is not None:
+            await async_client.close()
+        if client is not None:
+            client.close()
+
+
+llm_clients = LLMClientPool()
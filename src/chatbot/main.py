@@ -1,14 +1,23 @@
 import os
 import sys
-from typing import List, Dict, Optional
-from openai import OpenAI
+import asyncio
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
+from datetime import datetime
+from sqlalchemy import update, func
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from chatbot.db.database import db
 from chatbot.db.models import Conversation, Message
+from chatbot.db.queries import list_conversations_page
 from chatbot.knowledge.manager import knowledge_manager
+from chatbot.knowledge.rerank import get_reranker
 from chatbot.config_manager import config_manager
 from chatbot.ab_test_manager import ab_test_manager
+from chatbot.llm import llm_clients
+from chatbot.conversation_cache import conversation_cache
+from chatbot.context_builder import ContextBuilder
+from chatbot.response_cache import response_cache, CacheKey
 
 load_dotenv()
 
@@ -20,18 +29,16 @@ class ChatBot:
             print("Error: OPENROUTER_API_KEY not found in .env file")
             sys.exit(1)
 
-        self.client: OpenAI = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-        )
+        self.client: OpenAI = llm_clients.get_client()
+        self.async_client: AsyncOpenAI = llm_clients.get_async_client()
         if user_identifier:
             self.config = ab_test_manager.get_config_for_user(user_identifier)
         else:
             self.config = config_manager.get_active_configuration()
-        self.config = config_manager.get_active_configuration()
         self.model: str = self.config.model
         self.messages: List[Dict[str, str]] = []
         self.conversation_id: Optional[int] = conversation_id
+        self.last_message_id: Optional[int] = None
         self.session: Optional[Session] = None
 
         self._initialize_conversation()
@@ -40,26 +47,39 @@ class ChatBot:
         session_gen = db.get_session()
         self.session = next(session_gen)
 
-        if self.conversation_id:
+        cached_messages = (
+            conversation_cache.get(self.conversation_id) if self.conversation_id else None
+        )
+
+        if cached_messages is not None:
+            print(f"Resuming conversation: Conversation {self.conversation_id}")
+            self.messages = cached_messages
+
+        elif self.conversation_id:
             conversation = self.session.query(Conversation).filter_by(
                 id=self.conversation_id
             ).first()
 
             if conversation:
                 print(f"Resuming conversation: {conversation.title or f'Conversation {conversation.id}'}")
-                for message in conversation.messages:
+                history = self.session.query(Message.role, Message.content).filter_by(
+                    conversation_id=self.conversation_id
+                ).order_by(Message.id).all()
+
+                for role, content in history:
                     self.messages.append({
-                        "role": message.role,
-                        "content": message.content
+                        "role": role,
+                        "content": content
                     })
+                conversation_cache.put(self.conversation_id, self.messages)
             else:
                 print(f"Conversation {self.conversation_id} not found. Starting new conversation.")
                 self.conversation_id = None
 
         if not self.conversation_id:
-            conversation = Conversation()
+            conversation = Conversation(message_count=1, last_message_at=datetime.now())
             self.session.add(conversation)
-            self.session.commit()
+            self.session.flush()
             self.conversation_id = conversation.id
 
             # Use system prompt from configuration
@@ -73,110 +93,270 @@ class ChatBot:
 
             self.messages.append({
                 "role": "system",
-                "content": system_message.content
+                "content": self.config.prompt_template.system_prompt
             })
+            conversation_cache.put(self.conversation_id, self.messages)
 
             print(f"Started new conversation {self.conversation_id}")
             print(f"Using configuration: {self.config.name}")
 
         print("Type 'quit' or 'exit' to end the conversation.\n")
 
-    def chat(self, user_input: str) -> str:
-        # Save user message to database
+    @classmethod
+    async def create(
+            cls,
+            conversation_id: Optional[int] = None,
+            user_identifier: Optional[str] = None
+    ) -> "ChatBot":
+        # Configuration lookup and conversation loading hit the database
+        return await asyncio.to_thread(cls, conversation_id, user_identifier)
+
+    def _retrieve_documents(self, user_input: str) -> List[str]:
+        relevant_docs: List[str] = []
+        settings = self.config.knowledge_settings
+
+        # Use knowledge retrieval if enabled in configuration
+        if settings.enabled:
+            # Reranking over-fetches candidates and keeps the best max_results
+            n_results = settings.max_results
+            if settings.rerank.enabled:
+                n_results = max(settings.rerank.candidates, settings.max_results)
+
+            results = knowledge_manager.search(
+                query=user_input,
+                knowledge_source_ids=settings.knowledge_source_ids,
+                n_results=n_results,
+                hybrid=settings.hybrid_search,
+                rrf_k=settings.rrf_k
+            )
+
+            # Filter results by score threshold; exact keyword matches are kept
+            # even when their embedding is far from the question
+            results = [
+                (doc, score, metadata) for doc, score, metadata in results
+                if score <= settings.score_threshold
+                or metadata.get("retrieval") in ("lexical", "hybrid")
+            ]
+
+            if settings.rerank.enabled:
+                results = get_reranker(settings.rerank).rerank(user_input, results, settings.max_results)
+
+            relevant_docs = [doc for doc, _, _ in results]
+
+        return relevant_docs
+
+    def _build_messages_for_api(self, user_input: str, documents: List[str]) -> List[Dict[str, str]]:
+        context_builder = ContextBuilder(
+            self.config.context_settings,
+            self.config.model_parameters.max_tokens
+        )
+
+        return context_builder.build(
+            history=self.messages,
+            user_input=user_input,
+            documents=documents,
+            context_template=self.config.prompt_template.context_template
+        )
+
+    def _prepare_turn(self, user_input: str) -> Tuple[Optional[str], Optional[CacheKey], List[Dict[str, str]]]:
+        documents = self._retrieve_documents(user_input)
+
+        cache_key: Optional[CacheKey] = None
+        if self.config.response_cache.enabled:
+            cache_key = response_cache.key_for(self.config, user_input, documents)
+            cached_response = response_cache.get(
+                cache_key,
+                self.config.response_cache.similarity_threshold
+            )
+            if cached_response is not None:
+                return cached_response, None, []
+
+        return None, cache_key, self._build_messages_for_api(user_input, documents)
+
+    def _complete_turn(
+            self,
+            user_input: str,
+            bot_response: str,
+            cache_key: Optional[CacheKey]
+    ) -> Optional[int]:
+        if cache_key is not None:
+            response_cache.put(cache_key, bot_response, self.config.response_cache.ttl_seconds)
+
+        return self._persist_turn(user_input, bot_response)
+
+    def _completion_params(self, messages_for_api: List[Dict[str, str]]) -> Dict[str, Any]:
+        return {
+            "model": self.config.model,
+            "messages": messages_for_api,
+            "temperature": self.config.model_parameters.temperature,
+            "max_tokens": self.config.model_parameters.max_tokens,
+            "top_p": self.config.model_parameters.top_p,
+            "frequency_penalty": self.config.model_parameters.frequency_penalty,
+            "presence_penalty": self.config.model_parameters.presence_penalty
+        }
+
+    def _persist_turn(self, user_input: str, bot_response: Optional[str]) -> Optional[int]:
+        # The whole turn is written in one transaction; ids are read after the
+        # flush so nothing is reloaded once the commit expires the instances
+        is_first_exchange = not any(message["role"] == "user" for message in self.messages)
+
         user_message = Message(
             conversation_id=self.conversation_id,
             role="user",
             content=user_input
         )
         self.session.add(user_message)
+
+        assistant_message: Optional[Message] = None
+        if bot_response is not None:
+            assistant_message = Message(
+                conversation_id=self.conversation_id,
+                role="assistant",
+                content=bot_response
+            )
+            self.session.add(assistant_message)
+
+        # Counters are incremented in SQL so concurrent turns on the same
+        # conversation cannot lose an update
+        now = datetime.now()
+        values: Dict[str, Any] = {
+            "message_count": Conversation.message_count + (1 if assistant_message is None else 2),
+            "last_message_at": now,
+            "updated_at": now
+        }
+        if is_first_exchange:
+            values["title"] = func.coalesce(Conversation.title, user_input[:100])
+
+        self.session.execute(
+            update(Conversation)
+            .where(Conversation.id == self.conversation_id)
+            .values(**values)
+        )
+
+        self.session.flush()
+        self.last_message_id = assistant_message.id if assistant_message else None
         self.session.commit()
 
         # Add to messages history
-        self.messages.append({
-            "role": "user",
-            "content": user_input
-        })
+        new_messages = [{"role": "user", "content": user_input}]
+        if bot_response is not None:
+            new_messages.append({"role": "assistant", "content": bot_response})
+        for message in new_messages:
+            self.messages.append(message)
+            conversation_cache.append(self.conversation_id, message)
+
+        return self.last_message_id
+
+    def _persist_failed_turn(self, user_input: str, partial_response: Optional[str] = None) -> None:
+        self.session.rollback()
+        self._persist_turn(user_input, partial_response)
+
+    def _error_response(self, error: Exception) -> str:
+        error_msg: str = f"Error: {str(error)}"
+        print(f"\n{error_msg}")
+
+        # Use error prompt from configuration if available
+        if hasattr(self.config.prompt_template, 'error_prompt') and self.config.prompt_template.error_prompt:
+            return self.config.prompt_template.error_prompt
+        else:
+            return "I'm sorry, I encountered an error. Please try again."
 
+    def chat(self, user_input: str) -> str:
         try:
-            # Prepare messages for API call
-            messages_for_api = self.messages.copy()
-
-            # Use knowledge retrieval if enabled in configuration
-            if self.config.knowledge_settings.enabled:
-                results = knowledge_manager.search(
-                    query=user_input,
-                    knowledge_source_ids=self.config.knowledge_settings.knowledge_source_ids,
-                    n_results=self.config.knowledge_settings.max_results
-                )
-
-                if results:
-                    # Filter results by score threshold
-                    relevant_docs = []
-                    for doc, score, metadata in results:
-                        if score <= self.config.knowledge_settings.score_threshold:
-                            relevant_docs.append(doc)
-
-                    # Add context if we found relevant documents
-                    if relevant_docs:
-                        context = "\n\n".join(relevant_docs)
-                        context_message = {
-                            "role": "system",
-                            "content": self.config.prompt_template.context_template.format(
-                                context=context
-                            )
-                        }
-                        messages_for_api.append(context_message)
-
-            # Add the current user message
-            messages_for_api.append({"role": "user", "content": user_input})
+            cached_response, cache_key, messages_for_api = self._prepare_turn(user_input)
+            if cached_response is not None:
+                self._complete_turn(user_input, cached_response, None)
+                return cached_response
 
             # Make API call with configuration parameters
             response = self.client.chat.completions.create(
-                model=self.config.model,
-                messages=messages_for_api,
-                temperature=self.config.model_parameters.temperature,
-                max_tokens=self.config.model_parameters.max_tokens,
-                top_p=self.config.model_parameters.top_p,
-                frequency_penalty=self.config.model_parameters.frequency_penalty,
-                presence_penalty=self.config.model_parameters.presence_penalty
+                **self._completion_params(messages_for_api)
             )
 
             bot_response: str = response.choices[0].message.content
+            self._complete_turn(user_input, bot_response, cache_key)
 
-            # Save assistant message to database
-            assistant_message = Message(
-                conversation_id=self.conversation_id,
-                role="assistant",
-                content=bot_response
+            return bot_response
+
+        except Exception as e:
+            self._persist_failed_turn(user_input)
+            return self._error_response(e)
+
+    async def achat(self, user_input: str) -> str:
+        # Database writes and retrieval are blocking, so they run in worker
+        # threads while the completion itself is awaited on the event loop
+        try:
+            cached_response, cache_key, messages_for_api = await asyncio.to_thread(
+                self._prepare_turn, user_input
             )
-            self.session.add(assistant_message)
-            self.session.commit()
+            if cached_response is not None:
+                await asyncio.to_thread(self._complete_turn, user_input, cached_response, None)
+                return cached_response
 
-            # Add to messages history
-            self.messages.append({
-                "role": "assistant",
-                "content": bot_response
-            })
+            response = await self.async_client.chat.completions.create(
+                **self._completion_params(messages_for_api)
+            )
 
-            # Update conversation title if it's the first exchange
-            conversation = self.session.query(Conversation).filter_by(
-                id=self.conversation_id
-            ).first()
-            if conversation and not conversation.title and len(self.messages) >= 3:
-                conversation.title = user_input[:100]
-                self.session.commit()
+            bot_response: str = response.choices[0].message.content
+            await asyncio.to_thread(self._complete_turn, user_input, bot_response, cache_key)
 
             return bot_response
 
         except Exception as e:
-            error_msg: str = f"Error: {str(e)}"
-            print(f"\n{error_msg}")
+            await asyncio.to_thread(self._persist_failed_turn, user_input)
+            return self._error_response(e)
+
+    async def astream(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        # Text already sent to the client, kept if the stream is cut short
+        sent: List[str] = []
+        persisted = False
+
+        try:
+            cached_response, cache_key, messages_for_api = await asyncio.to_thread(
+                self._prepare_turn, user_input
+            )
 
-            # Use error prompt from configuration if available
-            if hasattr(self.config.prompt_template, 'error_prompt') and self.config.prompt_template.error_prompt:
-                return self.config.prompt_template.error_prompt
+            if cached_response is not None:
+                bot_response: str = cached_response
+                sent.append(cached_response)
+                yield {"type": "token", "content": cached_response}
             else:
-                return "I'm sorry, I encountered an error. Please try again."
+                stream = await self.async_client.chat.completions.create(
+                    stream=True,
+                    **self._completion_params(messages_for_api)
+                )
+
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        sent.append(token)
+                        yield {"type": "token", "content": token}
+
+                bot_response = "".join(sent)
+
+            # A complete stream is persisted and cached as a normal turn
+            persisted = True
+            message_id = await asyncio.to_thread(self._complete_turn, user_input, bot_response, cache_key)
+
+            yield {
+                "type": "done",
+                "conversation_id": self.conversation_id,
+                "message_id": message_id
+            }
+
+        except Exception as e:
+            persisted = True
+            await asyncio.to_thread(self._persist_failed_turn, user_input)
+            yield {"type": "error", "content": self._error_response(e)}
+
+        finally:
+            # The client went away: the generator was closed or its task
+            # cancelled. A cancelled task cannot await a worker thread, so the
+            # question and the partial answer it was sent are saved inline
+            if not persisted:
+                self._persist_failed_turn(user_input, "".join(sent) or None)
 
     def run(self) -> None:
         print("ChatBot: Hi, how are you?")
@@ -207,13 +387,17 @@ class ChatBot:
             self.session.close()
 
 
-def list_conversations() -> None:
+def list_conversations(cursor: Optional[str] = None, limit: int = 20) -> None:
     session_gen = db.get_session()
     session = next(session_gen)
 
-    conversations = session.query(Conversation).order_by(
-        Conversation.updated_at.desc()
-    ).all()
+    try:
+        conversations, next_cursor = list_conversations_page(session, limit, cursor)
+    except ValueError as e:
+        print(str(e))
+        return
+    finally:
+        session.close()
 
     if not conversations:
         print("No conversations found.")
@@ -223,16 +407,20 @@ def list_conversations() -> None:
     print("-" * 60)
     for conv in conversations:
         title = conv.title or f"Conversation {conv.id}"
-        print(f"[{conv.id}] {title} - {conv.updated_at.strftime('%Y-%m-%d %H:%M')}")
+        print(
+            f"[{conv.id}] {title} - {conv.updated_at.strftime('%Y-%m-%d %H:%M')} "
+            f"({conv.message_count} messages)"
+        )
     print("-" * 60)
 
-    session.close()
+    if next_cursor:
+        print(f"More: python -m chatbot list {next_cursor}")
 
 
 def main() -> None:
     if len(sys.argv) > 1:
         if sys.argv[1] == "list":
-            list_conversations()
+            list_conversations(sys.argv[2] if len(sys.argv) > 2 else None)
             return
         elif sys.argv[1] == "continue" and len(sys.argv) > 2:
             try:
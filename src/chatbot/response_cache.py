@@ -0,0 +1,166 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, NamedTuple, Callable
+import numpy as np
+from dotenv import load_dotenv
+from chatbot.config_schemas import ChatbotConfiguration
+
+load_dotenv()
+
+
+class CacheKey(NamedTuple):
+    namespace: str
+    prompt: str
+    embedding: Optional[np.ndarray]
+
+
+class CacheEntry(NamedTuple):
+    namespace: str
+    response: str
+    embedding: Optional[np.ndarray]
+    expires_at: float
+
+
+class ResponseCache:
+    def __init__(
+            self,
+            max_entries: Optional[int] = None,
+            embedding_function: Optional[Callable[[List[str]], Any]] = None
+    ) -> None:
+        self.max_entries: int = max_entries if max_entries is not None else int(
+            os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000")
+        )
+        self.embedding_function = embedding_function
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._namespaces: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.semantic_hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        prompt = re.sub(r"\s+", " ", prompt.strip().lower())
+        return prompt.rstrip("?!. ")
+
+    def _embed(self, text: str) -> np.ndarray:
+        if self.embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            self.embedding_function = DefaultEmbeddingFunction()
+
+        vector = np.asarray(self.embedding_function([text])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def key_for(
+            self,
+            config: ChatbotConfiguration,
+            prompt: str,
+            documents: List[str]
+    ) -> CacheKey:
+        # Any change to the configuration or to the retrieved context lands
+        # in a different namespace, so stale answers are never served
+        namespace = hashlib.sha256(
+            (config.model_dump_json() + "\x00" + "\x00".join(documents)).encode()
+        ).hexdigest()
+        normalized = self.normalize(prompt)
+
+        embedding = None
+        if config.response_cache.similarity_threshold is not None:
+            embedding = self._embed(normalized)
+
+        return CacheKey(namespace, normalized, embedding)
+
+    @staticmethod
+    def _entry_id(key: CacheKey) -> str:
+        return hashlib.sha256(f"{key.namespace}:{key.prompt}".encode()).hexdigest()
+
+    def get(self, key: CacheKey, similarity_threshold: Optional[float] = None) -> Optional[str]:
+        now = time.monotonic()
+
+        with self._lock:
+            entry_id = self._entry_id(key)
+            entry = self._entries.get(entry_id)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(entry_id)
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return entry.response
+
+            if similarity_threshold is not None and key.embedding is not None:
+                best_id, best_score = None, similarity_threshold
+                for candidate_id in list(self._namespaces.get(key.namespace, ())):
+                    candidate = self._entries[candidate_id]
+                    if candidate.expires_at <= now:
+                        self._remove(candidate_id)
+                        continue
+                    if candidate.embedding is None:
+                        continue
+
+                    score = float(np.dot(candidate.embedding, key.embedding))
+                    if score >= best_score:
+                        best_id, best_score = candidate_id, score
+
+                if best_id is not None:
+                    self._entries.move_to_end(best_id)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    return self._entries[best_id].response
+
+            self.misses += 1
+            return None
+
+    def put(self, key: CacheKey, response: str, ttl_seconds: int) -> None:
+        with self._lock:
+            entry_id = self._entry_id(key)
+            self._remove(entry_id)
+
+            self._entries[entry_id] = CacheEntry(
+                namespace=key.namespace,
+                response=response,
+                embedding=key.embedding,
+                expires_at=time.monotonic() + ttl_seconds
+            )
+            self._namespaces.setdefault(key.namespace, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0
+            }
+
+    def _remove(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+
+        namespace_entries = self._namespaces.get(entry.namespace)
+        if namespace_entries is not None:
+            namespace_entries.discard(entry_id)
+            if not namespace_entries:
+                del self._namespaces[entry.namespace]
+
+
+response_cache = ResponseCache()
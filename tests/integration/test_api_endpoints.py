@@ -1,20 +1,21 @@
+import json
 from datetime import datetime
 
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 
 
 class TestChatEndpoints:
     """Test chat-related API endpoints"""
 
-    @patch('src.chatbot.main.OpenAI')
+    @patch('chatbot.llm.AsyncOpenAI')
     def test_create_chat_conversation(self, mock_openai, client):
         """Test creating a new chat conversation"""
         # Arrange
-        mock_client = Mock()
+        mock_client = Mock(close=AsyncMock())
         mock_response = Mock()
         mock_response.choices = [Mock(message=Mock(content="Hello! How can I help?"))]
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         mock_openai.return_value = mock_client
 
         # Act
@@ -30,6 +31,42 @@ class TestChatEndpoints:
         assert "conversation_id" in data
         assert "message_id" in data
 
+        messages = client.get(f"/api/v1/conversations/{data['conversation_id']}/messages").json()
+        assert [m["role"] for m in messages] == ["system", "user", "assistant"]
+        assert messages[-1]["id"] == data["message_id"]
+
+    @patch('chatbot.llm.AsyncOpenAI')
+    def test_stream_chat_conversation(self, mock_openai, client):
+        """Test streaming a chat response as server-sent events"""
+        # Arrange
+        async def token_stream():
+            for token in ["Hello", "!", " How can I help?"]:
+                yield Mock(choices=[Mock(delta=Mock(content=token))])
+
+        mock_client = Mock(close=AsyncMock())
+        mock_client.chat.completions.create = AsyncMock(return_value=token_stream())
+        mock_openai.return_value = mock_client
+
+        # Act
+        response = client.post(
+            "/api/v1/chat/stream",
+            json={"message": "Hello"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        tokens = [event["content"] for event in events if event["type"] == "token"]
+        assert "".join(tokens) == "Hello! How can I help?"
+        assert events[-1]["type"] == "done"
+        assert "message_id" in events[-1]
+        assert "conversation_id" in events[-1]
+
     def test_list_conversations(self, client):
         """Test listing conversations"""
         # Act
@@ -37,7 +74,17 @@ class TestChatEndpoints:
 
         # Assert
         assert response.status_code == 200
-        assert isinstance(response.json(), list)
+        data = response.json()
+        assert isinstance(data["conversations"], list)
+        assert "next_cursor" in data
+
+    def test_list_conversations_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected"""
+        # Act
+        response = client.get("/api/v1/conversations", params={"cursor": "not-a-cursor"})
+
+        # Assert
+        assert response.status_code == 400
 
     def test_get_nonexistent_conversation(self, client):
         """Test getting messages from non-existent conversation"""
@@ -153,3 +200,18 @@ class TestHealthEndpoints:
         data = response.json()
         assert "message" in data
         assert "version" in data
+
+    def test_sessions_are_returned_to_the_pool(self, client):
+        """Test request-scoped sessions release their connections"""
+        # Act
+        for _ in range(20):
+            client.get("/api/v1/conversations")
+            client.get("/api/v1/conversations/99999/messages")
+        response = client.get("/api/v1/db/pool-stats")
+
+        # Assert
+        assert response.status_code == 200
+        stats = response.json()["async"]
+        assert stats["total_checkouts"] >= 40
+        if "checked_out" in stats:
+            assert stats["checked_out"] == 0
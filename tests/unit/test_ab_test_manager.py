@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import Mock, patch
+from src.chatbot.ab_test_manager import ABTestManager, ActiveTest
+from src.chatbot.db.models import ABTestAssignment
+from src.chatbot.config_schemas import ChatbotConfiguration
+
+
+class TestABTestManager:
+    """Test in-memory A/B variant resolution"""
+
+    def test_assign_variant_is_deterministic(self):
+        """Test the same user always lands in the same variant"""
+        # Arrange
+        test = ActiveTest(id=1, traffic_percentage=50, control_config_id=1, treatment_config_id=2)
+
+        # Act
+        variants = {ABTestManager.assign_variant("user-42", test) for _ in range(10)}
+
+        # Assert
+        assert len(variants) == 1
+
+    def test_assign_variant_respects_traffic_percentage(self):
+        """Test traffic extremes send everyone to one variant"""
+        # Arrange
+        all_control = ActiveTest(id=1, traffic_percentage=0, control_config_id=1, treatment_config_id=2)
+        all_treatment = ActiveTest(id=1, traffic_percentage=100, control_config_id=1, treatment_config_id=2)
+
+        # Act & Assert
+        assert ABTestManager.assign_variant("user-42", all_control) == "control"
+        assert ABTestManager.assign_variant("user-42", all_treatment) == "treatment"
+
+    @patch('src.chatbot.ab_test_manager.config_manager')
+    @patch('src.chatbot.ab_test_manager.db.get_session')
+    def test_get_config_for_user_without_write(self, mock_get_session, mock_config_manager):
+        """Test resolving a variant queues the assignment instead of committing it"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = (7, 100, 1, 2)
+        treatment = ChatbotConfiguration(name="Treatment")
+        mock_config_manager.get_configuration_model.return_value = treatment
+
+        manager = ABTestManager()
+        manager.cache_ttl = 60
+        manager.flush_interval = 60
+
+        # Act
+        first = manager.get_config_for_user("user-1")
+        second = manager.get_config_for_user("user-2")
+
+        # Assert
+        assert first is treatment and second is treatment
+        mock_config_manager.get_configuration_model.assert_called_with(2)
+        assert mock_get_session.call_count == 1
+        assert not mock_session.commit.called
+        assert len(manager._pending) == 2
+
+        manager._pending.clear()
+        manager.shutdown()
+
+    def test_flush_skips_existing_assignments(self, test_db, monkeypatch):
+        """Test the batched flush only inserts unseen assignments"""
+        # Arrange
+        monkeypatch.setattr("src.chatbot.ab_test_manager.db.get_session", lambda: iter([test_db]))
+        test_db.add(ABTestAssignment(user_identifier="user-1", test_id=7, variant="control"))
+        test_db.commit()
+
+        manager = ABTestManager()
+        manager._pending = {("user-1", 7): "control", ("user-2", 7): "treatment"}
+
+        # Act
+        written = manager.flush()
+
+        # Assert
+        assert written == 1
+        rows = test_db.query(ABTestAssignment.user_identifier, ABTestAssignment.variant).order_by(
+            ABTestAssignment.user_identifier
+        ).all()
+        assert rows == [("user-1", "control"), ("user-2", "treatment")]
+        assert manager._pending == {}
+
+    def test_failing_assignment_is_dropped_after_max_attempts(self, test_db, monkeypatch):
+        """Test a row that cannot be written stops being requeued and does not block the rest"""
+        # Arrange
+        monkeypatch.setattr("src.chatbot.ab_test_manager.db.get_session", lambda: iter([test_db]))
+
+        manager = ABTestManager()
+        manager.max_flush_attempts = 2
+        manager._pending = {("user-1", 7): "control", ("user-2", 7): None}
+
+        # Act
+        first = manager.flush()
+        requeued = dict(manager._pending)
+        second = manager.flush()
+
+        # Assert
+        assert first == 0
+        assert requeued == {("user-1", 7): "control", ("user-2", 7): None}
+        assert second == 1
+        assert manager._pending == {}
+        assert manager._attempts == {}
+        assert test_db.query(ABTestAssignment.user_identifier).all() == [("user-1",)]
+
+    @patch('src.chatbot.ab_test_manager.atexit.register')
+    def test_queued_assignments_are_flushed_at_exit(self, mock_register):
+        """Test the first queued assignment registers one exit-time flush"""
+        # Arrange
+        manager = ABTestManager()
+        manager.flush_interval = 60
+        manager.flush = Mock(return_value=2)
+
+        # Act
+        manager._record_assignment("user-1", 7, "control")
+        manager._record_assignment("user-2", 7, "treatment")
+        exit_handler = mock_register.call_args[0][0]
+        exit_handler()
+
+        # Assert
+        assert mock_register.call_count == 1
+        assert exit_handler == manager.shutdown
+        assert manager.flush.called
+        assert not manager._flusher.is_alive()
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.chatbot.db.models import Conversation, Message
+from src.chatbot.main import ChatBot
+
+
+def make_chatbot(session, tokens, delay=0.0):
+    conversation = Conversation(message_count=1)
+    session.add(conversation)
+    session.commit()
+
+    async def token_stream():
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield Mock(choices=[Mock(delta=Mock(content=token))])
+
+    chatbot = ChatBot.__new__(ChatBot)
+    chatbot.session = session
+    chatbot.conversation_id = conversation.id
+    chatbot.messages = [{"role": "system", "content": "prompt"}]
+    chatbot.config = Mock()
+    chatbot._prepare_turn = Mock(return_value=(None, None, []))
+    chatbot._completion_params = Mock(return_value={})
+    chatbot.async_client = Mock()
+    chatbot.async_client.chat.completions.create = AsyncMock(return_value=token_stream())
+    return chatbot
+
+
+def stored_messages(session, conversation_id):
+    return [
+        (message.role, message.content)
+        for message in session.query(Message).filter_by(conversation_id=conversation_id).order_by(Message.id)
+    ]
+
+
+class TestChatStream:
+    """Test persisting streamed turns"""
+
+    @pytest.mark.asyncio
+    async def test_closed_stream_keeps_question_and_partial_answer(self, test_db):
+        """Test a client disconnect still saves the turn with the text it was sent"""
+        # Arrange
+        chatbot = make_chatbot(test_db, ["Hello", "!", " How can I help?"])
+        stream = chatbot.astream("Hi there")
+
+        # Act
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        # Assert
+        assert first == {"type": "token", "content": "Hello"}
+        assert stored_messages(test_db, chatbot.conversation_id) == [("user", "Hi there"), ("assistant", "Hello")]
+        assert chatbot.messages[-2:] == [
+            {"role": "user", "content": "Hi there"},
+            {"role": "assistant", "content": "Hello"}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_stream_keeps_question(self, test_db):
+        """Test a stream cancelled before any token still saves the question"""
+        # Arrange
+        chatbot = make_chatbot(test_db, ["Hello"], delay=1.0)
+
+        async def consume():
+            async for _ in chatbot.astream("Hi there"):
+                pass
+
+        # Act
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # Assert
+        assert stored_messages(test_db, chatbot.conversation_id) == [("user", "Hi there")]
+        test_db.refresh(test_db.get(Conversation, chatbot.conversation_id))
+        assert test_db.get(Conversation, chatbot.conversation_id).message_count == 2
@@ -0,0 +1,80 @@
+import pytest
+from pydantic import ValidationError
+from src.chatbot.config_schemas import ChunkingSettings
+from src.chatbot.knowledge.chunking import Chunker, reassemble
+
+
+class TestChunker:
+    """Test splitting documents into overlapping chunks"""
+
+    def test_token_chunks_overlap_and_cover_document(self):
+        """Test token windows overlap and re-assemble to the original text"""
+        # Arrange
+        text = " ".join(f"t{i}" for i in range(50))
+        chunker = Chunker(ChunkingSettings(strategy="tokens", chunk_size=20, chunk_overlap=5))
+
+        # Act
+        chunks = chunker.split(text)
+
+        # Assert
+        assert [len(chunk.text.split()) for chunk in chunks] == [20, 20, 20]
+        assert chunks[0].text.split()[-5:] == chunks[1].text.split()[:5]
+        assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+        assert reassemble(chunks) == text
+
+    def test_sentence_chunks_keep_sentences_whole(self):
+        """Test sentence chunks never cut a sentence and carry overlap"""
+        # Arrange
+        sentences = [" ".join(["word"] * 8) + f" end{i}." for i in range(6)]
+        text = " ".join(sentences)
+        chunker = Chunker(ChunkingSettings(strategy="sentences", chunk_size=20, chunk_overlap=10))
+
+        # Act
+        chunks = chunker.split(text)
+
+        # Assert
+        assert [chunk.text for chunk in chunks] == [
+            " ".join(sentences[0:2]),
+            " ".join(sentences[1:3]),
+            " ".join(sentences[2:4]),
+            " ".join(sentences[3:5]),
+            " ".join(sentences[4:6])
+        ]
+        assert reassemble(chunks) == text
+
+    def test_long_sentence_falls_back_to_token_windows(self):
+        """Test no sentence chunk exceeds chunk_size, even for a run-on sentence"""
+        # Arrange
+        long_sentence = " ".join(f"w{i}" for i in range(45)) + "."
+        short = ["First short sentence here.", "Second one is short too.", "And a third."]
+        text = " ".join([short[0], long_sentence, short[1], short[2]])
+        chunker = Chunker(ChunkingSettings(strategy="sentences", chunk_size=20, chunk_overlap=6))
+
+        # Act
+        chunks = chunker.split(text)
+
+        # Assert
+        assert max(len(chunk.text.split()) for chunk in chunks) <= 20
+        assert chunks[0].text == short[0]
+        assert chunks[1].text.startswith("w0 ")
+        assert chunks[-1].text == " ".join(short[1:])
+        assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+        assert reassemble(chunks) == text
+
+    def test_short_document_is_one_chunk(self):
+        """Test documents below the chunk size are not split"""
+        # Arrange
+        chunker = Chunker(ChunkingSettings(chunk_size=64, chunk_overlap=8))
+
+        # Act
+        chunks = chunker.split("A short note.")
+
+        # Assert
+        assert len(chunks) == 1
+        assert chunks[0].text == "A short note."
+
+    def test_overlap_must_be_smaller_than_chunk_size(self):
+        """Test invalid overlap is rejected"""
+        # Act & Assert
+        with pytest.raises(ValidationError):
+            ChunkingSettings(chunk_size=32, chunk_overlap=32)
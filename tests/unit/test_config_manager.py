@@ -94,3 +94,50 @@ class TestConfigurationManager:
         assert mock_config.is_active is True
         assert mock_session.commit.called
         assert result["activated"] is True
+
+    @patch('src.chatbot.config_manager.db.get_session')
+    def test_active_configuration_cached_between_checks(self, mock_get_session):
+        """Test the active configuration is served from cache within the TTL"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+
+        mock_config = Mock(id=1, version=1)
+        mock_config.config_json = {"name": "Cached Config"}
+        mock_session.query.return_value.filter_by.return_value.first.return_value = mock_config
+
+        config_manager = ConfigurationManager()
+        config_manager.cache_ttl = 60
+
+        # Act
+        first = config_manager.get_active_configuration()
+        second = config_manager.get_active_configuration()
+
+        # Assert
+        assert first is second
+        assert mock_get_session.call_count == 1
+
+    @patch('src.chatbot.config_manager.db.get_session')
+    def test_active_configuration_reparsed_on_version_change(self, mock_get_session):
+        """Test a version bump invalidates the parsed configuration"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+
+        mock_config = Mock(id=1, version=1)
+        mock_config.config_json = {"name": "Version One"}
+        mock_session.query.return_value.filter_by.return_value.first.return_value = mock_config
+
+        config_manager = ConfigurationManager()
+        config_manager.cache_ttl = 0
+
+        # Act
+        first = config_manager.get_active_configuration()
+        unchanged = config_manager.get_active_configuration()
+        mock_config.version = 2
+        mock_config.config_json = {"name": "Version Two"}
+        updated = config_manager.get_active_configuration()
+
+        # Assert
+        assert first is unchanged
+        assert updated.name == "Version Two"
@@ -0,0 +1,122 @@
+import pytest
+from src.chatbot.context_builder import ContextBuilder, count_message_tokens
+from src.chatbot.config_schemas import ContextSettings
+
+
+def make_history(turns: int, content: str = "x" * 400) -> list:
+    history = [{"role": "system", "content": "You are helpful."}]
+    for i in range(turns):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} {content}"})
+    return history
+
+
+class TestContextBuilder:
+    """Test token-budgeted assembly of the LLM payload"""
+
+    def test_user_turn_sent_once(self):
+        """Test the current user message appears exactly once at the end"""
+        # Arrange
+        builder = ContextBuilder(ContextSettings(), max_tokens=500)
+
+        # Act
+        messages = builder.build(make_history(2), "What now?")
+
+        # Assert
+        assert messages[0]["role"] == "system"
+        assert messages[-1] == {"role": "user", "content": "What now?"}
+        assert sum(1 for m in messages if m["content"] == "What now?") == 1
+
+    def test_drop_oldest_keeps_payload_within_window(self):
+        """Test old turns are dropped once the window is full"""
+        # Arrange
+        settings = ContextSettings(context_window=1024)
+        builder = ContextBuilder(settings, max_tokens=500)
+        history = make_history(40)
+
+        # Act
+        messages = builder.build(history, "Latest question")
+
+        # Assert
+        used = sum(count_message_tokens(m) for m in messages)
+        assert used <= settings.context_window - 500
+        assert messages[0] == history[0]
+        assert messages[-2] == history[-1]
+        assert len(messages) < len(history) + 1
+
+    def test_truncate_oldest_trims_boundary_message(self):
+        """Test the oldest kept question is truncated instead of dropped"""
+        # Arrange
+        settings = ContextSettings(context_window=1024, history_policy="truncate_oldest")
+        builder = ContextBuilder(settings, max_tokens=500)
+        history = make_history(40)
+        for message in history[2::2]:
+            message["content"] = "ok"
+
+        # Act
+        messages = builder.build(history, "Latest question")
+
+        # Assert
+        oldest_kept = messages[1]
+        assert oldest_kept["role"] == "user"
+        assert oldest_kept["content"] not in [m["content"] for m in history]
+        assert history[-1]["content"] == messages[-2]["content"]
+
+    def test_max_history_messages_limit(self):
+        """Test the configured message cap is applied"""
+        # Arrange
+        builder = ContextBuilder(ContextSettings(max_history_messages=2), max_tokens=500)
+        history = make_history(6, content="short")
+
+        # Act
+        messages = builder.build(history, "Hi")
+
+        # Assert
+        assert messages[1:-1] == history[-2:]
+
+    def test_history_is_trimmed_at_turn_boundaries(self):
+        """Test a question too long for the window is dropped with its answer"""
+        # Arrange
+        settings = ContextSettings(context_window=1024)
+        builder = ContextBuilder(settings, max_tokens=500)
+        history = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "u1 " + "x " * 2000},
+            {"role": "assistant", "content": "a1"},
+            {"role": "user", "content": "u2"},
+            {"role": "assistant", "content": "a2"}
+        ]
+
+        # Act
+        messages = builder.build(history, "u3")
+
+        # Assert
+        assert [m["content"] for m in messages] == ["You are helpful.", "u2", "a2", "u3"]
+
+    def test_max_history_messages_keeps_whole_turns(self):
+        """Test an odd message cap does not split a question from its answer"""
+        # Arrange
+        builder = ContextBuilder(ContextSettings(max_history_messages=3), max_tokens=500)
+        history = make_history(6, content="short")
+
+        # Act
+        messages = builder.build(history, "Hi")
+
+        # Assert
+        assert messages[1:-1] == history[-2:]
+        assert messages[1]["role"] == "user"
+
+    def test_knowledge_context_drops_weakest_documents(self):
+        """Test retrieved documents are trimmed to the context token cap"""
+        # Arrange
+        settings = ContextSettings(max_context_tokens=60)
+        builder = ContextBuilder(settings, max_tokens=500)
+        documents = ["best " * 20, "second " * 20, "third " * 20]
+
+        # Act
+        messages = builder.build(make_history(0), "Hi", documents, "Context:\n{context}")
+
+        # Assert
+        context = messages[-2]
+        assert context["role"] == "system"
+        assert "best" in context["content"]
+        assert "third" not in context["content"]
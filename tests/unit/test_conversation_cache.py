@@ -0,0 +1,69 @@
+import pytest
+from src.chatbot.conversation_cache import ConversationCache, MESSAGE_OVERHEAD_BYTES
+
+
+def make_message(content: str, role: str = "user") -> dict:
+    return {"role": role, "content": content}
+
+
+class TestConversationCache:
+    """Test the bounded conversation history cache"""
+
+    def test_get_returns_copy_of_history(self):
+        """Test cached histories cannot be mutated by callers"""
+        # Arrange
+        cache = ConversationCache(max_bytes=10_000)
+        cache.put(1, [make_message("You are helpful", "system")])
+
+        # Act
+        history = cache.get(1)
+        history.append(make_message("Not persisted"))
+
+        # Assert
+        assert len(cache.get(1)) == 1
+        assert cache.stats()["hits"] == 2
+
+    def test_append_writes_through_cached_conversation(self):
+        """Test appended messages are visible on the next lookup"""
+        # Arrange
+        cache = ConversationCache(max_bytes=10_000)
+        cache.put(1, [make_message("You are helpful", "system")])
+
+        # Act
+        cache.append(1, make_message("Hello"))
+        cache.append(2, make_message("Uncached conversation"))
+
+        # Assert
+        assert cache.get(1)[-1]["content"] == "Hello"
+        assert cache.get(2) is None
+
+    def test_evicts_least_recently_used_by_size(self):
+        """Test entries are evicted once the memory budget is exceeded"""
+        # Arrange
+        entry_size = len("user") + 100 + MESSAGE_OVERHEAD_BYTES
+        cache = ConversationCache(max_bytes=entry_size * 2)
+        cache.put(1, [make_message("a" * 100)])
+        cache.put(2, [make_message("b" * 100)])
+
+        # Act
+        cache.get(1)
+        cache.put(3, [make_message("c" * 100)])
+
+        # Assert
+        assert cache.get(2) is None
+        assert cache.get(1) is not None
+        assert cache.get(3) is not None
+        assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+    def test_invalidate_removes_entry(self):
+        """Test invalidating a deleted conversation"""
+        # Arrange
+        cache = ConversationCache(max_bytes=10_000)
+        cache.put(1, [make_message("Hello")])
+
+        # Act
+        cache.invalidate(1)
+
+        # Assert
+        assert cache.get(1) is None
+        assert cache.stats()["size_bytes"] == 0
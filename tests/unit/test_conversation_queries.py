@@ -0,0 +1,138 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.chatbot.db.models import Conversation, Message
+from src.chatbot.db.queries import (
+    list_conversations_page, encode_cursor, decode_cursor, backfill_conversation_counters
+)
+from src.chatbot.main import ChatBot
+
+
+def add_conversations(session, count, same_timestamp=False):
+    base = datetime(2025, 1, 1)
+    conversations = []
+    for i in range(count):
+        updated_at = base if same_timestamp else base + timedelta(minutes=i)
+        conversation = Conversation(
+            title=f"Conversation {i}",
+            created_at=base,
+            updated_at=updated_at,
+            message_count=i % 3
+        )
+        conversation.messages = [
+            Message(role="user", content=f"m{j}", created_at=base + timedelta(minutes=i, seconds=j))
+            for j in range(i % 3)
+        ]
+        conversations.append(conversation)
+    session.add_all(conversations)
+    session.commit()
+    return conversations
+
+
+class TestConversationPagination:
+    """Test keyset-paginated conversation listing"""
+
+    def test_pages_cover_every_conversation_once(self, test_db):
+        """Test walking all pages returns each conversation exactly once, newest first"""
+        # Arrange
+        conversations = add_conversations(test_db, 7)
+
+        # Act
+        seen, cursor = [], None
+        while True:
+            page, cursor = list_conversations_page(test_db, limit=3, cursor=cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        # Assert
+        assert [row.id for row in seen] == [c.id for c in reversed(conversations)]
+        assert {row.id: row.message_count for row in seen} == {c.id: len(c.messages) for c in conversations}
+
+    def test_ties_on_updated_at_are_broken_by_id(self, test_db):
+        """Test conversations sharing a timestamp are neither skipped nor repeated"""
+        # Arrange
+        add_conversations(test_db, 5, same_timestamp=True)
+
+        # Act
+        first, cursor = list_conversations_page(test_db, limit=2)
+        second, cursor = list_conversations_page(test_db, limit=2, cursor=cursor)
+        third, cursor = list_conversations_page(test_db, limit=2, cursor=cursor)
+
+        # Assert
+        ids = [row.id for row in first + second + third]
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 5
+        assert cursor is None
+
+    def test_page_is_a_single_query(self, test_db):
+        """Test message counts come from the conversation row, not a second query"""
+        # Arrange
+        add_conversations(test_db, 10)
+        statements = []
+        event.listen(test_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        # Act
+        page, _ = list_conversations_page(test_db, limit=5)
+
+        # Assert
+        assert len(page) == 5
+        assert len(statements) == 1
+
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        """Test cursors decode to the position they encode and reject garbage"""
+        # Arrange
+        updated_at = datetime(2025, 1, 1, 12, 30, 15, 123456)
+
+        # Act / Assert
+        assert decode_cursor(encode_cursor(updated_at, 42)) == (updated_at, 42)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+
+class TestConversationCounters:
+    """Test the denormalized message_count and last_message_at columns"""
+
+    def test_backfill_recomputes_counters(self, test_db):
+        """Test backfill matches the messages table without reordering the listing"""
+        # Arrange
+        conversations = add_conversations(test_db, 5)
+        for conversation in conversations:
+            conversation.message_count = 0
+        test_db.commit()
+        before = [row.id for row in list_conversations_page(test_db)[0]]
+
+        # Act
+        updated = backfill_conversation_counters(test_db, batch_size=2)
+
+        # Assert
+        rows = list_conversations_page(test_db)[0]
+        assert updated == 5
+        assert [row.id for row in rows] == before
+        for row, conversation in zip(rows, reversed(conversations)):
+            assert row.message_count == len(conversation.messages)
+            expected = max((m.created_at for m in conversation.messages), default=None)
+            assert row.last_message_at == expected
+
+    def test_persisted_turn_updates_counters(self, test_db):
+        """Test a turn bumps the counters and updated_at in the same commit"""
+        # Arrange
+        conversation = Conversation(updated_at=datetime(2025, 1, 1), message_count=1)
+        test_db.add(conversation)
+        test_db.commit()
+
+        chatbot = ChatBot.__new__(ChatBot)
+        chatbot.session = test_db
+        chatbot.conversation_id = conversation.id
+        chatbot.messages = [{"role": "system", "content": "prompt"}]
+
+        # Act
+        chatbot._persist_turn("Hello there", "Hi!")
+        chatbot._persist_turn("Still there?", None)
+
+        # Assert
+        test_db.refresh(conversation)
+        assert conversation.message_count == 4
+        assert conversation.title == "Hello there"
+        assert conversation.updated_at > datetime(2025, 1, 1)
+        assert conversation.last_message_at == conversation.updated_at
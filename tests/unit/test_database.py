@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import select, text
+from src.chatbot.db.database import Database, async_database_url
+from src.chatbot.db.models import Conversation
+
+
+class TestDatabasePool:
+    """Test engine pool configuration and metrics"""
+
+    def test_pool_settings_come_from_environment(self, tmp_path, monkeypatch):
+        """Test the DB_POOL_* variables configure the engine's pool"""
+        # Arrange
+        monkeypatch.setenv("DB_POOL_SIZE", "3")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+        # Act
+        database = Database(f"sqlite:///{tmp_path / 'pool.db'}")
+
+        # Assert
+        stats = database.pool_stats()["sync"]
+        assert stats["pool_size"] == 3
+        assert stats["max_overflow"] == 2
+        assert database.engine.pool._pre_ping is False
+
+    def test_pool_stats_track_checkouts(self, tmp_path):
+        """Test checked-out connections are counted while sessions are open"""
+        # Arrange
+        database = Database(f"sqlite:///{tmp_path / 'pool.db'}")
+        sessions = [database.get_session() for _ in range(3)]
+
+        # Act
+        for session_gen in sessions:
+            next(session_gen).connection()
+        during = database.pool_stats()["sync"]
+        for session_gen in sessions:
+            session_gen.close()
+        after = database.pool_stats()["sync"]
+
+        # Assert
+        assert during["checked_out"] == 3
+        assert during["peak_checked_out"] == 3
+        assert after["checked_out"] == 0
+        assert after["total_checkouts"] == 3
+
+    def test_in_memory_database_keeps_default_pool(self):
+        """Test an in-memory SQLite URL is not given pool sizing options"""
+        # Act
+        database = Database("sqlite:///:memory:")
+
+        # Assert
+        assert "pool_size" not in database.pool_stats()["sync"]
+
+
+class TestAsyncEngine:
+    """Test the async engine used by the API"""
+
+    def test_async_database_url_picks_async_driver(self):
+        """Test sync URLs are mapped to their async drivers"""
+        # Act / Assert
+        assert async_database_url("sqlite:////tmp/app.db") == "sqlite+aiosqlite:////tmp/app.db"
+        assert async_database_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+        assert async_database_url("postgresql+psycopg2://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+        assert async_database_url("postgresql+asyncpg://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+
+    @pytest.mark.asyncio
+    async def test_async_session_shares_the_database(self, tmp_path):
+        """Test rows written on the sync engine are read through the async one"""
+        # Arrange
+        database = Database(f"sqlite:///{tmp_path / 'async.db'}")
+        database.migrate()
+        session_gen = database.get_session()
+        session = next(session_gen)
+        session.execute(text("INSERT INTO conversations (title, message_count, created_at, updated_at) "
+                             "VALUES ('hello', 0, '2025-01-01', '2025-01-01')"))
+        session.commit()
+        session_gen.close()
+        assert "async" not in database.pool_stats()
+
+        # Act
+        async with database.async_session_factory() as async_session:
+            title = await async_session.scalar(select(Conversation.title))
+        await database.dispose_async_engine()
+
+        # Assert
+        assert title == "hello"
+        assert database.pool_stats()["async"]["total_checkouts"] == 1
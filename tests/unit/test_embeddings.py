@@ -0,0 +1,128 @@
+import pytest
+import numpy as np
+from unittest.mock import Mock
+from src.chatbot.config_schemas import EmbeddingSettings
+from src.chatbot.knowledge.embeddings import Embedder, EmbeddingCache, content_hash, get_embedding_cache
+
+
+def make_backend(batch_size: int = 2) -> Mock:
+    backend = Mock(settings=EmbeddingSettings(batch_size=batch_size))
+    backend.embed.side_effect = lambda texts: [np.full(3, len(text), dtype=np.float32) for text in texts]
+    return backend
+
+
+class TestEmbeddingCache:
+    """Test the memory-mapped embedding cache"""
+
+    def test_vectors_survive_reopening(self, tmp_path):
+        """Test cached vectors are read back by a new cache instance"""
+        # Arrange
+        cache = EmbeddingCache(str(tmp_path))
+        cache.put_many({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+        cache.put_many({"c": [5.0, 6.0]})
+
+        # Act
+        reopened = EmbeddingCache(str(tmp_path))
+        found = reopened.get_many(["a", "c", "missing"])
+
+        # Assert
+        assert len(reopened) == 3
+        assert found["a"].tolist() == [1.0, 2.0]
+        assert found["c"].tolist() == [5.0, 6.0]
+        assert "missing" not in found
+
+    def test_dimension_mismatch_is_rejected(self, tmp_path):
+        """Test vectors of another model cannot be mixed into a cache"""
+        # Arrange
+        cache = EmbeddingCache(str(tmp_path))
+        cache.put_many({"a": [1.0, 2.0]})
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            cache.put_many({"b": [1.0, 2.0, 3.0]})
+
+    def test_instances_sharing_a_directory_do_not_overwrite_rows(self, tmp_path):
+        """Test two writers on one directory each keep their own vectors"""
+        # Arrange
+        first = EmbeddingCache(str(tmp_path))
+        second = EmbeddingCache(str(tmp_path))
+        first.put_many({"ka": [1.0, 1.0]})
+        second.get_many(["ka"])
+
+        # Act
+        first.put_many({"kb": [2.0, 2.0]})
+        second.put_many({"kc": [3.0, 3.0]})
+
+        # Assert
+        for cache in (first, second, EmbeddingCache(str(tmp_path))):
+            found = cache.get_many(["ka", "kb", "kc"])
+            assert {key: vector.tolist() for key, vector in found.items()} == {
+                "ka": [1.0, 1.0], "kb": [2.0, 2.0], "kc": [3.0, 3.0]
+            }
+
+    def test_orphaned_vectors_are_cut_off(self, tmp_path):
+        """Test vectors written without their key by a crashed writer are not misnumbered"""
+        # Arrange
+        cache = EmbeddingCache(str(tmp_path))
+        cache.put_many({"a": [1.0, 1.0]})
+        with open(tmp_path / "vectors.f32", "ab") as f:
+            f.write(np.asarray([[9.0, 9.0]], dtype=np.float32).tobytes())
+
+        # Act
+        cache.put_many({"b": [2.0, 2.0]})
+
+        # Assert
+        assert EmbeddingCache(str(tmp_path)).get_many(["b"])["b"].tolist() == [2.0, 2.0]
+
+    def test_one_instance_per_directory(self, tmp_path):
+        """Test embedders built for the same model directory share one cache"""
+        # Act & Assert
+        assert get_embedding_cache(str(tmp_path)) is get_embedding_cache(str(tmp_path / "."))
+
+
+class TestEmbedder:
+    """Test batched embedding with cache reuse"""
+
+    def test_only_cache_misses_are_embedded_in_batches(self, tmp_path):
+        """Test cached texts skip the backend and misses are batched"""
+        # Arrange
+        backend = make_backend(batch_size=2)
+        cache = EmbeddingCache(str(tmp_path))
+        cache.put_many({content_hash("cached"): np.zeros(3)})
+        embedder = Embedder(backend, cache)
+
+        # Act
+        vectors = embedder(["one", "cached", "three", "four4", "one"])
+
+        # Assert
+        assert [call.args[0] for call in backend.embed.call_args_list] == [["one", "three"], ["four4"]]
+        assert [float(vector[0]) for vector in vectors] == [3.0, 0.0, 5.0, 5.0, 3.0]
+        assert len(cache) == 4
+
+    def test_rebuild_reuses_cached_vectors(self, tmp_path):
+        """Test a second embedder over the same cache computes nothing"""
+        # Arrange
+        Embedder(make_backend(), EmbeddingCache(str(tmp_path)))(["alpha", "beta"])
+        backend = make_backend()
+
+        # Act
+        vectors = Embedder(backend, EmbeddingCache(str(tmp_path)))(["beta", "alpha"])
+
+        # Assert
+        assert not backend.embed.called
+        assert [float(vector[0]) for vector in vectors] == [4.0, 5.0]
+
+    def test_unpersisted_texts_are_not_written(self, tmp_path):
+        """Test query embeddings read the cache but never grow it"""
+        # Arrange
+        cache = EmbeddingCache(str(tmp_path))
+        Embedder(make_backend(), cache)(["document"])
+        backend = make_backend()
+
+        # Act
+        vectors = Embedder(backend, cache)(["document", "one-off query"], persist=False)
+
+        # Assert
+        assert backend.embed.call_args.args[0] == ["one-off query"]
+        assert [float(vector[0]) for vector in vectors] == [8.0, 13.0]
+        assert len(cache) == 1
@@ -0,0 +1,59 @@
+import json
+import pytest
+from src.chatbot.knowledge.ingest import batched, iter_documents
+
+
+class TestIngestReaders:
+    """Test lazy document readers used by bulk ingestion"""
+
+    def test_batched_yields_fixed_size_batches(self):
+        """Test the last batch holds the remainder"""
+        # Act
+        batches = list(batched(iter(range(5)), 2))
+
+        # Assert
+        assert batches == [[0, 1], [2, 3], [4]]
+
+    def test_jsonl_accepts_strings_and_objects(self, tmp_path):
+        """Test JSONL lines may be plain strings or text/metadata objects"""
+        # Arrange
+        path = tmp_path / "docs.jsonl"
+        path.write_text("\n".join([
+            json.dumps("First document"),
+            "",
+            json.dumps({"text": "Second document", "metadata": {"lang": "en"}})
+        ]))
+
+        # Act
+        documents = list(iter_documents(str(path)))
+
+        # Assert
+        assert documents == [
+            ("First document", None),
+            ("Second document", {"lang": "en"})
+        ]
+
+    def test_jsonl_rejects_records_without_text(self, tmp_path):
+        """Test malformed records report their line number"""
+        # Arrange
+        path = tmp_path / "docs.jsonl"
+        path.write_text(json.dumps({"body": "No text field"}))
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="docs.jsonl:1"):
+            list(iter_documents(str(path)))
+
+    def test_directory_yields_one_document_per_file(self, tmp_path):
+        """Test each file in a directory becomes one document"""
+        # Arrange
+        (tmp_path / "a.txt").write_text("Manual A")
+        (tmp_path / "b.txt").write_text("Manual B")
+
+        # Act
+        documents = list(iter_documents(str(tmp_path)))
+
+        # Assert
+        assert documents == [
+            ("Manual A", {"path": "a.txt"}),
+            ("Manual B", {"path": "b.txt"})
+        ]
@@ -0,0 +1,572 @@
+import time
+import pytest
+from unittest.mock import Mock, patch
+from src.chatbot.knowledge.manager import KnowledgeManager
+from src.chatbot.knowledge.lexical import BM25Index
+from src.chatbot.knowledge.embeddings import Embedder
+from src.chatbot.config_schemas import ChunkingSettings
+
+
+def make_source(
+        source_id: int,
+        collection_name: str,
+        document_count: int = 10,
+        storage_layout: str = "per_source",
+        chunking: dict = None,
+        embedding: dict = None
+) -> Mock:
+    source = Mock(
+        id=source_id,
+        collection_name=collection_name,
+        document_count=document_count,
+        storage_layout=storage_layout,
+        chunking=chunking,
+        embedding=embedding
+    )
+    source.name = collection_name
+    return source
+
+
+def make_collection(hits, delay: float = 0.0) -> Mock:
+    def query(**kwargs):
+        time.sleep(delay)
+        return {
+            "documents": [[doc for doc, _ in hits]],
+            "distances": [[distance for _, distance in hits]],
+            "metadatas": [[{"doc": doc} for doc, _ in hits]]
+        }
+
+    collection = Mock()
+    collection.query.side_effect = query
+    return collection
+
+
+class TestKnowledgeManagerSearch:
+    """Test fan-out search across knowledge sources"""
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_search_merges_top_results_across_sources(self, mock_get_session, mock_client_cls):
+        """Test hits from every source are merged by distance"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [
+            make_source(1, "ks_a"), make_source(2, "ks_b")
+        ]
+        collections = {
+            "ks_a": make_collection([("a1", 0.1), ("a2", 0.5)]),
+            "ks_b": make_collection([("b1", 0.2), ("b2", 0.3)])
+        }
+        mock_client_cls.return_value.get_collection.side_effect = collections.get
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+
+        # Act
+        results = manager.search("query", n_results=3)
+
+        # Assert
+        assert [doc for doc, _, _ in results] == ["a1", "b1", "b2"]
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_slow_source_is_skipped_after_timeout(self, mock_get_session, mock_client_cls):
+        """Test one slow collection does not stall the search"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [
+            make_source(1, "ks_fast"), make_source(2, "ks_slow")
+        ]
+        collections = {
+            "ks_fast": make_collection([("fast", 0.4)]),
+            "ks_slow": make_collection([("slow", 0.1)], delay=1.0)
+        }
+        mock_client_cls.return_value.get_collection.side_effect = collections.get
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+        manager.search_timeout = 0.2
+
+        # Act
+        started = time.monotonic()
+        results = manager.search("query", n_results=3)
+        elapsed = time.monotonic() - started
+
+        # Assert
+        assert [doc for doc, _, _ in results] == ["fast"]
+        assert elapsed < 1.0
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_single_slow_source_times_out_and_is_not_queued_again(self, mock_get_session, mock_client_cls):
+        """Test the timeout applies to one source and a hung query holds one worker"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [make_source(1, "ks_slow")]
+        collection = make_collection([("slow", 0.1)])
+        query = collection.query.side_effect
+
+        def hang_once(**kwargs):
+            if collection.query.call_count == 1:
+                time.sleep(0.5)
+            return query(**kwargs)
+
+        collection.query.side_effect = hang_once
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+        manager.search_timeout = 0.1
+
+        # Act
+        started = time.monotonic()
+        first = manager.search("query", n_results=1)
+        second = manager.search("other query", n_results=1)
+        elapsed = time.monotonic() - started
+        time.sleep(0.5)
+        third = manager.search("query", n_results=1)
+
+        # Assert
+        assert first == second == []
+        assert elapsed < 0.4
+        assert [doc for doc, _, _ in third] == ["slow"]
+        assert collection.query.call_count == 2
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_shared_layout_sources_use_one_filtered_query(self, mock_get_session, mock_client_cls):
+        """Test shared-layout sources are searched with a single where filter"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [
+            make_source(1, "ks_a", storage_layout="shared"),
+            make_source(2, "ks_b", storage_layout="shared")
+        ]
+        shared_collection = make_collection([("a1", 0.1), ("b1", 0.2)])
+        mock_client_cls.return_value.get_or_create_collection.return_value = shared_collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+
+        # Act
+        results = manager.search("query", n_results=2)
+
+        # Assert
+        assert [doc for doc, _, _ in results] == ["a1", "b1"]
+        assert shared_collection.query.call_count == 1
+        assert shared_collection.query.call_args.kwargs["where"] == {
+            "knowledge_source_id": {"$in": [1, 2]}
+        }
+        assert not mock_client_cls.return_value.get_collection.called
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_query_embedded_once_for_all_collections(self, mock_get_session, mock_client_cls):
+        """Test one query vector is reused across collections and searches"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [
+            make_source(1, "ks_a"), make_source(2, "ks_b"), make_source(3, "ks_c")
+        ]
+        collections = {
+            name: make_collection([(name, 0.1)])
+            for name in ["ks_a", "ks_b", "ks_c"]
+        }
+        mock_client_cls.return_value.get_collection.side_effect = collections.get
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+
+        # Act
+        manager.search("query", n_results=3)
+        manager.search_cache.clear()
+        manager.search("query", n_results=3)
+
+        # Assert
+        assert manager.embedding_function.call_count == 1
+        for collection in collections.values():
+            assert collection.query.call_args.kwargs["query_embeddings"] == [[0.1, 0.2]]
+            assert "query_texts" not in collection.query.call_args.kwargs
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_hybrid_search_fuses_keyword_hits(self, mock_get_session, mock_client_cls):
+        """Test a keyword-only hit is fused into the vector results"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        source = make_source(1, "ks_a")
+        source.version = 1
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [source]
+        collection = make_collection([("printer manual", 0.2), ("tray guide", 0.3)])
+        collection.get.return_value = {
+            "ids": ["doc_err"],
+            "documents": ["ERR-4012 means the tray is empty"],
+            "metadatas": [{"knowledge_source_id": 1}],
+            "embeddings": [[1.1, 0.2]]
+        }
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+        index = BM25Index()
+        index.add("doc_err", "ERR-4012 means the tray is empty")
+        index.add("doc_other", "printer manual")
+        manager._lexical_indexes[1] = index
+        manager._lexical_versions[1] = 1
+
+        # Act
+        results = manager.search("ERR-4012", n_results=2, hybrid=True)
+
+        # Assert
+        assert [doc for doc, _, _ in results] == ["printer manual", "ERR-4012 means the tray is empty"]
+        assert results[1][1] == pytest.approx(1.0)
+        assert results[1][2]["retrieval"] == "lexical"
+        assert results[0][2]["retrieval"] == "vector"
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_lexical_index_follows_source_version(self, mock_get_session, mock_client_cls):
+        """Test own writes keep the index current and foreign writes trigger a rebuild"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        source = make_source(1, "ks_a")
+        source.version = 1
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [source]
+        collection = Mock()
+        collection.get.side_effect = lambda **kwargs: (
+            {"ids": ["doc_new"], "documents": ["ERR-5000 means a paper jam"]} if kwargs["offset"] == 0
+            else {"ids": [], "documents": []}
+        )
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        stale = BM25Index()
+        stale.add("doc_err", "ERR-4012 means the tray is empty")
+        manager._lexical_indexes[1] = stale
+        manager._lexical_versions[1] = 1
+
+        # Act: a write from this process
+        source.version = 2
+        manager.registry.refresh()
+        manager._update_lexical_index(1, added=[("doc_own", "ERR-4500 means low toner")])
+        own_write = manager._lexical_index(source)
+
+        # Act: a write from another process
+        source.version = 3
+        manager.registry.refresh()
+        served_while_building = manager._lexical_index(source)
+        deadline = time.monotonic() + 2
+        while not manager._lexical_current(source) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        rebuilt = manager._lexical_index(source)
+
+        # Assert
+        assert own_write is stale
+        assert [doc for doc, _ in own_write.search("ERR-4500", 1)] == ["doc_own"]
+        assert served_while_building is stale
+        assert rebuilt is not stale
+        assert [doc for doc, _ in rebuilt.search("ERR-5000", 1)] == ["doc_new"]
+        assert "doc_err" not in [doc for doc, _ in rebuilt.search("ERR-4012", 5)]
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_repeated_search_is_cached_until_source_version_changes(self, mock_get_session, mock_client_cls):
+        """Test cached results are served until an ingest bumps the source version"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        source = make_source(1, "ks_a")
+        source.version = 1
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [source]
+        collection = make_collection([("a1", 0.1)])
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(return_value=[[0.1, 0.2]])
+
+        # Act
+        first = manager.search("What is A?", n_results=1)
+        second = manager.search("  what is a ", n_results=1)
+        source.version = 2
+        manager.registry.refresh()
+        third = manager.search("what is a", n_results=1)
+
+        # Assert
+        assert first == second == third
+        assert collection.query.call_count == 2
+        assert manager.search_cache.stats()["hits"] == 1
+        assert manager.search_cache.stats()["stale"] == 1
+
+
+class TestKnowledgeManagerIngest:
+    """Test the streaming ingestion pipeline"""
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_ingest_embeds_and_writes_in_batches(self, mock_get_session, mock_client_cls):
+        """Test documents are embedded and inserted batch by batch"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(1, "ks_a", 0)
+        collection = Mock()
+        collection.get.return_value = {"ids": []}
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+        progress = Mock()
+
+        documents = ((f"doc {i}", None) for i in range(5))
+
+        # Act
+        count = manager.ingest(1, documents, batch_size=2, progress=progress)
+
+        # Assert
+        assert count == 5
+        assert collection.upsert.call_count == 3
+        assert [len(c.kwargs["ids"]) for c in collection.upsert.call_args_list] == [2, 2, 1]
+        assert all(c.kwargs["embeddings"] for c in collection.upsert.call_args_list)
+        assert progress.call_args[0][0].documents == 5
+        assert mock_session.commit.call_count == 3
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_failed_write_stops_reading_and_embedding(self, mock_get_session, mock_client_cls):
+        """Test a write error ends the ingest without embedding the rest of the input"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(1, "ks_a", 0)
+        collection = Mock()
+        collection.get.return_value = {"ids": []}
+        collection.upsert.side_effect = RuntimeError("disk full")
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.ingest_queue_depth = 1
+        manager.embedding_function = Mock(side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+
+        documents = ((f"doc {i}", None) for i in range(1000))
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            manager.ingest(1, documents, batch_size=2)
+        # The failed batch, one queued behind it and one in flight at most
+        assert manager.embedding_function.call_count <= 3
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_ingest_splits_documents_into_chunks(self, mock_get_session, mock_client_cls):
+        """Test chunked sources store one vector per chunk with parent metadata"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(
+            1, "ks_a", 0, chunking={"strategy": "tokens", "chunk_size": 16, "chunk_overlap": 4}
+        )
+        collection = Mock()
+        collection.get.return_value = {"ids": []}
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+
+        document = " ".join(f"word{i}" for i in range(40))
+        doc_id = KnowledgeManager.document_id("", document)
+
+        # Act
+        count = manager.ingest(1, [(document, None)], batch_size=100)
+
+        # Assert
+        assert count == 1
+        add = collection.upsert.call_args.kwargs
+        assert add["ids"] == [f"{doc_id}_chunk_{i}" for i in range(3)]
+        assert [m["parent_id"] for m in add["metadatas"]] == [doc_id] * 3
+        assert [m["chunk_index"] for m in add["metadatas"]] == [0, 1, 2]
+        for text, metadata in zip(add["documents"], add["metadatas"]):
+            assert document[metadata["start_offset"]:metadata["end_offset"]] == text
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_reingest_skips_stored_documents(self, mock_get_session, mock_client_cls):
+        """Test documents already stored under their content hash are not re-embedded"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(1, "ks_a", 2)
+        stored = {KnowledgeManager.document_id("", "old a"), KnowledgeManager.document_id("", "old b")}
+        collection = Mock()
+        collection.get.side_effect = lambda ids, include: {"ids": [i for i in ids if i in stored]}
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(side_effect=lambda texts: [[0.1, 0.2] for _ in texts])
+        progress = Mock()
+
+        documents = [("old a", None), ("new", None), ("old b", None), ("new", None)]
+
+        # Act
+        count = manager.ingest(1, documents, batch_size=10, progress=progress)
+
+        # Assert
+        assert count == 1
+        manager.embedding_function.assert_called_once_with(["new"])
+        assert collection.upsert.call_args.kwargs["ids"] == [KnowledgeManager.document_id("", "new")]
+        assert progress.call_args[0][0].skipped == 2
+
+
+class TestKnowledgeManagerDocuments:
+    """Test re-assembling full documents from their chunks"""
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_get_document_reassembles_chunks_in_order(self, mock_get_session, mock_client_cls):
+        """Test overlapping chunks are stitched back into the original text"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(1, "ks_a")
+        document = "alpha beta gamma delta epsilon"
+        collection = Mock()
+        collection.get.return_value = {
+            "ids": ["doc_0_chunk_1", "doc_0_chunk_0"],
+            "documents": ["gamma delta epsilon", "alpha beta gamma"],
+            "metadatas": [
+                {"parent_id": "doc_0", "chunk_index": 1, "start_offset": 11, "end_offset": 30},
+                {"parent_id": "doc_0", "chunk_index": 0, "start_offset": 0, "end_offset": 16}
+            ]
+        }
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+
+        # Act
+        result = manager.get_document(1, "doc_0")
+
+        # Assert
+        assert result["document"] == document
+        assert result["chunk_count"] == 2
+        assert collection.get.call_args.kwargs["where"] == {"parent_id": "doc_0"}
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_delete_document_removes_all_chunks(self, mock_get_session, mock_client_cls):
+        """Test deleting a document removes its chunks and decrements the count"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_source(1, "ks_a")
+        collection = Mock()
+        collection.get.side_effect = [
+            {"ids": []},
+            {"ids": ["doc_x_chunk_0", "doc_x_chunk_1"]}
+        ]
+        mock_client_cls.return_value.get_collection.return_value = collection
+
+        manager = KnowledgeManager()
+
+        # Act
+        deleted = manager.delete_document(1, "doc_x")
+
+        # Assert
+        assert deleted
+        collection.delete.assert_called_once_with(ids=["doc_x_chunk_0", "doc_x_chunk_1"])
+        mock_session.commit.assert_called_once()
+
+
+class TestChunkedSearch:
+    """Test searching sources stored as chunks"""
+
+    def test_search_returns_more_chunks_than_documents(self, test_db, tmp_path, monkeypatch):
+        """Test n_results is not capped by the parent document count"""
+        # Arrange
+        monkeypatch.setenv("CHROMA_PERSIST_DIR", str(tmp_path))
+        monkeypatch.setattr("src.chatbot.knowledge.manager.db.get_session", lambda: iter([test_db]))
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(
+            side_effect=lambda texts, persist=True: [[float(len(t)), 1.0] for t in texts],
+            max_chunk_words=196
+        )
+
+        source = manager.create_knowledge_source(
+            "Manual", chunking=ChunkingSettings(strategy="tokens", chunk_size=16, chunk_overlap=0)
+        )
+        manager.ingest(source["id"], [(" ".join(f"word{i}" for i in range(16 * 15)), None)])
+
+        # Act
+        results = manager.search("word", n_results=5)
+
+        # Assert
+        assert len(results) == 5
+        assert {metadata["chunk_count"] for _, _, metadata in results} == {15}
+
+
+class TestChunkingLimits:
+    """Test chunk sizes are checked against the embedding model"""
+
+    @patch('src.chatbot.knowledge.manager.chromadb.PersistentClient')
+    @patch('src.chatbot.knowledge.manager.db.get_session')
+    def test_chunks_the_model_would_truncate_are_rejected(self, mock_get_session, mock_client_cls):
+        """Test a chunk_size over the model's input length fails at creation"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        manager = KnowledgeManager()
+        manager.embedding_function = Embedder(Mock(max_tokens=256), None)
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="196 words"):
+            manager.create_knowledge_source("Docs", chunking=ChunkingSettings(chunk_size=250))
+        assert not mock_session.add.called
+
+        manager.create_knowledge_source("Docs", chunking=ChunkingSettings())
+        assert mock_session.add.called
+
+
+class TestSharedLayoutMigration:
+    """Test moving per-source collections into the shared collection"""
+
+    def test_migrated_documents_can_be_read_deleted_and_replaced(self, test_db, tmp_path, monkeypatch):
+        """Test migrated chunks keep resolving by the prefixed document id"""
+        # Arrange
+        monkeypatch.setenv("CHROMA_PERSIST_DIR", str(tmp_path))
+        monkeypatch.setattr("src.chatbot.knowledge.manager.db.get_session", lambda: iter([test_db]))
+        manager = KnowledgeManager()
+        manager.embedding_function = Mock(
+            side_effect=lambda texts, persist=True: [[float(len(t)), 1.0] for t in texts],
+            max_chunk_words=196
+        )
+
+        source = manager.create_knowledge_source(
+            "Docs", chunking=ChunkingSettings(strategy="tokens", chunk_size=16, chunk_overlap=4)
+        )
+        kept = " ".join(f"kept{i}" for i in range(40))
+        replaced = " ".join(f"old{i}" for i in range(40))
+        manager.ingest(source["id"], [(kept, None), (replaced, None)])
+
+        # Act
+        migrated = manager.migrate_to_shared_layout()
+
+        # Assert
+        prefix = f"ks{source['id']}_"
+        kept_id = KnowledgeManager.document_id(prefix, kept)
+        replaced_id = KnowledgeManager.document_id(prefix, replaced)
+        assert migrated == {"Docs": 6}
+        assert manager.get_document(source["id"], kept_id)["document"] == kept
+
+        new_id = manager.replace_document(source["id"], replaced_id, "a short replacement")
+        assert new_id == KnowledgeManager.document_id(prefix, "a short replacement")
+        assert manager.get_document(source["id"], replaced_id) is None
+        assert manager.get_document(source["id"], new_id)["document"] == "a short replacement"
+
+        assert manager.delete_document(source["id"], kept_id)
+        assert manager.get_document(source["id"], kept_id) is None
+        assert manager._shared_collection().count() == 1
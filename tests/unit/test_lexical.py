@@ -0,0 +1,76 @@
+import pytest
+from src.chatbot.knowledge.lexical import BM25Index, tokenize
+
+
+class TestBM25Index:
+    """Test the incremental BM25 index used for hybrid search"""
+
+    def test_tokenize_keeps_identifiers_whole_and_split(self):
+        """Test product codes match both whole and by their parts"""
+        # Act
+        tokens = tokenize("Error ERR-4012 on v2.3")
+
+        # Assert
+        assert tokens == ["error", "err-4012", "err", "4012", "on", "v2.3", "v2", "3"]
+
+    def test_exact_identifier_ranks_first(self):
+        """Test a rare identifier outranks documents sharing only common words"""
+        # Arrange
+        index = BM25Index()
+        index.add("a", "The printer shows an error when printing")
+        index.add("b", "The printer shows error ERR-4012 when the tray is empty")
+        index.add("c", "Restart the printer to clear an error")
+
+        # Act
+        results = index.search("what does ERR-4012 mean", 3)
+
+        # Assert
+        assert results[0][0] == "b"
+
+    def test_removed_and_replaced_documents(self):
+        """Test removed documents disappear and re-added ids are not duplicated"""
+        # Arrange
+        index = BM25Index()
+        index.add("a", "alpha beta")
+        index.add("b", "alpha gamma")
+        index.add("b", "delta")
+
+        # Act
+        index.remove("a")
+
+        # Assert
+        assert index.search("alpha", 5) == []
+        assert [doc_id for doc_id, _ in index.search("delta", 5)] == ["b"]
+        assert len(index) == 1
+
+    def test_compaction_keeps_results(self):
+        """Test compacting tombstones leaves live documents searchable"""
+        # Arrange
+        index = BM25Index()
+        for i in range(3000):
+            index.add(f"d{i}", f"common token{i}")
+
+        # Act
+        for i in range(2500):
+            index.remove(f"d{i}")
+
+        # Assert
+        assert len(index) == 500
+        assert [doc_id for doc_id, _ in index.search("token2999", 1)] == ["d2999"]
+        assert index.search("token10", 1) == []
+
+    def test_tombstones_are_filtered_before_compaction(self):
+        """Test removed documents sharing a term never come back while still tombstoned"""
+        # Arrange
+        index = BM25Index()
+        for i in range(1000):
+            index.add(f"d{i}", f"common token{i}")
+
+        # Act
+        for i in range(900):
+            index.remove(f"d{i}")
+        results = index.search("common", 1000)
+
+        # Assert
+        assert len(index._doc_ids) == 1000
+        assert sorted(doc_id for doc_id, _ in results) == sorted(f"d{i}" for i in range(900, 1000))
@@ -0,0 +1,131 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from src.chatbot.db.models import Base
+from alembic import command
+from src.chatbot.db.migrate import alembic_config, upgrade_database, current_revision
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    """Test the migration history against the models"""
+
+    def test_upgrade_matches_models(self, engine):
+        """Test a fresh database upgraded to head has exactly the models' schema"""
+        # Act
+        upgrade_database(engine)
+
+        # Assert
+        with engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+        assert diff == []
+        assert current_revision(engine) == "0003"
+
+    def test_hot_path_indexes_are_created(self, engine):
+        """Test the indexes are absent before 0003 and present after it"""
+        # Arrange
+        upgrade_database(engine, "0002")
+        assert "ix_messages_conversation_id_created_at" not in index_names(engine, "messages")
+
+        # Act
+        upgrade_database(engine)
+
+        # Assert
+        assert "ix_messages_conversation_id_created_at" in index_names(engine, "messages")
+        assert {"ix_feedback_message_id", "ix_feedback_feedback_type_created_at"} <= index_names(engine, "feedback")
+        assert "ix_configurations_is_active" in index_names(engine, "configurations")
+        unique = inspect(engine).get_unique_constraints("ab_test_assignments")
+        assert [c["column_names"] for c in unique] == [["user_identifier", "test_id"]]
+
+    def test_legacy_schema_is_stamped_and_upgraded(self, engine):
+        """Test a create_all database without history is adopted, keeping its data"""
+        # Arrange
+        upgrade_database(engine, "0001")
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(text(
+                "INSERT INTO configurations (name, config_json, version, is_active, created_at, updated_at) "
+                "VALUES ('a', '{}', 1, 1, '2025-01-01', '2025-01-01'), ('b', '{}', 1, 0, '2025-01-01', '2025-01-01')"
+            ))
+            connection.execute(text(
+                "INSERT INTO ab_tests (name, control_config_id, treatment_config_id, traffic_percentage, "
+                "is_active, created_at, updated_at) VALUES ('t', 1, 2, 50, 1, '2025-01-01', '2025-01-01')"
+            ))
+            connection.execute(text(
+                "INSERT INTO ab_test_assignments (user_identifier, test_id, variant, created_at, updated_at) "
+                "VALUES ('u', 1, 'control', '2025-01-01', '2025-01-01'), "
+                "('u', 1, 'treatment', '2025-01-01', '2025-01-01')"
+            ))
+
+        # Act
+        upgrade_database(engine)
+
+        # Assert
+        assert current_revision(engine) == "0003"
+        assert "last_message_at" in {c["name"] for c in inspect(engine).get_columns("conversations")}
+        with engine.connect() as connection:
+            variants = connection.execute(text("SELECT variant FROM ab_test_assignments")).scalars().all()
+        assert variants == ["control"]
+
+    def test_new_columns_are_added_with_existing_rows_upgraded(self, engine):
+        """Test columns added since the baseline get their defaults and counters on existing rows"""
+        # Arrange
+        upgrade_database(engine, "0001")
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(text(
+                "INSERT INTO knowledge_sources (name, collection_name, document_count, is_active, "
+                "created_at, updated_at) VALUES ('docs', 'ks_docs', 3, 1, '2025-01-01', '2025-01-01')"
+            ))
+            connection.execute(text(
+                "INSERT INTO conversations (title, created_at, updated_at) "
+                "VALUES ('busy', '2025-01-01', '2025-01-01'), ('empty', '2025-01-01', '2025-01-01')"
+            ))
+            connection.execute(text(
+                "INSERT INTO messages (conversation_id, role, content, created_at, updated_at) "
+                "VALUES (1, 'user', 'hi', '2025-01-02 10:00:00', '2025-01-02 10:00:00'), "
+                "(1, 'assistant', 'hello', '2025-01-02 10:00:05', '2025-01-02 10:00:05')"
+            ))
+
+        # Act
+        upgrade_database(engine)
+
+        # Assert
+        with engine.connect() as connection:
+            source = connection.execute(text(
+                "SELECT storage_layout, chunking, embedding, version FROM knowledge_sources"
+            )).one()
+            counters = connection.execute(text(
+                "SELECT message_count, last_message_at FROM conversations ORDER BY id"
+            )).all()
+        assert tuple(source) == ("per_source", None, None, 0)
+        assert [tuple(row) for row in counters] == [(2, "2025-01-02 10:00:05"), (0, None)]
+
+    def test_downgrade_restores_baseline(self, engine):
+        """Test downgrading to the baseline removes the added columns and upgrading again works"""
+        # Arrange
+        upgrade_database(engine, "0001")
+        with engine.connect() as connection:
+            baseline = {table: inspect(connection).get_columns(table) for table in ("conversations", "knowledge_sources")}
+        upgrade_database(engine)
+
+        # Act
+        with engine.begin() as connection:
+            command.downgrade(alembic_config(connection), "0001")
+
+        # Assert
+        for table, columns in baseline.items():
+            assert [c["name"] for c in inspect(engine).get_columns(table)] == [c["name"] for c in columns]
+        upgrade_database(engine)
+        assert current_revision(engine) == "0003"
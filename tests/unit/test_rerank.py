@@ -0,0 +1,99 @@
+import sys
+import time
+import pytest
+from unittest.mock import Mock
+from src.chatbot.config_schemas import RerankSettings
+from src.chatbot.knowledge.rerank import LexicalOverlapScorer, Reranker, check_scorer, get_reranker, reranker_stats
+
+
+def make_results(*documents):
+    return [(doc, 0.1 * rank, {"rank": rank}) for rank, doc in enumerate(documents)]
+
+
+class TestReranker:
+    """Test second-stage reranking of search hits"""
+
+    def test_lexical_scorer_promotes_matching_candidate(self):
+        """Test the candidate covering the query terms moves to the top"""
+        # Arrange
+        reranker = Reranker(LexicalOverlapScorer(), budget_ms=1000)
+        results = make_results(
+            "Our office is closed on public holidays",
+            "Shipping usually takes three days",
+            "To reset your password open the account settings page"
+        )
+
+        # Act
+        reranked = reranker.rerank("how do I reset my password", results, 2)
+
+        # Assert
+        assert reranked[0][0] == "To reset your password open the account settings page"
+        assert reranked[0][2]["rerank_score"] > reranked[1][2]["rerank_score"]
+        assert len(reranked) == 2
+        assert reranker.stats() == {"reranked": 1, "fallbacks": 0}
+
+    def test_budget_overrun_falls_back_to_vector_order(self):
+        """Test a slow scorer is abandoned once the budget is spent"""
+        # Arrange
+        scorer = Mock(batch_size=1)
+        scorer.score.side_effect = lambda query, documents: time.sleep(0.02) or [1.0] * len(documents)
+        reranker = Reranker(scorer, budget_ms=5)
+        results = make_results("a", "b", "c", "d")
+
+        # Act
+        reranked = reranker.rerank("query", results, 2)
+
+        # Assert
+        assert reranked == results[:2]
+        assert scorer.score.call_count == 1
+        assert reranker.stats()["fallbacks"] == 1
+
+    def test_reranker_is_shared_per_configuration(self):
+        """Test scorers are built once per configuration"""
+        # Act
+        first = get_reranker(RerankSettings(enabled=True, budget_ms=25))
+        second = get_reranker(RerankSettings(enabled=True, budget_ms=25, candidates=40))
+
+        # Assert
+        assert first is second
+        assert isinstance(first.scorer, LexicalOverlapScorer)
+
+    def test_stats_are_reported_per_configuration(self):
+        """Test counters of every shared reranker are reported with their settings"""
+        # Arrange
+        reranker = get_reranker(RerankSettings(enabled=True, budget_ms=35))
+        reranker.rerank("reset password", make_results("reset your password", "shipping times"), 1)
+
+        # Act
+        stats = reranker_stats()
+
+        # Assert
+        entry = next(entry for entry in stats["rerankers"] if entry["budget_ms"] == 35)
+        assert entry["scorer"] == "lexical"
+        assert entry["reranked"] >= 1
+        assert "fallbacks" in entry
+
+    def test_unloadable_scorer_falls_back_to_vector_order(self, monkeypatch):
+        """Test a cross encoder that cannot be built keeps vector order and counts a fallback"""
+        # Arrange
+        monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+        reranker = get_reranker(RerankSettings(enabled=True, scorer="cross_encoder", budget_ms=45))
+        results = make_results("a", "b", "c")
+
+        # Act
+        reranked = reranker.rerank("query", results, 2)
+
+        # Assert
+        assert reranked == results[:2]
+        assert reranker.stats() == {"reranked": 0, "fallbacks": 1}
+
+    def test_cross_encoder_without_dependency_is_rejected(self, monkeypatch):
+        """Test saving a cross encoder configuration fails when sentence-transformers is missing"""
+        # Arrange
+        monkeypatch.setattr("src.chatbot.knowledge.rerank.importlib.util.find_spec", lambda name: None)
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="sentence-transformers"):
+            check_scorer(RerankSettings(enabled=True, scorer="cross_encoder"))
+        check_scorer(RerankSettings(enabled=False, scorer="cross_encoder"))
+        check_scorer(RerankSettings(enabled=True, scorer="lexical"))
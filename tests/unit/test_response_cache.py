@@ -0,0 +1,107 @@
+import pytest
+from unittest.mock import patch
+from src.chatbot.response_cache import ResponseCache
+from src.chatbot.config_schemas import ChatbotConfiguration
+
+
+def fake_embedding_function(texts):
+    # Bag of characters is enough to make similar questions score close
+    vectors = []
+    for text in texts:
+        vector = [0.0] * 26
+        for char in text:
+            if "a" <= char <= "z":
+                vector[ord(char) - ord("a")] += 1.0
+        vectors.append(vector)
+    return vectors
+
+
+class TestResponseCache:
+    """Test the opt-in LLM response cache"""
+
+    def test_exact_hit_after_normalization(self):
+        """Test prompts differing only in case and spacing share an entry"""
+        # Arrange
+        cache = ResponseCache(max_entries=10)
+        config = ChatbotConfiguration(name="FAQ", response_cache={"enabled": True})
+        cache.put(cache.key_for(config, "How do I reset my password?", []), "Use the reset link.", 60)
+
+        # Act
+        response = cache.get(cache.key_for(config, "  how do I   reset my password ", []))
+
+        # Assert
+        assert response == "Use the reset link."
+        assert cache.stats()["hits"] == 1
+
+    def test_configuration_and_context_change_the_key(self):
+        """Test a different configuration or context misses the cache"""
+        # Arrange
+        cache = ResponseCache(max_entries=10)
+        config = ChatbotConfiguration(name="FAQ", response_cache={"enabled": True})
+        cache.put(cache.key_for(config, "Opening hours?", ["9 to 5"]), "9 to 5.", 60)
+
+        changed_config = ChatbotConfiguration(
+            name="FAQ",
+            response_cache={"enabled": True},
+            model_parameters={"temperature": 0.1}
+        )
+
+        # Act & Assert
+        assert cache.get(cache.key_for(config, "Opening hours?", ["10 to 6"])) is None
+        assert cache.get(cache.key_for(changed_config, "Opening hours?", ["9 to 5"])) is None
+        assert cache.stats()["misses"] == 2
+
+    def test_expired_entries_are_not_served(self):
+        """Test entries past their TTL are dropped"""
+        # Arrange
+        cache = ResponseCache(max_entries=10)
+        config = ChatbotConfiguration(name="FAQ", response_cache={"enabled": True})
+        key = cache.key_for(config, "Hello", [])
+
+        with patch('src.chatbot.response_cache.time.monotonic', return_value=1000.0):
+            cache.put(key, "Hi!", 60)
+
+        # Act
+        with patch('src.chatbot.response_cache.time.monotonic', return_value=1061.0):
+            response = cache.get(key)
+
+        # Assert
+        assert response is None
+        assert cache.stats()["entries"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the cache stays within its entry limit"""
+        # Arrange
+        cache = ResponseCache(max_entries=2)
+        config = ChatbotConfiguration(name="FAQ", response_cache={"enabled": True})
+        keys = [cache.key_for(config, question, []) for question in ["one", "two", "three"]]
+        cache.put(keys[0], "1", 60)
+        cache.put(keys[1], "2", 60)
+
+        # Act
+        cache.get(keys[0])
+        cache.put(keys[2], "3", 60)
+
+        # Assert
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "1"
+        assert cache.get(keys[2]) == "3"
+
+    def test_semantic_hit_above_threshold(self):
+        """Test near-identical questions hit when similarity is enabled"""
+        # Arrange
+        cache = ResponseCache(max_entries=10, embedding_function=fake_embedding_function)
+        config = ChatbotConfiguration(
+            name="FAQ",
+            response_cache={"enabled": True, "similarity_threshold": 0.9}
+        )
+        cache.put(cache.key_for(config, "where is my order", []), "Check the tracking page.", 60)
+
+        # Act
+        similar = cache.get(cache.key_for(config, "where is my orders", []), 0.9)
+        unrelated = cache.get(cache.key_for(config, "cancel subscription", []), 0.9)
+
+        # Assert
+        assert similar == "Check the tracking page."
+        assert unrelated is None
+        assert cache.stats()["semantic_hits"] == 1
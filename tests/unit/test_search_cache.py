@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch
+from src.chatbot.knowledge.search_cache import SearchCache
+
+
+class TestSearchCache:
+    """Test the versioned search-result cache"""
+
+    def test_key_normalizes_query_and_source_order(self):
+        """Test equivalent searches share one key"""
+        # Act & Assert
+        assert SearchCache.key_for("Reset  Password?", [2, 1], 3) == SearchCache.key_for("reset password", [1, 2], 3)
+        assert SearchCache.key_for("reset password", [1, 2], 3) != SearchCache.key_for("reset password", [1, 2], 5)
+
+    def test_version_change_invalidates_entry(self):
+        """Test results computed before an ingest are not served after it"""
+        # Arrange
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        key = cache.key_for("query", [1, 2], 3)
+        cache.put(key, (4, 7), [("doc", 0.1, {})])
+
+        # Act
+        hit = cache.get(key, (4, 7))
+        stale = cache.get(key, (5, 7))
+
+        # Assert
+        assert hit == [("doc", 0.1, {})]
+        assert stale is None
+        assert cache.stats()["stale"] == 1
+        assert cache.stats()["hit_rate"] == 50.0
+
+    def test_expired_entry_is_not_served(self):
+        """Test entries past their TTL are dropped"""
+        # Arrange
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        key = cache.key_for("query", [1], 3)
+        with patch('src.chatbot.knowledge.search_cache.time.monotonic', return_value=100.0):
+            cache.put(key, (1,), [("doc", 0.1, {})])
+
+        # Act
+        with patch('src.chatbot.knowledge.search_cache.time.monotonic', return_value=161.0):
+            result = cache.get(key, (1,))
+
+        # Assert
+        assert result is None
+
+    def test_invalidate_source_drops_its_entries(self):
+        """Test deleting a source removes every entry that searched it"""
+        # Arrange
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        cache.put(cache.key_for("a", [1, 2], 3), (0, 0), [])
+        cache.put(cache.key_for("b", [2], 3), (0,), [])
+
+        # Act
+        cache.invalidate_source(1)
+
+        # Assert
+        assert cache.stats()["entries"] == 1
+        assert cache.get(cache.key_for("b", [2], 3), (0,)) == []
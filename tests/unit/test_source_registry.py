@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import Mock, patch
+from src.chatbot.knowledge.registry import SourceRegistry
+
+
+def make_row(source_id: int, collection_name: str, is_active: bool = True) -> Mock:
+    row = Mock(
+        id=source_id,
+        collection_name=collection_name,
+        document_count=1,
+        storage_layout="per_source",
+        version=0,
+        chunking=None,
+        embedding=None,
+        is_active=is_active
+    )
+    row.name = collection_name
+    return row
+
+
+class TestSourceRegistry:
+    """Test the process-local registry of active knowledge sources"""
+
+    @patch('src.chatbot.knowledge.registry.db.get_session')
+    def test_sources_are_loaded_once(self, mock_get_session):
+        """Test repeated lookups are served without touching the database"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [
+            make_row(1, "ks_a"), make_row(2, "ks_b")
+        ]
+        registry = SourceRegistry(Mock(), ttl_seconds=60)
+
+        # Act
+        everything = registry.active_sources()
+        selected = registry.active_sources([2, 3])
+
+        # Assert
+        assert [source.id for source in everything] == [1, 2]
+        assert [source.collection_name for source in selected] == ["ks_b"]
+        assert mock_get_session.call_count == 1
+        assert registry.stats()["age_seconds"] is not None
+
+    @patch('src.chatbot.knowledge.registry.db.get_session')
+    def test_collection_handles_are_cached_until_source_removed(self, mock_get_session):
+        """Test collections are resolved once and dropped with their source"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [make_row(1, "ks_a")]
+        loader = Mock(side_effect=lambda name: Mock(name=name))
+        registry = SourceRegistry(loader, ttl_seconds=60)
+        registry.active_sources()
+
+        # Act
+        first = registry.collection("ks_a")
+        second = registry.collection("ks_a")
+        registry.remove(1)
+        third = registry.collection("ks_a")
+
+        # Assert
+        assert first is second
+        assert third is not first
+        assert loader.call_count == 2
+        assert registry.active_sources() == []
+
+    @patch('src.chatbot.knowledge.registry.db.get_session')
+    def test_deactivated_source_leaves_registry(self, mock_get_session):
+        """Test refreshing a deactivated source removes it"""
+        # Arrange
+        mock_session = Mock()
+        mock_get_session.side_effect = lambda: iter([mock_session])
+        mock_session.query.return_value.filter_by.return_value.all.return_value = [make_row(1, "ks_a")]
+        mock_session.query.return_value.filter_by.return_value.first.return_value = make_row(1, "ks_a", False)
+        registry = SourceRegistry(Mock(), ttl_seconds=60)
+        registry.active_sources()
+
+        # Act
+        registry.refresh_source(1)
+
+        # Assert
+        assert registry.active_sources() == []